@@ -1,9 +1,74 @@
+import logging
 import pandas as pd
 import numpy as np
 import re
 
+from application.instrumentacion import instrumentar, medir
+
+logger = logging.getLogger(__name__)
+
+# Zonas del local para normalizar nombres de mesa del Índice ("Sala S3", "Balcón B1", "C2"...).
+# Por zona: código de salida, patrones en orden de prioridad (el grupo 1 es el número)
+# y rango de números válidos. Un número fuera de rango prueba el siguiente patrón.
+ZONAS_MESAS = [
+    {"codigo": "S", "patrones": [r"SALA\s+S\s*(\d+)", r"SALON\s+S?\s*(\d+)", r"\bS\s*(\d+)"], "rango": (1, 6)},
+    {"codigo": "B", "patrones": [r"BALCON\s+B\s*(\d+)", r"\bB\s*(\d+)"], "rango": (1, 5)},
+    {"codigo": "C", "patrones": [r"CUBICUL\w*\s+C\s*(\d+)", r"\bC\s*(\d+)"], "rango": (1, 6)},  # C6 aparece en el CSV
+    {"codigo": "P", "patrones": [r"BARRA\s+P\s*(\d+)", r"\bP\s*(\d+)"], "rango": (1, 2)},
+]
+MESAS_DESCARTADAS = ["YANGO", "DELIVERY"]   # Entregas: no ocupan mesa
+MESA_SALA = "SALA"                          # Sala privada sin número específico
+PALABRAS_SALA = ["SALA", "SALON"]
+
+
+class ResolvedorMesas:
+    """
+    Normaliza nombres de mesa a códigos del plano (S1..S6, B1..B5, C1..C6, P1..P2, SALA).
+    Los patrones se compilan una vez; `normalizar` resuelve cada nombre distinto una
+    sola vez y expande el resultado a todas las filas.
+    """
+    def __init__(self, zonas=ZONAS_MESAS, descartadas=MESAS_DESCARTADAS, sala=MESA_SALA, palabras_sala=PALABRAS_SALA):
+        # Quitar acentos simples para que CUBÍCULO, BALCÓN, SALÓN se reconozcan
+        self._tabla_acentos = str.maketrans("ÁÉÍÓÚÜÑ", "AEIOUUN")
+        self._reglas = [
+            (zona["codigo"], re.compile(patron), zona["rango"])
+            for zona in zonas for patron in zona["patrones"]
+        ]
+        self._descartadas = list(descartadas)
+        self._sala = sala
+        self._palabras_sala = list(palabras_sala)
+
+    def resolver(self, nombre):
+        """Código de mesa para un nombre, o None (vacío, delivery, personas, cuentas...)."""
+        if pd.isna(nombre):
+            return None
+        mesa = str(nombre).strip().upper().translate(self._tabla_acentos)
+        if not mesa or any(p in mesa for p in self._descartadas):
+            return None
+
+        for codigo, patron, (minimo, maximo) in self._reglas:
+            m = patron.search(mesa)
+            if m and minimo <= int(m.group(1)) <= maximo:
+                return f"{codigo}{int(m.group(1))}"
+
+        if any(p in mesa for p in self._palabras_sala):
+            return self._sala
+        return None
+
+    def normalizar(self, serie):
+        """Aplica `resolver` a una Serie evaluando cada valor distinto una sola vez."""
+        codigos, unicos = pd.factorize(serie)
+        resueltos = np.array([self.resolver(n) for n in unicos] + [None], dtype=object)
+        return pd.Series(resueltos[codigos], index=serie.index, dtype=object)  # código -1 (nulo) -> None
+
+
+RESOLVEDOR_MESAS = ResolvedorMesas()
+
+
+@instrumentar
 class AnalistaOperacional:
-    def __init__(self, df_ventas=None, df_indice=None):
+    def __init__(self, df_ventas=None, df_indice=None, resolvedor_mesas=None):
+        self.resolvedor_mesas = resolvedor_mesas or RESOLVEDOR_MESAS
         # Permitimos que cualquiera de los dos sea None para flexibilidad
         self.df_ventas = self._preparar_ventas(df_ventas)
         self.df_indice = self._preparar_indice(df_indice)
@@ -78,6 +143,7 @@ class AnalistaOperacional:
 
         return df
 
+    @medir(entrada=("df_ventas", "df_indice"))
     def _fusionar_y_validar(self):
         """Fusión inteligente"""
         # Si falta uno, devolvemos el que hay (adaptado)
@@ -110,14 +176,14 @@ class AnalistaOperacional:
             )
             return df_merged
         except Exception as e:
-            print(f"Error en fusión: {e}")
+            logger.warning("Error en fusión: %s", e)
             # Intento alternativo: merge solo por Ticket_ID si Dia_Join no está alineado
             try:
                 df_merged = pd.merge(left, right, on=["Ticket_ID"], how="left", suffixes=("", "_idx"))
-                print("Fusión alternativa por Ticket_ID aplicada.")
+                logger.info("Fusión alternativa por Ticket_ID aplicada.")
                 return df_merged
             except Exception as e2:
-                print(f"Error en fusión alternativa: {e2}")
+                logger.error("Error en fusión alternativa: %s", e2)
                 return self.df_ventas
 
     def kpis_velocidad(self):
@@ -152,18 +218,16 @@ class AnalistaOperacional:
         Analiza ocupación de mesas basada en CONTEO de visitas.
         Filtra solo lo anulado (operativamente no cuenta), pero incluye todo lo demás.
         """
-        print("\n=== INICIO heatmap_mesas ===")
-        df = self.df_maestro.copy()
-        print(f"Maestro shape: {df.shape}")
-        print(f"Columnas disponibles: {df.columns.tolist()}")
+        df = self.df_maestro
+        logger.debug("heatmap_mesas: maestro %s, columnas %s", df.shape, df.columns.tolist())
         
         if "Mesa_Real" not in df.columns:
-            print("ERROR: Mesa_Real no existe en columnas!")
+            logger.error("heatmap_mesas: Mesa_Real no existe en columnas")
             return None
 
         # 1. Limpieza de datos nulos o genéricos
         df_mesas = df.dropna(subset=["Mesa_Real"])
-        print(f"Después de dropna Mesa_Real: {len(df_mesas)} filas")
+        logger.debug("Después de dropna Mesa_Real: %d filas", len(df_mesas))
         
         # 2. Filtro Operativo
         # Queremos contar "veces que consumieron", por lo tanto excluimos solo los ANULADOS.
@@ -172,112 +236,29 @@ class AnalistaOperacional:
             # Normalizar a string para comparar seguro
             df_mesas = df_mesas[~df_mesas["anulado"].astype(str).str.lower().isin(["sí", "si", "true", "yes"])]
 
-        def normalizar_mesa(nombre):
-            if pd.isna(nombre):
-                return None
-            raw = str(nombre).strip().upper()
-            if not raw:
-                return None
-
-            # Quitar acentos simples para que CUBÍCULO, BALCÓN, SALÓN se reconozcan
-            tabla = str.maketrans("ÁÉÍÓÚÜÑ", "AEIOUUN")
-            mesa = raw.translate(tabla)
-
-            # Entregas / delivery: descartar antes de procesar
-            if "YANGO" in mesa or "DELIVERY" in mesa:
-                return None
-
-            # Salón: "Sala S#" o "Salon #"
-            m = re.search(r"SALA\s+S\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 6:
-                    return f"S{num}"
-            m = re.search(r"SALON\s+S?\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 6:
-                    return f"S{num}"
-            # Alias solo S# sin palabra SALA
-            m = re.search(r"\bS\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 6:
-                    return f"S{num}"
-
-            # Balcón: "Balcon B#"
-            m = re.search(r"BALCON\s+B\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 5:
-                    return f"B{num}"
-            # Alias solo B#
-            m = re.search(r"\bB\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 5:
-                    return f"B{num}"
-
-            # Cubículos: "Cubiculo C#"
-            m = re.search(r"CUBICUL\w*\s+C\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 6:  # Extendido a C6 por el CSV
-                    return f"C{num}"
-            # Alias solo C#
-            m = re.search(r"\bC\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 6:
-                    return f"C{num}"
-
-            # Barra: "Barra P#"
-            m = re.search(r"BARRA\s+P\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 2:
-                    return f"P{num}"
-            # Alias solo P#
-            m = re.search(r"\bP\s*(\d+)", mesa)
-            if m:
-                num = int(m.group(1))
-                if 1 <= num <= 2:
-                    return f"P{num}"
-
-            # SALA sin número específico (ej. "Sala 1" genérica)
-            if "SALA" in mesa or "SALON" in mesa:
-                return "SALA"
-
-            # Fallback: nombres de personas, cuentas, etc. → filtrar
-            return None
-
         df_mesas = df_mesas.copy()
-        df_mesas["Mesa_Normalizada"] = df_mesas["Mesa_Real"].apply(normalizar_mesa)
+        df_mesas["Mesa_Normalizada"] = self.resolvedor_mesas.normalizar(df_mesas["Mesa_Real"])
         
-        # DEBUG: mostrar ejemplos de normalización
-        print("\n=== DEBUG Normalización Mesas ===")
-        print(f"Total mesas antes de normalizar: {len(df_mesas)}")
-        ejemplos = df_mesas[["Mesa_Real", "Mesa_Normalizada"]].drop_duplicates().head(20)
-        print(ejemplos.to_string())
-        print("================================\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            ejemplos = df_mesas[["Mesa_Real", "Mesa_Normalizada"]].drop_duplicates().head(20)
+            logger.debug("Normalización de mesas (%d filas), ejemplos:\n%s", len(df_mesas), ejemplos.to_string())
         
         df_mesas = df_mesas.dropna(subset=["Mesa_Normalizada"])
-        print(f"Mesas después de filtrar None: {len(df_mesas)}")
+        logger.debug("Mesas después de filtrar None: %d", len(df_mesas))
 
         if df_mesas.empty:
-            print("WARNING: No hay mesas después de normalizar!")
+            logger.warning("heatmap_mesas: no hay mesas después de normalizar")
             return None
 
         # 3. Agrupación
-        stats = df_mesas.groupby("Mesa_Normalizada").agg(
+        stats = df_mesas.groupby("Mesa_Normalizada", observed=True).agg(
             Ocupaciones=('ticket_id', 'nunique'),      # Conteo de visitas únicas
             Facturacion_Total=('monto', 'sum'),        # Total dinero
             Ticket_Promedio=('monto', 'mean')          # Promedio por visita
         ).reset_index()
         stats = stats.rename(columns={"Mesa_Normalizada": "Mesa_Real"})
 
-        print(f"Stats finales: {len(stats)} mesas agrupadas")
-        print(stats.to_string())
+        logger.debug("Stats finales: %d mesas agrupadas\n%s", len(stats), stats.to_string())
         
         # Ordenar por Ocupación (lo más importante ahora)
         return stats.sort_values("Ocupaciones", ascending=False)
\ No newline at end of file
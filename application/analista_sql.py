@@ -0,0 +1,215 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from application.instrumentacion import instrumentar
+from application.procesamiento import CANAL_ALIASES, CANAL_OTRO, CANALES, PATRON_ALQUILER
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+
+DIAS_ORDEN = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _literal(texto):
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _sql_canal(columna):
+    """CASE equivalente a _clasificar_canal: primer canal con un alias contenido en el tipo."""
+    casos = " ".join(
+        f"WHEN {' OR '.join(f'contains({columna}, {_literal(a)})' for a in alias)} THEN {_literal(canal)}"
+        for canal, alias in CANAL_ALIASES.items()
+    )
+    return f"CASE {casos} ELSE {_literal(CANAL_OTRO)} END"
+
+
+# Misma limpieza que AnalistaDeDatos._limpiar_y_estandarizar (tipo VENTAS), solo con las
+# columnas que usan los KPIs: DuckDB lee del Parquet/CSV nada más que estas.
+SQL_ORDENES = f"""
+WITH limpio AS (
+    SELECT
+        TRY_CAST(Id AS BIGINT) AS id,
+        COALESCE(TRY_CAST("Monto total" AS DOUBLE), 0) AS monto,
+        COALESCE(TRY_CAST(Descuento AS DOUBLE), 0) AS descuento,
+        try_strptime(CAST(Fecha AS VARCHAR) || ' ' || CAST(Hora AS VARCHAR), '%d/%m/%Y %H:%M') AS fecha_dt,
+        COALESCE(upper(CAST(Estado AS VARCHAR)), 'NAN') AS estado,
+        COALESCE(upper(CAST(Validez AS VARCHAR)), 'NAN') AS validez,
+        COALESCE(upper(CAST("Tipo de orden" AS VARCHAR)), 'NAN') AS tipo,
+        COALESCE(regexp_matches(CAST(Detalle AS VARCHAR), {_literal(PATRON_ALQUILER)}, 'i'), false) AS es_alquiler
+    FROM fuente
+)
+SELECT
+    *,
+    CAST(fecha_dt AS DATE) AS dia,
+    hour(fecha_dt) AS hora,
+    dayname(fecha_dt) AS dia_semana,
+    {_sql_canal("tipo")} AS canal,
+    estado = 'PAGADO' AND validez = 'VÁLIDO' AS es_valido,
+    estado = 'PAGADO' AND validez = 'VÁLIDO' AND tipo <> 'INTERNO' AND NOT es_alquiler AS es_venta_real,
+    estado = 'PAGADO' AND validez = 'VÁLIDO' AND tipo = 'INTERNO' AS es_interno,
+    estado <> 'PAGADO' AND validez = 'VÁLIDO' AS es_pendiente
+FROM limpio
+"""
+
+
+@instrumentar
+class AnalistaSQL:
+    """
+    KPIs del Reporte de Ventas calculados con DuckDB directamente sobre los archivos,
+    sin cargarlos en pandas: solo se leen las columnas usadas (proyección) y, en el
+    almacén, solo las particiones año/mes del rango (predicados). Los resultados tienen
+    la misma forma que los métodos homónimos de AnalistaDeDatos.
+
+    Construir con `desde_almacen` (data/almacen_reportes.py) o `desde_csv`.
+    """
+
+    def __init__(self, sql_fuente, desde=None, hasta=None, parametros=()):
+        if not DUCKDB_DISPONIBLE:
+            raise RuntimeError("El motor SQL requiere duckdb (pip install duckdb).")
+        self.con = duckdb.connect()
+        self._lock = threading.Lock()  # el dashboard comparte la instancia entre sesiones
+        filtro, params = "", list(parametros)
+        if desde is not None or hasta is not None:
+            filtro = "WHERE dia BETWEEN ? AND ?"
+            params += [pd.Timestamp(desde or "1900-01-01").date(), pd.Timestamp(hasta or "2999-12-31").date()]
+        self.con.execute(f"CREATE TEMP TABLE ordenes AS WITH fuente AS ({sql_fuente}) SELECT * FROM ({SQL_ORDENES}) {filtro}", params)
+
+    @classmethod
+    def desde_almacen(cls, carpeta_ventas, desde=None, hasta=None):
+        """
+        Órdenes del almacén particionado (<carpeta>/anio=AAAA/mes=MM/parte-*.parquet).
+        Ante una orden repetida gana la parte más nueva, como en AlmacenReportes.leer.
+        """
+        patron = os.path.join(str(carpeta_ventas), "anio=*", "mes=*", "parte-*.parquet")
+        desde_mes = pd.Timestamp(desde or "1900-01-01")
+        hasta_mes = pd.Timestamp(hasta or "2999-12-31")
+        sql = f"""
+            SELECT * FROM read_parquet({_literal(patron)}, hive_partitioning = true, hive_types = {{'anio': INTEGER, 'mes': INTEGER}},
+                                   union_by_name = true, filename = true)
+            WHERE anio * 100 + mes BETWEEN ? AND ?
+            QUALIFY row_number() OVER (
+                PARTITION BY Id ORDER BY CAST(regexp_extract(filename, 'parte-(\\d+)', 1) AS BIGINT) DESC) = 1
+        """
+        limites = [desde_mes.year * 100 + desde_mes.month, hasta_mes.year * 100 + hasta_mes.month]
+        return cls(sql, desde, hasta, parametros=limites)
+
+    @classmethod
+    def desde_csv(cls, rutas, desde=None, hasta=None):
+        """Órdenes de uno o más exports CSV; ante un Id repetido gana el archivo más reciente (mtime)."""
+        rutas = sorted({str(r) for r in rutas}, key=lambda r: (os.path.getmtime(r), r))
+        lista = "[" + ", ".join(_literal(r) for r in rutas) + "]"
+        sql = f"""
+            SELECT * FROM read_csv({lista}, header = true, all_varchar = true, union_by_name = true, filename = true)
+            WHERE Id IS NOT NULL AND Fecha IS NOT NULL
+            QUALIFY row_number() OVER (PARTITION BY Id ORDER BY list_position({lista}, filename) DESC) = 1
+        """
+        return cls(sql, desde, hasta)
+
+    def _consulta(self, sql, params=()):
+        with self._lock:
+            return self.con.execute(sql, list(params)).df()
+
+    def _fila(self, sql, params=()):
+        with self._lock:
+            return self.con.execute(sql, list(params)).fetchone()
+
+    def get_kpi_alquileres(self):
+        """Monto de Membresías Yango válidas (separado de la venta operativa)."""
+        return float(self._fila("SELECT COALESCE(SUM(monto), 0) FROM ordenes WHERE es_alquiler AND es_valido")[0])
+
+    def get_kpis_financieros(self):
+        """Mismos KPIs que AnalistaDeDatos.get_kpis_financieros, en una sola pasada."""
+        ventas, transacciones, descuentos, pendiente, interno = self._fila("""
+            SELECT
+                COALESCE(SUM(monto) FILTER (WHERE es_venta_real), 0),
+                COUNT(*) FILTER (WHERE es_venta_real),
+                COALESCE(SUM(descuento) FILTER (WHERE es_valido), 0),
+                COALESCE(SUM(monto) FILTER (WHERE es_pendiente), 0),
+                COALESCE(SUM(monto) FILTER (WHERE es_interno), 0)
+            FROM ordenes WHERE NOT es_alquiler
+        """)
+        return {
+            "Ventas Totales": ventas,
+            "Transacciones": transacciones,
+            "Ticket Promedio": ventas / transacciones if transacciones > 0 else 0,
+            "Total Descuentos": descuentos,
+            "Ventas Pendientes": pendiente,
+            "Consumo Interno": interno,
+            "Ratio Pagado": ventas / (ventas + pendiente) if (ventas + pendiente) > 0 else 0,
+        }
+
+    def kpis_por_canal(self):
+        """KPIs por canal (todos los de CANALES), como AnalistaDeDatos.kpis_por_canal."""
+        kpis = self._consulta("""
+            SELECT
+                canal AS Canal,
+                COALESCE(SUM(monto) FILTER (WHERE es_venta_real), 0) AS "Ventas Totales",
+                COUNT(*) FILTER (WHERE es_venta_real) AS Transacciones,
+                COALESCE(SUM(descuento) FILTER (WHERE es_valido), 0) AS "Total Descuentos",
+                COALESCE(SUM(monto) FILTER (WHERE es_pendiente), 0) AS "Ventas Pendientes",
+                COALESCE(SUM(monto) FILTER (WHERE es_interno), 0) AS "Consumo Interno"
+            FROM ordenes WHERE NOT es_alquiler
+            GROUP BY canal
+        """).set_index("Canal")
+        kpis = kpis.reindex(pd.CategoricalIndex(CANALES, categories=CANALES, name="Canal"), fill_value=0)
+        kpis["Transacciones"] = kpis["Transacciones"].astype(np.int64)
+        kpis["Ticket Promedio"] = (kpis["Ventas Totales"] / kpis["Transacciones"].replace(0, np.nan)).fillna(0.0)
+        cobrable = kpis["Ventas Totales"] + kpis["Ventas Pendientes"]
+        kpis["Ratio Pagado"] = (kpis["Ventas Totales"] / cobrable.replace(0, np.nan)).fillna(0.0)
+        return kpis[["Ventas Totales", "Transacciones", "Ticket Promedio", "Total Descuentos",
+                     "Ventas Pendientes", "Consumo Interno", "Ratio Pagado"]]
+
+    def ventas_por_tiempo(self, agrupacion="D"):
+        """Ventas válidas (sin alquileres) por Día (D) o Hora (H)."""
+        if agrupacion == "D":
+            df = self._consulta("""
+                SELECT dia AS Fecha, SUM(monto) AS "Monto total" FROM ordenes
+                WHERE es_valido AND NOT es_alquiler AND dia IS NOT NULL GROUP BY dia ORDER BY dia
+            """)
+            df["Fecha"] = df["Fecha"].dt.date
+            return df
+        if agrupacion == "H":
+            return self._consulta("""
+                SELECT hora AS Hora_Num, SUM(monto) AS "Monto total" FROM ordenes
+                WHERE es_valido AND NOT es_alquiler AND hora IS NOT NULL GROUP BY hora ORDER BY hora
+            """)
+        return pd.DataFrame()
+
+    def weekly_heatmap(self):
+        """Matriz Hora x Día de la Semana con la venta válida; la agregación corre en SQL."""
+        df = self._consulta("""
+            SELECT hora AS Hora_Num, dia_semana AS Dia_Semana, SUM(monto) AS monto FROM ordenes
+            WHERE es_valido AND NOT es_alquiler AND hora IS NOT NULL GROUP BY ALL
+        """)
+        if df.empty:
+            return None
+        pivot = df.pivot_table(index="Hora_Num", columns="Dia_Semana", values="monto", aggfunc="sum").fillna(0)
+        return pivot[[d for d in DIAS_ORDEN if d in pivot.columns]]
+
+    def frecuencia_pedidos(self, canal=None, por="Hora_Num", incluir_alquiler=False):
+        """
+        Pedidos (Id distintos) válidos por hora ('Hora_Num') o día de la semana ('Dia_Semana'),
+        para un canal o para todos (None). Alimenta los gráficos 'Frecuencia de pedidos'.
+        """
+        columna = {"Hora_Num": "hora", "Dia_Semana": "dia_semana"}[por]
+        filtros = ["es_valido", f"{columna} IS NOT NULL"]
+        params = []
+        if not incluir_alquiler:
+            filtros.append("NOT es_alquiler")
+        if canal is not None:
+            filtros.append("canal = ?")
+            params.append(canal)
+        df = self._consulta(f"""
+            SELECT {columna} AS {por}, COUNT(DISTINCT id) AS Pedidos FROM ordenes
+            WHERE {' AND '.join(filtros)} GROUP BY 1 ORDER BY 1
+        """, params)
+        if por == "Dia_Semana":
+            df = df.set_index(por).reindex(DIAS_ORDEN).dropna().reset_index()
+        return df
@@ -0,0 +1,221 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from application.instrumentacion import instrumentar
+from application.procesamiento import AnalistaDeDatos
+
+DIAS_ORDEN = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+HORA_TARDE = 14  # desde esta hora el pedido cuenta en el turno tarde
+TURNO_MANANA = "Mañana (00:00-14:00)"
+TURNO_TARDE = "Tarde (14:00-00:00)"
+
+# Claves de cada tabla del cubo. Una orden cae en una sola celda Dia x Hora x Canal, así
+# que los pedidos distintos se suman entre celdas sin contar dos veces (no hace falta un
+# sketch aproximado para el conteo de órdenes distintas).
+DIMENSIONES_ORDENES = ["Dia", "Hora_Num", "Canal", "Metodo_Pago", "Es_Alquiler"]
+DIMENSIONES_PRODUCTOS = ["Dia", "Hora_Num", "Canal", "Producto_Base", "Variante"]
+MEDIDAS_ORDENES = ["Pedidos", "Monto", "Descuento"]
+MEDIDAS_PRODUCTOS = ["Cantidad", "Pedidos"]
+
+
+def _completar_calendario(tabla):
+    """Columnas derivadas del día (se calculan una vez por celda, no por orden)."""
+    tabla["Dia_Semana"] = tabla["Dia"].dt.day_name()
+    tabla["Mes"] = tabla["Dia"].dt.to_period("M").astype(str)
+    return tabla
+
+
+TIPOS_VACIOS = {"Dia": "datetime64[ns]", "Hora_Num": "Int64", "Es_Alquiler": bool, "Pedidos": np.int64}
+
+
+def _tabla_vacia(dimensiones, medidas):
+    return _completar_calendario(pd.DataFrame({
+        c: pd.Series(dtype=TIPOS_VACIOS.get(c, float if c in medidas else object)) for c in dimensiones + medidas
+    }))
+
+
+@instrumentar
+class CuboVentas:
+    """
+    Ventas válidas del Reporte de Ventas pre-agregadas para los gráficos del dashboard:
+
+    - ordenes: Dia x Hora x Canal x Método de pago x Alquiler -> Pedidos, Monto, Descuento
+    - productos: Dia x Hora x Canal x Producto_Base x Variante -> Cantidad, Pedidos
+
+    Los gráficos por hora, día de la semana, turno y mes se resuelven sobre estas celdas
+    (a lo sumo unas decenas por día) en lugar de agrupar las órdenes. `actualizar`
+    reemplaza los días que trae un cubo nuevo; `desde_almacen` guarda un cubo por mes y
+    solo recalcula los meses cuya partición cambió.
+    """
+    NOMBRE_HUELLA = "huella.json"
+
+    def __init__(self, ordenes=None, productos=None):
+        self.ordenes = ordenes if ordenes is not None else _tabla_vacia(DIMENSIONES_ORDENES, MEDIDAS_ORDENES)
+        self.productos = productos if productos is not None else _tabla_vacia(DIMENSIONES_PRODUCTOS, MEDIDAS_PRODUCTOS)
+
+    # --- Construcción ---
+    @classmethod
+    def desde_analista(cls, analista):
+        """Cubo de las órdenes válidas (y sus items) de un AnalistaDeDatos tipo VENTAS."""
+        df = analista.df
+        if "Es_Valido" not in df.columns or "Fecha_DT" not in df.columns:
+            return cls()
+        validas = df[df["Es_Valido"]]
+        metodo = validas["Métodos de pago"] if "Métodos de pago" in validas.columns else pd.Series(np.nan, index=validas.index)
+        base = pd.DataFrame({
+            "Dia": validas["Fecha_DT"].dt.normalize(),
+            "Hora_Num": validas["Hora_Num"].astype("Int64"),
+            "Canal": validas["Canal"],
+            "Metodo_Pago": metodo.astype(object).fillna("Sin dato").astype(str),
+            "Es_Alquiler": validas["Es_Alquiler"].astype(bool),
+            "Pedidos": validas["Id"].notna().astype(np.int64) if "Id" in validas.columns else 1,
+            "Monto": validas["Monto total"].astype(float),
+            "Descuento": validas["Descuento"].astype(float) if "Descuento" in validas.columns else 0.0,
+        })
+        ordenes = base.groupby(DIMENSIONES_ORDENES, observed=True, dropna=False, sort=False)[MEDIDAS_ORDENES].sum()
+
+        productos = None
+        items = analista.analizar_productos()
+        if items is not None and not items.empty:
+            lineas = pd.DataFrame({
+                "Dia": pd.to_datetime(items["Fecha"]),
+                "Hora_Num": items["Hora"].astype("Int64"),
+                "Canal": items["Canal"],
+                "Producto_Base": items["Producto_Base"],
+                "Variante": items["Variante"],
+                "Cantidad": items["Cantidad"],
+                "Id_Venta": items["Id_Venta"],
+            })
+            productos = lineas.groupby(DIMENSIONES_PRODUCTOS, observed=True, dropna=False, sort=False).agg(
+                Cantidad=("Cantidad", "sum"), Pedidos=("Id_Venta", "nunique"))
+            productos = _completar_calendario(productos.reset_index())
+        return cls(_completar_calendario(ordenes.reset_index()), productos)
+
+    def actualizar(self, nuevo):
+        """
+        Incorpora un cubo con días nuevos o re-descargados: los días que trae `nuevo`
+        reemplazan por completo a los mismos días del cubo actual.
+        """
+        def _reemplazar(actual, entrante):
+            if entrante.empty:
+                return actual
+            if actual.empty:
+                return entrante.reset_index(drop=True)
+            dias = entrante["Dia"].unique()
+            return pd.concat([actual[~actual["Dia"].isin(dias)], entrante], ignore_index=True)
+
+        self.ordenes = _reemplazar(self.ordenes, nuevo.ordenes)
+        self.productos = _reemplazar(self.productos, nuevo.productos)
+        return self
+
+    def guardar(self, carpeta, huella=None):
+        carpeta = Path(carpeta)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        self.ordenes.astype({"Canal": str}).to_parquet(carpeta / "ordenes.parquet", index=False)
+        self.productos.astype({"Canal": str}).to_parquet(carpeta / "productos.parquet", index=False)
+        with open(carpeta / self.NOMBRE_HUELLA, "w", encoding="utf-8") as f:
+            json.dump(list(huella or []), f)
+
+    @classmethod
+    def cargar(cls, carpeta, huella=None):
+        """Cubo guardado en `carpeta`, o None si no existe o su huella no coincide con `huella`."""
+        carpeta = Path(carpeta)
+        try:
+            with open(carpeta / cls.NOMBRE_HUELLA, encoding="utf-8") as f:
+                if huella is not None and json.load(f) != list(huella):
+                    return None
+            return cls(pd.read_parquet(carpeta / "ordenes.parquet"), pd.read_parquet(carpeta / "productos.parquet"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @classmethod
+    def desde_almacen(cls, almacen, desde=None, hasta=None, carpeta=None):
+        """
+        Cubo de Ventas del almacén (data/almacen_reportes.py) mantenido por mes en
+        `carpeta` (por defecto <almacén>/Cubo_Ventas). Un mes se recalcula solo si
+        cambiaron sus partes (upsert o compactación); el resto se lee del Parquet.
+        """
+        carpeta = Path(carpeta or Path(almacen.carpeta) / "Cubo_Ventas")
+        cubo = cls()
+        for anio, mes, partes in almacen.particiones("Ventas", desde, hasta):
+            huella = [p.name for p in partes]
+            carpeta_mes = carpeta / f"anio={anio}" / f"mes={mes:02d}"
+            cubo_mes = cls.cargar(carpeta_mes, huella)
+            if cubo_mes is None:
+                inicio = pd.Timestamp(anio, mes, 1)
+                df = almacen.leer("Ventas", inicio, inicio + pd.offsets.MonthEnd(0))
+                cubo_mes = cls.desde_analista(AnalistaDeDatos(df, "VENTAS"))
+                cubo_mes.guardar(carpeta_mes, huella)
+            cubo.actualizar(cubo_mes)
+        if desde is not None or hasta is not None:
+            cubo = cubo.recortar(desde, hasta)
+        return cubo
+
+    def recortar(self, desde=None, hasta=None):
+        """Cubo con solo los días entre `desde` y `hasta` (inclusive)."""
+        def _rango(tabla):
+            dias = tabla["Dia"]
+            mascara = pd.Series(True, index=tabla.index)
+            if desde is not None:
+                mascara &= dias >= pd.Timestamp(desde)
+            if hasta is not None:
+                mascara &= dias <= pd.Timestamp(hasta)
+            return tabla[mascara].reset_index(drop=True)
+        return CuboVentas(_rango(self.ordenes), _rango(self.productos))
+
+    # --- Consultas (mismas cifras que los groupby sobre las órdenes válidas) ---
+    def _celdas(self, canal=None, incluir_alquiler=False, dia_semana=None):
+        celdas = self.ordenes
+        if not incluir_alquiler:
+            celdas = celdas[~celdas["Es_Alquiler"]]
+        if canal is not None:
+            celdas = celdas[celdas["Canal"] == canal]
+        if dia_semana is not None:
+            celdas = celdas[celdas["Dia_Semana"] == dia_semana]
+        return celdas
+
+    @staticmethod
+    def _resumir(celdas, por, nombres=("Pedidos", "Monto_Total")):
+        tabla = celdas.groupby(por, sort=True)[["Pedidos", "Monto"]].sum().reset_index()
+        tabla.columns = [por, *nombres]
+        tabla[nombres[0]] = tabla[nombres[0]].astype(np.int64)
+        tabla["Ticket_Promedio"] = tabla[nombres[1]] / tabla[nombres[0]].replace(0, np.nan)
+        return tabla
+
+    def totales(self, canal=None, incluir_alquiler=False, dia_semana=None):
+        """(pedidos, monto) del canal; con `dia_semana` solo ese día de la semana."""
+        celdas = self._celdas(canal, incluir_alquiler, dia_semana)
+        return int(celdas["Pedidos"].sum()), float(celdas["Monto"].sum())
+
+    def dias_semana(self, canal=None, incluir_alquiler=False):
+        """Días de la semana con ventas, de lunes a domingo."""
+        presentes = set(self._celdas(canal, incluir_alquiler)["Dia_Semana"].dropna())
+        return [d for d in DIAS_ORDEN if d in presentes]
+
+    def por_hora(self, canal=None, incluir_alquiler=False, dia_semana=None):
+        """Hora_Num, Pedidos, Monto_Total, Ticket_Promedio."""
+        return self._resumir(self._celdas(canal, incluir_alquiler, dia_semana).dropna(subset=["Hora_Num"]), "Hora_Num")
+
+    def por_dia_semana(self, canal=None, incluir_alquiler=False):
+        """Dia_Semana (lunes a domingo, solo los presentes), Pedidos, Monto_Total, Ticket_Promedio."""
+        tabla = self._resumir(self._celdas(canal, incluir_alquiler), "Dia_Semana")
+        return tabla.set_index("Dia_Semana").reindex(DIAS_ORDEN).dropna(subset=["Pedidos"]).reset_index()
+
+    def por_mes(self, canal=None, incluir_alquiler=False):
+        """Mes ('AAAA-MM'), Transacciones, Monto_Total, Ticket_Promedio."""
+        return self._resumir(self._celdas(canal, incluir_alquiler), "Mes", ("Transacciones", "Monto_Total"))
+
+    def por_turno(self, canal=None, incluir_alquiler=False, dia_semana=None):
+        """Turno (mañana antes de las 14:00), Pedidos, Monto, Ticket_Promedio."""
+        celdas = self._celdas(canal, incluir_alquiler, dia_semana)
+        turno = np.where(celdas["Hora_Num"].fillna(24).to_numpy() < HORA_TARDE, TURNO_MANANA, TURNO_TARDE)
+        return self._resumir(celdas.assign(Turno=turno), "Turno", ("Pedidos", "Monto"))
+
+    def productos_de(self, canal=None):
+        """Celdas de productos (Producto_Base, Variante, Cantidad, ...) de un canal o de todos."""
+        if canal is None:
+            return self.productos
+        return self.productos[self.productos["Canal"] == canal]
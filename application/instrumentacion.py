@@ -0,0 +1,172 @@
+# application/instrumentacion.py
+
+import contextvars
+import functools
+import inspect
+import logging
+import time
+import tracemalloc
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Captura activa en el contexto actual (hilo del script de Streamlit, test, benchmark...)
+_captura = contextvars.ContextVar("captura_rendimiento", default=None)
+# Pila de mediciones abiertas: permite anidar (analizar_productos -> _construir_lineas)
+_pila = contextvars.ContextVar("pila_rendimiento", default=())
+
+COLUMNAS_REGISTRO = ["Metodo", "Nivel", "Segundos", "Filas_Entrada", "Filas_Salida", "Memoria_Pico_MB"]
+
+
+def _contar_filas(obj):
+    """Filas de un resultado: DataFrame/Series, o suma de los frames de una tupla/lista/dict."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (tuple, list)):
+        conteos = [len(x) for x in obj if isinstance(x, (pd.DataFrame, pd.Series))]
+        return sum(conteos) if conteos else None
+    return None
+
+
+def _filas_atributos(instancia, atributos):
+    conteos = [_contar_filas(getattr(instancia, a, None)) for a in atributos]
+    conteos = [c for c in conteos if c is not None]
+    return sum(conteos) if conteos else None
+
+
+class _Medicion:
+    """Estado de una medición abierta. La memoria es relativa al inicio de la llamada."""
+    __slots__ = ("base", "pico")
+
+    def __init__(self):
+        self.base = 0
+        self.pico = 0
+
+
+def _abrir_memoria(pila):
+    # tracemalloc tiene un solo pico global: se vuelca al padre antes de reiniciarlo
+    medicion = _Medicion()
+    actual, pico = tracemalloc.get_traced_memory()
+    padre = pila[-1] if pila else None
+    if padre is not None:
+        padre.pico = max(padre.pico, pico - padre.base)
+    tracemalloc.reset_peak()
+    medicion.base = actual
+    return medicion
+
+
+def _cerrar_memoria(medicion, pila):
+    _, pico = tracemalloc.get_traced_memory()
+    medicion.pico = max(medicion.pico, pico - medicion.base)
+    padre = pila[-1] if pila else None
+    if padre is not None:
+        padre.pico = max(padre.pico, medicion.pico + medicion.base - padre.base)
+    tracemalloc.reset_peak()
+    return medicion.pico
+
+
+def medir(func=None, *, entrada=("df", "df_maestro"), salida=None):
+    """
+    Decorador para métodos de los analistas. Registra tiempo de pared, filas de
+    entrada (suma de los frames en los atributos `entrada` de la instancia), filas
+    de salida (del resultado, o de los atributos `salida` si el método no devuelve
+    nada útil) y pico de memoria si tracemalloc está activo.
+
+    Los registros van al logger de este módulo (nivel DEBUG) y a la captura activa
+    (ver `CapturaRendimiento`). Sin ninguno de los dos, el método se llama directamente.
+    """
+    if func is None:
+        return functools.partial(medir, entrada=entrada, salida=salida)
+
+    @functools.wraps(func)
+    def envoltura(self, *args, **kwargs):
+        captura = _captura.get()
+        if captura is None and not logger.isEnabledFor(logging.DEBUG):
+            return func(self, *args, **kwargs)
+
+        nombre = f"{type(self).__name__}.{func.__name__}"
+        filas_entrada = _filas_atributos(self, entrada)
+        pila = _pila.get()
+        con_memoria = tracemalloc.is_tracing()
+        posicion = None
+        if captura is not None:
+            # Se reserva el lugar al entrar para listar las llamadas en orden de inicio
+            posicion = len(captura)
+            captura.append(None)
+        medicion = _abrir_memoria(pila) if con_memoria else None
+        token = _pila.set(pila + (medicion,))
+        inicio = time.perf_counter()
+        try:
+            resultado = func(self, *args, **kwargs)
+        finally:
+            segundos = time.perf_counter() - inicio
+            _pila.reset(token)
+            if con_memoria:
+                pico = _cerrar_memoria(medicion, pila)
+        filas_salida = _filas_atributos(self, salida) if salida else _contar_filas(resultado)
+
+        registro = {
+            "Metodo": nombre,
+            "Nivel": len(pila),
+            "Segundos": segundos,
+            "Filas_Entrada": filas_entrada,
+            "Filas_Salida": filas_salida,
+            "Memoria_Pico_MB": pico / 2**20 if con_memoria else None,
+        }
+        logger.debug(
+            "%s: %.3f s, filas %s -> %s%s", nombre, segundos, filas_entrada, filas_salida,
+            f", pico {registro['Memoria_Pico_MB']:.1f} MB" if con_memoria else "",
+        )
+        if posicion is not None:
+            captura[posicion] = registro
+        return resultado
+
+    envoltura._medido = True
+    return envoltura
+
+
+def instrumentar(cls):
+    """
+    Decorador de clase: aplica `medir` a todos los métodos públicos definidos en la
+    clase (no a propiedades ni a métodos estáticos). Los privados que interesen
+    se decoran a mano con `@medir`.
+    """
+    for nombre, valor in list(vars(cls).items()):
+        if nombre.startswith("_") or not inspect.isfunction(valor) or getattr(valor, "_medido", False):
+            continue
+        setattr(cls, nombre, medir(valor))
+    return cls
+
+
+class CapturaRendimiento:
+    """
+    Context manager que junta los registros de las llamadas medidas dentro del bloque.
+
+        with CapturaRendimiento() as captura:
+            analista.basket_analysis()
+        tabla = captura.tabla()
+    """
+    def __init__(self):
+        self.registros = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _captura.set(self.registros)
+        return self
+
+    def __exit__(self, *exc):
+        _captura.reset(self._token)
+        return False
+
+    def iniciar(self):
+        """Activa la captura sin bloque `with` (scripts de Streamlit: dura lo que dura el rerun)."""
+        _captura.set(self.registros)
+        return self
+
+    def tabla(self):
+        """DataFrame con un registro por llamada, en orden de inicio (las fallidas no se registran)."""
+        tabla = pd.DataFrame([r for r in self.registros if r is not None], columns=COLUMNAS_REGISTRO)
+        return tabla.astype({"Filas_Entrada": "Int64", "Filas_Salida": "Int64"})
@@ -4,12 +4,237 @@ import re
 import itertools
 from collections import Counter
 
+from application.instrumentacion import instrumentar, medir
+
+try:
+    from scipy import sparse
+    SCIPY_DISPONIBLE = True
+except ImportError:
+    SCIPY_DISPONIBLE = False
+
+
+def _a_numero(serie):
+    """
+    Convierte montos a float. Las columnas ya numéricas (esquema tipado) pasan directo;
+    el texto se limpia: se quitan símbolos ('Bs', 'S/') y si la coma va después del
+    punto se interpreta como decimal ("1.234,50" -> 1234.5).
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors='coerce').fillna(0)
+    txt = serie.astype(str).str.replace(r'[^\d.,-]', '', regex=True)
+    coma_decimal = txt.str.contains(r',\d{1,2}$', regex=True) | (
+        txt.str.contains(".", regex=False) & (txt.str.rfind(",") > txt.str.rfind("."))
+    )
+    txt = txt.where(~coma_decimal, txt.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    txt = txt.str.replace(",", "", regex=False)
+    return pd.to_numeric(txt, errors='coerce').fillna(0)
+
+
+def _mayusculas(serie):
+    """
+    Equivalente a serie.astype(str).str.upper(). En columnas categóricas se transforma
+    cada categoría una sola vez y el resultado sigue siendo categórico.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories.astype(str).str.upper().to_numpy()
+        # el código -1 (nulo) cae en el último elemento: str(nan).upper()
+        valores = np.append(categorias, "NAN")[serie.cat.codes.to_numpy()]
+        return pd.Series(pd.Categorical(valores), index=serie.index)
+    return serie.astype(str).str.upper()
+
+
+# Patrón para extraer cantidad y nombre de cada item individual ("2× CAPPUCCINO: Leche almendra")
+PATRON_ITEM = r'^(\d+)\s*[x×]\s*(.+)'
+# Separa "Cappuccino (Leche almendra)" en "Cappuccino" y "Leche almendra". Corta en ':', '(', o '.'
+PATRON_VARIANTE = r'^([^(:.]+)(?:[\(:\.]\s*(.+?)\)?)?$'
+VARIANTE_ORIGINAL = "Original/Sin Cambios"
+
+
+# Canales de venta: alias que aparecen en 'Tipo de orden' (en mayúsculas). El orden importa:
+# una orden pertenece al primer canal con algún alias contenido en su tipo.
+CANAL_ALIASES = {
+    "Mesa": ["MESA", "EN LOCAL", "DINE IN"],
+    "Recojo": ["RECOJO", "RETIRO", "PICKUP", "PARA LLEVAR"],
+    "Interno": ["INTERNO"],
+    "PedidosYa": ["PEDIDOSYA", "PEDIDOS YA", "PEDIDOS-YA"],
+    "Yango": ["YANGO"]
+}
+CANAL_OTRO = "Otro"
+CANALES = list(CANAL_ALIASES) + [CANAL_OTRO]
+
+# Membresías Yango / alquiler de oficina (se reportan aparte de la venta operativa).
+# Nota: Manejamos tanto 'x' como '×' por si acaso
+PATRON_ALQUILER = r"\d[x×]\s*Cuota de membresía por Oficina C&C \(|1[x×]\s*Entrega de insumos \("
+
+
+def _clasificar_canal(tipos):
+    """
+    Columna categórica 'Canal' a partir del tipo de orden normalizado.
+    Se evalúa sobre los valores distintos (pocos) y se expande por código.
+    """
+    codigos, unicos = pd.factorize(tipos)
+    unicos = pd.Series(np.asarray(unicos, dtype=object)).astype(str).str.upper()
+    condiciones = [
+        unicos.str.contains("|".join(re.escape(a) for a in alias), regex=True).to_numpy()
+        for alias in CANAL_ALIASES.values()
+    ]
+    canal_unico = np.select(condiciones, range(len(CANAL_ALIASES)), default=len(CANALES) - 1)
+    canal = np.where(codigos >= 0, canal_unico[codigos] if len(unicos) else 0, len(CANALES) - 1)
+    return pd.Categorical.from_codes(canal, categories=CANALES)
+
+
+def _parsear_detalles(detalles):
+    """
+    Desglosa una Serie de 'Detalle' en un DataFrame con una fila por item:
+    Producto_Base, Variante, Producto_Completo, Cantidad y '_fila' (posición en `detalles`).
+
+    Los pedidos repiten mucho el mismo texto, así que se factoriza la Serie y cada
+    Detalle distinto se separa/parsea una sola vez; luego se expande a las filas originales.
+    """
+    codigos, unicos = pd.factorize(detalles)
+    columnas = ["Producto_Base", "Variante", "Producto_Completo", "Cantidad", "_fila"]
+    if len(unicos) == 0:
+        return pd.DataFrame(columns=columnas)
+
+    # --- Parseo sobre los textos únicos ---
+    textos = pd.Series(np.asarray(unicos, dtype=object)).astype(str).str.replace("\n", " ", regex=False)
+    partes = textos.str.split("—").explode().str.strip()
+    match = partes.str.extract(PATRON_ITEM).dropna(subset=[0])
+    nombre = match[1].str.strip()
+    var = nombre.str.extract(PATRON_VARIANTE)
+
+    base = var[0].str.strip().str.title().fillna(nombre.str.title())
+    variante = var[1].str.strip().fillna(VARIANTE_ORIGINAL)
+    completo = (base + " (" + variante + ")").where(variante != VARIANTE_ORIGINAL, base)
+
+    codigo_item = match.index.to_numpy()  # índice del texto único al que pertenece cada item
+    items = pd.DataFrame({
+        "Producto_Base": base.to_numpy(),
+        "Variante": variante.to_numpy(),
+        "Producto_Completo": completo.to_numpy(),
+        "Cantidad": match[0].astype(np.int64).to_numpy(),
+    })
+
+    # --- Expandir a las filas originales (cada fila repite los items de su texto) ---
+    n_items = np.bincount(codigo_item, minlength=len(unicos))
+    inicio = np.concatenate([[0], np.cumsum(n_items)[:-1]])
+    repeticiones = np.where(codigos >= 0, n_items[codigos], 0)
+    fila = np.repeat(np.arange(len(codigos)), repeticiones)
+    desplazamiento = np.arange(len(fila)) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+    resultado = items.iloc[inicio[codigos[fila]] + desplazamiento].reset_index(drop=True)
+    resultado["_fila"] = fila
+    return resultado
+
+
+def _codificar_transacciones(tickets, productos):
+    """
+    Pasa filas (ticket, producto) a códigos enteros. Devuelve (cod_ticket, cod_prod,
+    etiquetas, n_tickets): tickets numerados 0..n-1 (solo los que tienen algún producto)
+    y productos numerados según `etiquetas`, ordenadas alfabéticamente.
+    """
+    cod_ticket, _ = pd.factorize(tickets)
+    cod_prod, etiquetas = pd.factorize(productos, sort=True)
+    ok = (cod_ticket >= 0) & (cod_prod >= 0)
+    cod_ticket, cod_prod = cod_ticket[ok], cod_prod[ok]
+    # Tickets sin ningún producto no cuentan como transacción
+    cod_ticket = np.unique(cod_ticket, return_inverse=True)[1]
+    n_tickets = cod_ticket.max() + 1 if len(cod_ticket) else 0
+    return cod_ticket, cod_prod, np.asarray(etiquetas), n_tickets
+
+
+def _conteo_pares(tickets, productos):
+    """
+    Cuenta soporte de cada producto y co-ocurrencia de cada par a partir de filas
+    (ticket, producto). Devuelve (n_tickets, etiquetas, soporte_items, a, b, conteo_par)
+    con a < b (índices en `etiquetas`, que están ordenadas alfabéticamente).
+
+    Con scipy se arma la matriz de incidencia dispersa ticket×producto M (0/1) y
+    M.T @ M da en un solo producto los pares (fuera de la diagonal) y el soporte
+    de cada item (diagonal).
+    """
+    cod_ticket, cod_prod, etiquetas, n_tickets = _codificar_transacciones(tickets, productos)
+    n_prod = len(etiquetas)
+
+    if SCIPY_DISPONIBLE:
+        m = sparse.csr_matrix(
+            (np.ones(len(cod_ticket), dtype=np.int32), (cod_ticket, cod_prod)), shape=(n_tickets, n_prod)
+        )
+        m.data[:] = 1  # un producto repetido en el ticket cuenta una vez
+        co = (m.T @ m).tocoo()
+        soporte = co.diagonal() if n_prod else np.zeros(0, dtype=np.int32)
+        sup = co.row < co.col
+        return n_tickets, etiquetas, soporte, co.row[sup], co.col[sup], co.data[sup]
+
+    # Respaldo sin scipy: conteo por combinaciones en Python
+    tx = pd.Series(cod_prod).groupby(cod_ticket).agg(lambda s: sorted(set(s)))
+    item_counts, pair_counts = Counter(), Counter()
+    for items in tx:
+        item_counts.update(items)
+        pair_counts.update(itertools.combinations(items, 2))
+    soporte = np.array([item_counts[i] for i in range(n_prod)], dtype=np.int64)
+    pares = list(pair_counts.items())
+    a = np.array([p[0][0] for p in pares], dtype=np.int64)
+    b = np.array([p[0][1] for p in pares], dtype=np.int64)
+    conteo = np.array([p[1] for p in pares], dtype=np.int64)
+    return n_tickets, etiquetas, soporte, a, b, conteo
+
+
+def _itemsets_frecuentes(tickets, productos, min_support, max_len):
+    """
+    Apriori por niveles con poda por soporte. Devuelve (n_tickets, etiquetas, conteos)
+    donde conteos = {tupla ordenada de códigos: nº de tickets} solo para itemsets con
+    soporte >= min_support y tamaño <= max_len.
+
+    Cada itemset guarda su tid-set como bitset (int de Python): el soporte de un
+    candidato es el popcount del AND de los bitsets de sus dos padres. Un candidato
+    de tamaño k solo se genera si todos sus subconjuntos de tamaño k-1 son frecuentes.
+    """
+    cod_ticket, cod_prod, etiquetas, n = _codificar_transacciones(tickets, productos)
+    if n == 0:
+        return 0, etiquetas, {}
+
+    # Bitset de tickets por producto
+    orden = np.argsort(cod_prod, kind="stable")
+    prods, inicio = np.unique(cod_prod[orden], return_index=True)
+    nivel, conteos = {}, {}
+    for p, tks in zip(prods, np.split(cod_ticket[orden], inicio[1:])):
+        presencia = np.zeros(n, dtype=bool)
+        presencia[tks] = True
+        cnt = int(presencia.sum())
+        if cnt / n >= min_support:
+            nivel[(int(p),)] = int.from_bytes(np.packbits(presencia, bitorder="little").tobytes(), "little")
+            conteos[(int(p),)] = cnt
+
+    for k in range(2, max_len + 1):
+        claves = sorted(nivel)
+        siguiente = {}
+        for i, a in enumerate(claves):
+            for b in claves[i + 1:]:
+                if a[:-1] != b[:-1]:
+                    break  # ordenadas: los que comparten prefijo con `a` están contiguos
+                candidato = a + (b[-1],)
+                if any(sub not in nivel for sub in itertools.combinations(candidato, k - 1)):
+                    continue
+                tids = nivel[a] & nivel[b]
+                cnt = tids.bit_count()
+                if cnt / n >= min_support:
+                    siguiente[candidato] = tids
+                    conteos[candidato] = cnt
+        if not siguiente:
+            break
+        nivel = siguiente
+    return n, etiquetas, conteos
+
+
+@instrumentar
 class AnalistaDeDatos:
     def __init__(self, df, tipo_reporte):
         self.raw_df = df
         self.tipo = tipo_reporte
         self.df = self._limpiar_y_estandarizar()
+        self._lineas = None
 
+    @medir(entrada=("raw_df",))
     def _limpiar_y_estandarizar(self):
         """
         Limpieza y Estandarización según el tipo de reporte.
@@ -24,9 +249,7 @@ class AnalistaDeDatos:
         cols_money = ["Monto total", "Subtotal", "Descuento", "Tarifa delivery", "Monto factura"]
         for col in cols_money:
             if col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+                df[col] = _a_numero(df[col])
 
         # 3. Lógica Específica
         if self.tipo == "VENTAS":
@@ -38,20 +261,19 @@ class AnalistaDeDatos:
                     dayfirst=True
                 )
             
-            # Normalización de estados
-            df["Estado_Norm"] = df["Estado"].astype(str).str.upper()
-            df["Validez_Norm"] = df["Validez"].astype(str).str.upper()
-            df["Tipo_Norm"] = df["Tipo de orden"].astype(str).str.upper()
+            # Normalización de estados (columna ausente = nula, como en el export vacío)
+            nulos = pd.Series(np.nan, index=df.index, dtype=object)
+            df["Estado_Norm"] = _mayusculas(df.get("Estado", nulos))
+            df["Validez_Norm"] = _mayusculas(df.get("Validez", nulos))
+            df["Tipo_Norm"] = _mayusculas(df.get("Tipo de orden", nulos))
+            df["Canal"] = _clasificar_canal(df["Tipo_Norm"])
 
             # -------------------------------------------------------
             # NUEVO: LÓGICA DE EXCLUSIÓN DE YANGO / ALQUILER
             # -------------------------------------------------------
             if "Detalle" in df.columns:
-                # Buscamos patrones específicos al inicio del string
-                # Nota: Manejamos tanto 'x' como '×' por si acaso
-                patron_yango = r"\d[x×]\s*Cuota de membresía por Oficina C&C \(|1[x×]\s*Entrega de insumos \("
-                
-                df["Es_Alquiler"] = df["Detalle"].astype(str).str.contains(patron_yango, regex=True, case=False)
+                detalle = df["Detalle"] if isinstance(df["Detalle"].dtype, pd.StringDtype) else df["Detalle"].astype(str)
+                df["Es_Alquiler"] = detalle.str.contains(PATRON_ALQUILER, regex=True, case=False, na=False).astype(bool)
             else:
                 df["Es_Alquiler"] = False
 
@@ -64,10 +286,10 @@ class AnalistaDeDatos:
             if "Creado el" in df.columns:
                 df["Fecha_DT"] = pd.to_datetime(df["Creado el"], dayfirst=True, errors='coerce')
             
-            if "Estado" in df.columns: df["Estado_Norm"] = df["Estado"].astype(str).str.upper()
+            if "Estado" in df.columns: df["Estado_Norm"] = _mayusculas(df["Estado"])
     
             if "Anulado" in df.columns:
-                df["Es_Valido"] = (df["Estado_Norm"] == "PAGADO") & (df["Anulado"].astype(str).str.upper() == "NO")
+                df["Es_Valido"] = (df["Estado_Norm"] == "PAGADO") & (_mayusculas(df["Anulado"]) == "NO")
             else:
                 df["Es_Valido"] = df["Estado_Norm"] == "PAGADO"
 
@@ -133,74 +355,113 @@ class AnalistaDeDatos:
             "Ratio Pagado": ratio_pagado,
             }
 
+    @property
+    def lineas(self):
+        """
+        Tabla de hechos a nivel item: una fila por producto de cada orden (todas las
+        órdenes, con sus banderas de validez). Se construye la primera vez que se pide
+        y la reutilizan todos los análisis de producto. None si no hay 'Detalle'.
+        """
+        if self._lineas is None and self.tipo == "VENTAS" and "Detalle" in self.df.columns:
+            self._lineas = self._construir_lineas()
+        return self._lineas
+
+    @medir
+    def _construir_lineas(self):
+        df = self.df
+        items = _parsear_detalles(df["Detalle"])
+        fila = items.pop("_fila").to_numpy()
+
+        def _columna_orden(col, defecto=None):
+            if col not in df.columns:
+                return pd.Series([defecto] * len(fila))
+            return df[col].iloc[fila].reset_index(drop=True)
+
+        lineas = pd.DataFrame({"Fila": fila, "Id_Venta": _columna_orden("Id")})
+        lineas = pd.concat([lineas, items], axis=1)
+        # Clave de producto para canasta/reglas/BCG: nombre base en minúsculas
+        lineas["producto"] = lineas["Producto_Base"].str.lower()
+
+        # Monto de la orden repartido entre sus items en proporción a la cantidad
+        monto_ticket = _columna_orden("Monto total", 0.0).astype(float)
+        cantidad_ticket = lineas.groupby("Fila")["Cantidad"].transform("sum")
+        lineas["Monto_Ticket"] = monto_ticket
+        lineas["Monto_Item"] = (monto_ticket * lineas["Cantidad"] / cantidad_ticket.replace(0, np.nan)).fillna(0.0)
+        lineas["Descuento"] = _columna_orden("Descuento", 0.0).astype(float)
+
+        lineas["Fecha_DT"] = _columna_orden("Fecha_DT")
+        lineas["Dia"] = _columna_orden("Dia")
+        lineas["Hora_Num"] = _columna_orden("Hora_Num")
+        lineas["Tipo Orden"] = _columna_orden("Tipo de orden", "Desconocido")
+        lineas["Canal"] = _columna_orden("Canal", CANAL_OTRO)
+        lineas["Mesero"] = _columna_orden("Mesero", "Sin Asignar")
+
+        lineas["Es_Valido"] = _columna_orden("Es_Valido", False).astype(bool)
+        lineas["Es_Alquiler"] = _columna_orden("Es_Alquiler", False).astype(bool)
+        anulado = pd.Series(False, index=df.index)
+        if "Validez_Norm" in df.columns:
+            anulado |= df["Validez_Norm"] == "ANULADO"
+        if "Anulado" in df.columns:
+            anulado |= df["Anulado"].astype(str).str.lower().isin(["sí", "si", "true", "yes"])
+        lineas["Anulado"] = anulado.to_numpy()[fila]
+        return lineas
+
+    def _lineas_validas(self, lineas=None):
+        """Items de órdenes válidas, sin alquileres (base de la mayoría de análisis de producto)."""
+        lineas = self.lineas if lineas is None else lineas
+        if lineas is None:
+            return None
+        return lineas[lineas["Es_Valido"] & ~lineas["Es_Alquiler"]]
+
+    def kpis_por_canal(self):
+        """
+        KPIs de get_kpis_financieros para cada canal, en un solo groupby sobre 'Canal',
+        con las mismas reglas: las ventas son las reales (pagadas, sin consumo interno ni
+        alquileres), así que 'Interno' solo tiene Consumo Interno. Retorna DataFrame
+        indexado por canal (todos los de CANALES).
+        """
+        if "Canal" not in self.df.columns:
+            return None
+        df = self._excluir_alquiler(self.df)
+        monto = df["Monto total"] if "Monto total" in df.columns else pd.Series(0.0, index=df.index)
+        descuento = df["Descuento"] if "Descuento" in df.columns else pd.Series(0.0, index=df.index)
+        base = pd.DataFrame({
+            "Canal": df["Canal"],
+            "Ventas Totales": monto.where(df["Es_Venta_Real"], 0.0),
+            "Transacciones": df["Es_Venta_Real"].astype(int),
+            "Total Descuentos": descuento.where(df["Es_Valido"], 0.0),
+            "Ventas Pendientes": monto.where(df["Es_Valido_Pago_Pendiente"], 0.0),
+            "Consumo Interno": monto.where(df["Es_Interno"], 0.0),
+        })
+        kpis = base.groupby("Canal", observed=False).sum()
+        kpis["Ticket Promedio"] = (kpis["Ventas Totales"] / kpis["Transacciones"].replace(0, np.nan)).fillna(0.0)
+        cobrable = kpis["Ventas Totales"] + kpis["Ventas Pendientes"]
+        kpis["Ratio Pagado"] = (kpis["Ventas Totales"] / cobrable.replace(0, np.nan)).fillna(0.0)
+        return kpis[["Ventas Totales", "Transacciones", "Ticket Promedio", "Total Descuentos",
+                     "Ventas Pendientes", "Consumo Interno", "Ratio Pagado"]]
+
     def analizar_productos(self):
         """
         Desglosa la columna 'Detalle' separando Producto Base de sus Variantes.
         Usa split por '—' (guion largo) para separar items.
         """
-        if self.tipo != "VENTAS" or "Detalle" not in self.df.columns:
+        lineas = self._lineas_validas()
+        if lineas is None or lineas.empty:
             return None
 
-        # 1. Preparar DF
-        df_analisis = self._excluir_alquiler(self.df.copy())
-        df_analisis = df_analisis[df_analisis["Es_Valido"] == True].copy()
-        
-        items_vendidos = []
-        
-        # Patrón para extraer cantidad y nombre de cada item individual
-        patron_item = r'(\d+)\s*[x×]\s*(.+)'
-
-        # --- PATRÓN DE LIMPIEZA DE NOMBRE ---
-        # Separa "Cappuccino (Leche almendra)" en "Cappuccino" y "Leche almendra"
-        # Corta en ':', '(', o '.'
-        patron_variante = r'^([^(:.]+)(?:[\(:\.]\s*(.+?)\)?)?$'
-
-        for _, row in df_analisis.iterrows():
-            detalle = str(row["Detalle"]).replace("\n", " ") # Limpiar saltos de línea
-            
-            # Paso 1: Separar por guion largo y procesar cada item
-            productos_raw = detalle.split("—")
-            matches_items = []
-            for p in productos_raw:
-                match = re.match(patron_item, p.strip())
-                if match:
-                    matches_items.append((match.group(1), match.group(2)))
-            
-            for cantidad, nombre_sucio in matches_items:
-                nombre_sucio = nombre_sucio.strip()
-                
-                # Paso 2: Diseccionar el nombre sucio
-                match_var = re.search(patron_variante, nombre_sucio)
-                
-                if match_var:
-                    p_base = match_var.group(1).strip().title()
-                    # Si hay grupo 2 (variante), lo usamos, sino es Original
-                    p_var = match_var.group(2).strip() if match_var.group(2) else "Original/Sin Cambios"
-                else:
-                    # Fallback por si acaso (raro)
-                    p_base = nombre_sucio.title()
-                    p_var = "Original/Sin Cambios"
-
-                # Nombre completo legible
-                p_completo = f"{p_base} ({p_var})" if p_var != "Original/Sin Cambios" else p_base
-
-                items_vendidos.append({
-                    "Producto_Base": p_base,
-                    "Variante": p_var,
-                    "Producto_Completo": p_completo,
-                    "Cantidad": int(cantidad),
-                    "Producto": p_base, # Retrocompatibilidad con funciones viejas que usaban 'Producto'
-                    "Fecha": row.get("Dia"),
-                    "Hora": row.get("Hora_Num"),
-                    "Tipo Orden": row.get("Tipo de orden", "Desconocido"),
-                    "Mesero": row.get("Mesero", "Sin Asignar"),
-                    "Id_Venta": row.get("Id")
-                })
-        
-        if not items_vendidos:
-            return None
-            
-        return pd.DataFrame(items_vendidos)
+        return pd.DataFrame({
+            "Producto_Base": lineas["Producto_Base"],
+            "Variante": lineas["Variante"],
+            "Producto_Completo": lineas["Producto_Completo"],
+            "Cantidad": lineas["Cantidad"],
+            "Producto": lineas["Producto_Base"],  # Retrocompatibilidad con funciones viejas que usaban 'Producto'
+            "Fecha": lineas["Dia"],
+            "Hora": lineas["Hora_Num"],
+            "Tipo Orden": lineas["Tipo Orden"],
+            "Canal": lineas["Canal"],
+            "Mesero": lineas["Mesero"],
+            "Id_Venta": lineas["Id_Venta"],
+        }).reset_index(drop=True)
 
     def performance_meseros(self):
         """
@@ -217,7 +478,7 @@ class AnalistaDeDatos:
         
         # Trabajar sobre copia excluyendo alquileres
         df = self._excluir_alquiler(self.df.copy())
-        df["Mesero"] = df["Mesero"].fillna("Sin Asignar")
+        df["Mesero"] = df["Mesero"].astype(object).fillna("Sin Asignar")
         mesero_norm = (
             df["Mesero"]
             .astype(str)
@@ -232,8 +493,6 @@ class AnalistaDeDatos:
         
         # --- CÁLCULO DE HORAS TRABAJADAS ---
         horas_trabajadas = None
-        if "Fecha_DT" in df.columns:
-            print(f"✅ DEBUG: Columna Fecha_DT existe")
         if "Fecha_DT" in df.columns:
             df_con_fecha = df[df["Fecha_DT"].notna()].copy()
 
@@ -342,7 +601,7 @@ class AnalistaDeDatos:
                 break
 
         df = df.copy()
-        df["Metodo_Pago_Norm"] = df["Métodos de pago"].apply(_normalizar_metodo_pago)
+        df["Metodo_Pago_Norm"] = df["Métodos de pago"].astype(object).apply(_normalizar_metodo_pago)
 
         if col_factura:
             factura_mask = df[col_factura].notna() & (df[col_factura].astype(str).str.strip() != "")
@@ -368,7 +627,7 @@ class AnalistaDeDatos:
         if "Tipo de orden" in df.columns:
             matriz_tipo = pd.crosstab(
                 df["Metodo_Pago_Norm"], 
-                df["Tipo de orden"]
+                df["Tipo de orden"].astype(object)
             ).reset_index()
             matriz_tipo = matriz_tipo.rename(columns={"Metodo_Pago_Norm": "Métodos de pago"})
         else:
@@ -404,11 +663,11 @@ class AnalistaDeDatos:
         if self.tipo == "INDICE" and "Mesa" in self.df.columns:
             df_mesas = self._excluir_alquiler(self.df.copy())
             df_mesas = df_mesas[df_mesas["Es_Valido"]==True]
-            return df_mesas["Mesa"].value_counts().reset_index(name="Ocupaciones").rename(columns={"index": "Mesa"})
+            return df_mesas["Mesa"].astype(object).value_counts().reset_index(name="Ocupaciones").rename(columns={"index": "Mesa"})
         
         elif self.tipo == "VENTAS" and "Tipo de orden" in self.df.columns:
             dfv = self._excluir_alquiler(self.df.copy())
-            return dfv[dfv["Es_Valido"]==True]["Tipo de orden"].value_counts().reset_index(name="Cantidad")
+            return dfv[dfv["Es_Valido"]==True]["Tipo de orden"].astype(object).value_counts().reset_index(name="Cantidad")
         
         return None
 
@@ -473,136 +732,90 @@ class AnalistaDeDatos:
                 return merged
         return df
 
-    def basket_analysis(self, top_n=20, min_support=2):
+    def basket_analysis(self, top_n=20, min_support=2, lineas=None):
         """
         Análisis de mercado simple: pares de productos que ocurren juntos.
-        Usa split por '—' (guion largo) para separar items.
+        Usa la tabla de items (self.lineas); `lineas` permite pasar un subconjunto
+        ya filtrado (p.ej. un canal) sin volver a parsear el reporte.
         """
-        if "Detalle" not in self.df.columns and "producto" not in self.df.columns:
+        if lineas is None and "Detalle" not in self.df.columns and "producto" not in self.df.columns:
             return None
 
-        # Construir lista de transacciones (lista de sets de productos)
-        tx_items = []
-
-        if "Detalle" in self.df.columns:
-            patron_item = r'(\d+)\s*[x×]\s*(.+)'
-            df_valid = self._excluir_alquiler(self.df.copy())
-            grouped = df_valid[df_valid["Es_Valido"]==True].groupby("Id")["Detalle"].agg(lambda s: "—".join(s.dropna().astype(str)))
-            
-            for detalle in grouped:
-                # Separar por guion largo y extraer nombre de cada producto
-                productos = str(detalle).split("—")
-                items = []
-                for p in productos:
-                    match = re.match(patron_item, p.strip())
-                    if match:
-                        nombre = match.group(2).strip().lower()
-                        # Extraer solo el nombre base (antes de : o ()
-                        nombre_base = re.split(r'[(:.]', nombre)[0].strip()
-                        if nombre_base:
-                            items.append(nombre_base)
-                
-                if items:
-                    tx_items.append(list(set(items)))
+        # Filas (ticket, producto) de ventas válidas sin alquiler
+        if lineas is not None or "Detalle" in self.df.columns:
+            lineas = self._lineas_validas(lineas)
+            if lineas is None:
+                return None
+            tickets, productos = lineas["Id_Venta"], lineas["producto"]
         else:
             df_valid = self._excluir_alquiler(self.df.copy())
-            grouped = df_valid[df_valid["Es_Valido"]==True].groupby("ticket_id")["producto"].agg(lambda s: list(set(s.dropna().astype(str).str.lower())))
-            tx_items = grouped.tolist()
+            df_valid = df_valid[df_valid["Es_Valido"]==True]
+            tickets, productos = df_valid["ticket_id"], df_valid["producto"].astype(str).str.lower().where(df_valid["producto"].notna())
 
-        pair_counts = Counter()
-        item_counts = Counter()
-        
-        for items in tx_items:
-            for it in items:
-                item_counts[it] += 1
-            for a,b in itertools.combinations(sorted(items),2):
-                pair_counts[(a,b)] += 1
-        
-        total_tx = len(tx_items)
+        total_tx, etiquetas, soporte, a, b, cnt = _conteo_pares(tickets, productos)
         if total_tx == 0:
             return None
-            
-        rows = []
-        for (a,b),cnt in pair_counts.most_common(top_n):
-            support = (cnt / total_tx) * 100
-            conf_a = (cnt / item_counts[a]) * 100 if item_counts[a] else 0
-            conf_b = (cnt / item_counts[b]) * 100 if item_counts[b] else 0
-            
-            if cnt >= min_support: 
-                rows.append({
-                    "item_a": a, "item_b": b, "count": cnt, 
-                    "support": support, "conf_a->b": conf_a, "conf_b->a": conf_b
-                })
-                
-        return pd.DataFrame(rows)
+
+        # Top pares por conteo (empates en orden alfabético); min_support se aplica sobre ese top
+        orden = np.lexsort((b, a, -cnt))[:top_n]
+        a, b, cnt = a[orden], b[orden], cnt[orden]
+        top = pd.DataFrame({
+            "item_a": etiquetas[a], "item_b": etiquetas[b], "count": cnt.astype(int),
+            "support": cnt / total_tx * 100,
+            "conf_a->b": cnt / soporte[a] * 100,
+            "conf_b->a": cnt / soporte[b] * 100,
+        })
+        top = top[top["count"] >= min_support].reset_index(drop=True)
+        return top if not top.empty else pd.DataFrame()
 
     def market_basket_rules(self, min_support=0.01, min_confidence=0.3, max_len=3, top_n=50):
         """
-        Apriori-like rules generator (simple, puro Python).
+        Reglas de asociación sobre itemsets frecuentes (Apriori con poda, ver _itemsets_frecuentes).
         Devuelve reglas con soporte, confianza y lift ordenadas por lift.
         Requiere columna 'Detalle' (o 'producto' con transaction_id 'ticket_id').
         """
-        # 1) Construir transacciones (lista de sets)
-        tx_items = []
+        # 1) Filas (ticket, producto) de ventas válidas sin alquiler
         if "Detalle" in self.df.columns:
-            patron = r'(\d+)\s*[x×]\s*(.+?)(?=\s\d+\s*[x×]|$)'
-            df_valid = self._excluir_alquiler(self.df.copy())
-            grouped = df_valid[df_valid["Es_Valido"]==True].groupby("Id")["Detalle"].agg(lambda s: " ||| ".join(s.dropna().astype(str)))
-            for detalle in grouped:
-                matches = re.findall(patron, str(detalle))
-                items = [m[1].strip().lower() for m in matches if m[1].strip()]
-                if items:
-                    tx_items.append(sorted(set(items)))
+            lineas = self._lineas_validas()
+            if lineas is None:
+                return None
+            tickets, productos = lineas["Id_Venta"], lineas["producto"]
         elif "producto" in self.df.columns and "ticket_id" in self.df.columns:
             df_valid = self._excluir_alquiler(self.df.copy())
-            grouped = df_valid[df_valid["Es_Valido"]==True].groupby("ticket_id")["producto"].agg(lambda s: list(set(s.dropna().astype(str).str.lower())))
-            tx_items = [sorted(x) for x in grouped.tolist() if x]
-
-        if not tx_items:
+            df_valid = df_valid[df_valid["Es_Valido"]==True]
+            tickets, productos = df_valid["ticket_id"], df_valid["producto"].astype(str).str.lower().where(df_valid["producto"].notna())
+        else:
             return None
 
-        N = len(tx_items)
-
-        # 2) contar itemsets por tamaño
-        itemset_counts = {}
-        for k in range(1, max_len+1):
-            counts = Counter()
-            for items in tx_items:
-                if len(items) < k: continue
-                for combo in itertools.combinations(items, k):
-                    counts[tuple(sorted(combo))] += 1
-            itemset_counts[k] = counts
+        # 2) itemsets frecuentes (los subconjuntos de un itemset frecuente también lo son)
+        N, etiquetas, itemset_counts = _itemsets_frecuentes(tickets, productos, min_support, max_len)
+        if N == 0:
+            return None
 
         # 3) generar reglas a partir de itemsets de tamaño >=2
         rules = []
-        for k in range(2, max_len+1):
-            for itemset, cnt in itemset_counts.get(k, {}).items():
-                support = cnt / N
-                if support < min_support:
-                    continue
-                itemset = tuple(itemset)
-                # generar todas las particiones: antecedente -> consecuente
-                all_subsets = []
-                for r in range(1, len(itemset)):
-                    for antecedent in itertools.combinations(itemset, r):
-                        consequent = tuple(sorted(set(itemset) - set(antecedent)))
-                        antecedent = tuple(sorted(antecedent))
-                        cnt_ant = itemset_counts[len(antecedent)].get(antecedent, 0)
-                        cnt_cons = itemset_counts[len(consequent)].get(consequent, 0)
-                        if cnt_ant == 0: continue
-                        confidence = cnt / cnt_ant
-                        if confidence < min_confidence: continue
-                        # lift = confidence / support(consequent)
-                        support_cons = cnt_cons / N if cnt_cons else 0
-                        lift = confidence / support_cons if support_cons > 0 else np.nan
-                        rules.append({
-                            "antecedent": antecedent,
-                            "consequent": consequent,
-                            "support": support,
-                            "confidence": confidence,
-                            "lift": lift,
-                            "count": cnt
-                        })
+        for itemset, cnt in itemset_counts.items():
+            if len(itemset) < 2:
+                continue
+            support = cnt / N
+            # generar todas las particiones: antecedente -> consecuente
+            for r in range(1, len(itemset)):
+                for antecedent in itertools.combinations(itemset, r):
+                    consequent = tuple(i for i in itemset if i not in antecedent)
+                    cnt_ant = itemset_counts[antecedent]
+                    confidence = cnt / cnt_ant
+                    if confidence < min_confidence: continue
+                    # lift = confidence / support(consequent)
+                    support_cons = itemset_counts[consequent] / N
+                    lift = confidence / support_cons
+                    rules.append({
+                        "antecedent": tuple(etiquetas[list(antecedent)]),
+                        "consequent": tuple(etiquetas[list(consequent)]),
+                        "support": support,
+                        "confidence": confidence,
+                        "lift": lift,
+                        "count": cnt
+                    })
         if not rules:
             return None
         df_rules = pd.DataFrame(rules)
@@ -616,30 +829,22 @@ class AnalistaDeDatos:
          Requiere columna 'Detalle' para descomponer por producto.
          Retorna dict con tablas: 'anulaciones', 'descuentos', 'tendencia_semanal', 'nunca_vendidos'
          """
-         # Extraer items por transacción
-         if "Detalle" not in self.df.columns:
+         # Items de todas las órdenes sin alquiler (las anuladas cuentan para las anulaciones)
+         lineas = self.lineas
+         if lineas is None:
              return None
-         patron = r'(\d+)\s*[x×]\s*(.+?)(?=\s\d+\s*[x×]|$)'
-         rows = []
-         # iterar solo ventas válidas y sin alquiler
-         df_iter = self._excluir_alquiler(self.df.copy())
-         for _, row in df_iter.iterrows():
-             detalle = str(row.get("Detalle",""))
-             matches = re.findall(patron, detalle)
-             for q,p in matches:
-                 prod = p.strip().lower()
-                 rows.append({
-                     "ticket_id": row.get("Id"),
-                     "producto": prod,
-                     "cantidad": int(q),
-                     "monto_ticket": row.get("Monto total", 0),
-                     "anulado": (str(row.get("Validez","")).upper() == "ANULADO") or (str(row.get("Anulado","")).lower() in ["sí","si","true","yes"]),
-                     "descuento": float(row.get("Descuento", 0) or 0),
-                     "fecha": row.get("Fecha_DT", row.get("Creado el", None))
-                 })
-         if not rows:
+         lineas = lineas[~lineas["Es_Alquiler"]]
+         if lineas.empty:
              return None
-         items_df = pd.DataFrame(rows)
+         items_df = pd.DataFrame({
+             "ticket_id": lineas["Id_Venta"],
+             "producto": lineas["producto"],
+             "cantidad": lineas["Cantidad"],
+             "monto_ticket": lineas["Monto_Ticket"],
+             "anulado": lineas["Anulado"],
+             "descuento": lineas["Descuento"],
+             "fecha": lineas["Fecha_DT"],
+         })
          items_df["fecha"] = pd.to_datetime(items_df["fecha"], errors='coerce')
          items_df["week"] = items_df["fecha"].dt.to_period("W").apply(lambda p: p.start_time.date())
 
@@ -688,23 +893,16 @@ class AnalistaDeDatos:
         # Obtener items con monto; si no hay monto por item, distribuimos monto del ticket proporcionalmente por cantidad
         items = []
         if "Detalle" in self.df.columns:
-            patron = r'(\d+)\s*[x×]\s*(.+?)(?=\s\d+\s*[x×]|$)'
-            for _, row in self.df.iterrows():
-                detalle = str(row.get("Detalle",""))
-                matches = re.findall(patron, detalle)
-                total_qty = sum(int(m[0]) for m in matches) if matches else 0
-                for q,p in matches:
-                    prod = p.strip().lower()
-                    qty = int(q)
-                    monto_ticket = float(row.get("Monto total", 0) or 0)
-                    # asignar monto proporcional por cantidad
-                    monto_item = (monto_ticket * (qty / total_qty)) if total_qty>0 else 0
-                    items.append({"producto": prod, "monto": monto_item})
+            # Monto_Item ya reparte el monto del ticket proporcional a la cantidad
+            lineas = self._lineas_validas()
+            if lineas is None:
+                return None
+            items = lineas[["producto", "Monto_Item"]].rename(columns={"Monto_Item": "monto"})
         elif "producto" in self.df.columns:
             df_iter = self._excluir_alquiler(self.df.copy())
             items = df_iter[["producto","monto"]].rename(columns={"monto":"monto"}).to_dict('records')
 
-        if not items:
+        if len(items) == 0:
             return None
 
         items_df = pd.DataFrame(items)
@@ -777,7 +975,7 @@ class AnalistaDeDatos:
         - date_col: nombre de la columna fecha si no es detectada automáticamente.
         Retorna DataFrame con: producto, rev_recent, rev_prev, growth, revenue_total, category
         """
-        df = self._excluir_alquiler(self.df.copy())
+        df = self.df.copy()
 
         # detectar columna fecha
         if date_col and date_col in df.columns:
@@ -787,6 +985,9 @@ class AnalistaDeDatos:
                 if c in df.columns:
                     df["__fecha"] = pd.to_datetime(df[c], errors="coerce", dayfirst=True)
                     break
+        # fecha por posición de la orden (los items de self.lineas la referencian por 'Fila')
+        fecha_orden = df["__fecha"].to_numpy() if "__fecha" in df.columns else None
+        df = self._excluir_alquiler(df)
         if "__fecha" not in df.columns or df["__fecha"].isna().all():
             return None
 
@@ -800,18 +1001,14 @@ class AnalistaDeDatos:
                 val = float(r[monto_col]) if monto_col else 0.0
                 items.append({"producto": prod, "monto": val, "fecha": r["__fecha"]})
         elif "Detalle" in df.columns:
-            patron = r'(\d+)\s*[x×]\s*(.+?)(?=\s\d+\s*[x×]|$)'
-            df_valid = df[df.get("Es_Valido", True)==True]
-            for _, r in df_valid.iterrows():
-                detalle = str(r.get("Detalle",""))
-                matches = re.findall(patron, detalle)
-                total_qty = sum(int(m[0]) for m in matches) if matches else 0
-                monto_ticket = float(r.get("monto", r.get("Monto total", 0)) or 0)
-                for q,p in matches:
-                    prod = p.strip().lower()
-                    qty = int(q)
-                    monto_item = (monto_ticket * (qty / total_qty)) if total_qty>0 else (monto_ticket if len(matches)==1 else 0)
-                    items.append({"producto": prod, "monto": monto_item, "fecha": r["__fecha"]})
+            lineas = self._lineas_validas()
+            if lineas is None:
+                return None
+            items = pd.DataFrame({
+                "producto": lineas["producto"].to_numpy(),
+                "monto": lineas["Monto_Item"].to_numpy(),
+                "fecha": fecha_orden[lineas["Fila"].to_numpy()],
+            })
         else:
             return None
 
@@ -913,12 +1110,12 @@ class AnalistaDeDatos:
         df["mes_periodo"] = df["fecha_hora"].dt.to_period("M")
 
         # visitas únicas por cliente (dias distintos)
-        visits = df.groupby(cliente_col)["fecha_dia"].nunique().rename("visits")
+        visits = df.groupby(cliente_col, observed=True)["fecha_dia"].nunique().rename("visits")
         recurrent = visits[visits >= min_visits]
         n_recurrent = int(len(recurrent))
 
         # visitas por mes (promedio por cliente)
-        visits_month = df.groupby([cliente_col, "mes_periodo"]).size().groupby(level=0).mean().rename("visits_per_month")
+        visits_month = df.groupby([cliente_col, "mes_periodo"], observed=True).size().groupby(level=0, observed=True).mean().rename("visits_per_month")
         visits_per_month_mean = float(visits_month.mean()) if not visits_month.empty else 0.0
 
         # definir clientes frecuentes
@@ -934,9 +1131,9 @@ class AnalistaDeDatos:
 
         if ticket_id_col:
             # monto por ticket (agregar si hay varias filas por ticket)
-            monto_por_ticket = df.groupby([ticket_id_col, cliente_col])[monto_col].sum().reset_index()
+            monto_por_ticket = df.groupby([ticket_id_col, cliente_col], observed=True)[monto_col].sum().reset_index()
             # avg_ticket_by_cliente será una Series indexed por cliente
-            avg_ticket_by_cliente = monto_por_ticket.groupby(cliente_col)[monto_col].mean()
+            avg_ticket_by_cliente = monto_por_ticket.groupby(cliente_col, observed=True)[monto_col].mean()
             clientes_presentes = list(avg_ticket_by_cliente.index)
             new_clients = [c for c in clientes_presentes if c not in frequent_clients]
             freq_clients = [c for c in clientes_presentes if c in frequent_clients]
@@ -960,7 +1157,7 @@ class AnalistaDeDatos:
 
         # Retención: cohort por semana (semana de primera visita)
         df["week"] = df["fecha_hora"].dt.to_period("W").apply(lambda p: p.start_time.date())
-        cohort = df.groupby(cliente_col)["week"].min().rename("cohort_week")
+        cohort = df.groupby(cliente_col, observed=True)["week"].min().rename("cohort_week")
         df_cohort = df.merge(cohort, left_on=cliente_col, right_index=True, how="left")
         pivot = df_cohort.groupby(["cohort_week", "week"])[cliente_col].nunique().unstack(fill_value=0)
         if not pivot.empty:
@@ -1001,12 +1198,12 @@ class AnalistaDeDatos:
 
         # Agrupación segura: si existe ticket_id usamos nunique, si no usamos conteo por cliente
         if ticket_col is not None:
-            agg = df.groupby(cliente_col).agg(
+            agg = df.groupby(cliente_col, observed=True).agg(
                 ventas=(monto_col, "sum"),
                 transacciones=(ticket_col, "nunique")
             ).reset_index()
         else:
-            agg = df.groupby(cliente_col).agg(
+            agg = df.groupby(cliente_col, observed=True).agg(
                 ventas=(monto_col, "sum"),
                 transacciones=(cliente_col, "count")
             ).reset_index()
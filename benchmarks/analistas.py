@@ -0,0 +1,292 @@
+# benchmarks/analistas.py
+"""
+Tiempo y memoria de todos los métodos públicos de AnalistaDeDatos y AnalistaOperacional
+a distintas escalas de datos, desde un mes hasta varios años y 1M de órdenes.
+
+Las escalas se arman replicando el reporte anual (VENTAS + Índice): cada copia desplaza
+los Ids y corre las fechas 52 semanas (mismo día de la semana), así los análisis por
+fecha ven un histórico de varios años y la fusión por (Número, día) sigue siendo única.
+Con --sintetico se usan exports generados (data/generador_reportes.py) con semilla fija:
+no requiere los CSV reales y los resultados son reproducibles en cualquier máquina.
+
+Cada método se mide en dos pasadas: una sin tracemalloc (tiempo) y otra con tracemalloc
+(pico de memoria; tracemalloc encarece las asignaciones y no sirve para tiempos).
+Los resultados se guardan en JSON para comparar entre commits.
+
+Uso:
+    python -m benchmarks.analistas                            # escalas por defecto
+    python -m benchmarks.analistas --escalas 1_mes,1M_ordenes --repeticiones 3
+    python -m benchmarks.analistas --sintetico --semilla 7
+    python -m benchmarks.analistas --comparar base.json nuevo.json
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from application.analista_operacional import AnalistaOperacional
+from application.instrumentacion import CapturaRendimiento
+from application.procesamiento import AnalistaDeDatos
+from data.esquemas_reportes import aplicar_esquema, leer_reporte
+from data.generador_reportes import generar_reportes
+
+RUTA_VENTAS = "data/reportes/VENTAS_ANUAL_2025.csv"
+RUTA_INDICE = "data/reportes/Índice_Mercat_ANUAL_2025.csv"
+CARPETA_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+# Escala -> órdenes objetivo (se recorta o se replica el anual hasta llegar)
+ESCALAS = {
+    "1_mes": 600,
+    "1_anio": 7_000,
+    "3_anios": 21_000,
+    "10_anios": 70_000,
+    "1M_ordenes": 1_000_000,
+}
+ESCALAS_DEFAULT = ["1_mes", "1_anio", "3_anios", "10_anios"]
+
+# Columnas con fecha 'dd/mm/aaaa...' que se corren en cada copia
+COLUMNAS_FECHA = ["Fecha", "Pagado el", "Fecha factura", "Día orden prog.", "Creado el"]
+DIAS_POR_COPIA = 364
+
+# Métodos a medir con sus argumentos (los no listados se llaman con sus valores por defecto)
+ARGUMENTOS = {
+    "build_master_df": lambda base: {"df_indice": base["indice"]},
+}
+UMBRAL_REGRESION = 1.25
+
+
+# --- Datos ---
+def _desplazar_fechas(textos, dias):
+    """Corre `dias` días el prefijo 'dd/mm/aaaa' de cada texto (el resto, p.ej. la hora, se conserva)."""
+    textos = textos.astype(object)
+    codigos, unicos = pd.factorize(textos.str.slice(0, 10))
+    fechas = pd.to_datetime(pd.Series(unicos), format="%d/%m/%Y", errors="coerce") + pd.Timedelta(days=dias)
+    nuevas = fechas.dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+    prefijo = np.where(codigos >= 0, nuevas[codigos], None)
+    resultado = pd.Series(prefijo, index=textos.index, dtype=object) + textos.str.slice(10)
+    return resultado.where(textos.notna())
+
+
+def _replicar(df, copias, columna_id=None):
+    partes = []
+    paso = int(df[columna_id].max()) + 1 if columna_id else 0
+    for i in range(copias):
+        copia = df.copy()
+        if i:
+            if columna_id:
+                copia[columna_id] = copia[columna_id] + i * paso
+            for col in COLUMNAS_FECHA:
+                if col in copia.columns:
+                    copia[col] = _desplazar_fechas(copia[col], i * DIAS_POR_COPIA)
+        partes.append(copia)
+    return pd.concat(partes, ignore_index=True)
+
+
+def cargar_base(ruta_ventas=RUTA_VENTAS, ruta_indice=RUTA_INDICE):
+    """Reportes anuales de referencia (sin la fila de totales)."""
+    ventas = leer_reporte(ruta_ventas).dropna(how="all")
+    ventas = ventas[ventas["Id"].notna()].reset_index(drop=True)
+    indice = leer_reporte(ruta_indice).dropna(how="all").reset_index(drop=True)
+    return ventas, indice
+
+
+def escalar(ventas, indice, ordenes):
+    """VENTAS e Índice con ~`ordenes` órdenes: recorte por fecha o réplicas del anual."""
+    if ordenes <= len(ventas):
+        ventas = ventas.iloc[:ordenes]
+        dias = set(_desplazar_fechas(ventas["Fecha"], 0).dropna())
+        indice = indice[indice["Creado el"].str.slice(0, 10).isin(dias)]
+        return ventas.reset_index(drop=True), indice.reset_index(drop=True)
+    copias = math.ceil(ordenes / len(ventas))
+    ventas = _replicar(ventas, copias, columna_id="Id").iloc[:ordenes]
+    return ventas, _replicar(indice, copias)
+
+
+def generar_escala(ordenes, semilla=0):
+    """VENTAS e Índice sintéticos con los tipos que aplica el lector de reportes."""
+    ventas, indice = generar_reportes(ordenes, semilla=semilla)
+    return aplicar_esquema(ventas, "Ventas"), aplicar_esquema(indice, "Indice_Mercat")
+
+
+# --- Medición ---
+def _metodos_publicos(cls):
+    return [
+        nombre for nombre, valor in vars(cls).items()
+        if not nombre.startswith("_") and callable(valor)
+    ]
+
+
+def _medir(fn, repeticiones, memoria):
+    """(segundos mínimos, pico MB o None, registros de la primera pasada, error)."""
+    tiempos = []
+    try:
+        with CapturaRendimiento() as captura:  # filas de entrada/salida de la primera pasada
+            t0 = time.perf_counter()
+            fn()
+            tiempos.append(time.perf_counter() - t0)
+        for _ in range(repeticiones - 1):
+            t0 = time.perf_counter()
+            fn()
+            tiempos.append(time.perf_counter() - t0)
+        pico = None
+        if memoria:
+            # Fuera de una captura: medir() no toca el pico global de tracemalloc
+            tracemalloc.start()
+            try:
+                fn()
+                pico = tracemalloc.get_traced_memory()[1] / 2**20
+            finally:
+                tracemalloc.stop()
+        return min(tiempos), pico, captura.tabla(), None
+    except Exception as e:
+        return None, None, None, f"{type(e).__name__}: {e}"
+
+
+def _fila(escala, ordenes, clase, metodo, segundos, pico, registros, error):
+    fila = {
+        "escala": escala, "ordenes": ordenes, "clase": clase, "metodo": metodo,
+        "segundos": None if segundos is None else round(segundos, 4),
+        "memoria_pico_mb": None if pico is None else round(pico, 2),
+        "filas_entrada": None, "filas_salida": None, "error": error,
+    }
+    if registros is not None and not registros.empty:
+        principal = registros.iloc[0]  # primera llamada medida = la de nivel 0
+        for col, clave in (("Filas_Entrada", "filas_entrada"), ("Filas_Salida", "filas_salida")):
+            fila[clave] = None if pd.isna(principal[col]) else int(principal[col])
+    return fila
+
+
+def medir_escala(escala, ventas, indice, repeticiones=1, memoria=True):
+    ordenes = len(ventas)
+    filas = []
+
+    def registrar(clase, metodo, fn):
+        fila = _fila(escala, ordenes, clase, metodo, *_medir(fn, repeticiones, memoria))
+        filas.append(fila)
+        print(f"   {escala:>11} {clase}.{metodo}: {fila['segundos']} s, {fila['memoria_pico_mb']} MB"
+              + (f"  ❌ {fila['error']}" if fila["error"] else ""))
+
+    # Construcción (limpieza / fusión) y la tabla de líneas que comparten los análisis de producto
+    registrar("AnalistaDeDatos", "__init__", lambda: AnalistaDeDatos(ventas, "VENTAS"))
+    analista = AnalistaDeDatos(ventas, "VENTAS")
+    registrar("AnalistaDeDatos", "lineas", lambda: analista._construir_lineas())
+    analista.lineas
+    base = {"ventas": ventas, "indice": indice}
+    for metodo in _metodos_publicos(AnalistaDeDatos):
+        if metodo == "lineas":
+            continue
+        kwargs = ARGUMENTOS.get(metodo, lambda b: {})(base)
+        registrar("AnalistaDeDatos", metodo, lambda: getattr(analista, metodo)(**kwargs))
+
+    registrar("AnalistaOperacional", "__init__", lambda: AnalistaOperacional(ventas, indice))
+    operacional = AnalistaOperacional(ventas, indice)
+    for metodo in _metodos_publicos(AnalistaOperacional):
+        registrar("AnalistaOperacional", metodo, lambda: getattr(operacional, metodo)())
+    return filas
+
+
+# --- Resultados ---
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _entorno():
+    return {
+        "commit": _commit_actual(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+    }
+
+
+def guardar(resultados, salida=None):
+    if salida is None:
+        os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+        marca = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        salida = os.path.join(CARPETA_RESULTADOS, f"analistas_{resultados['entorno']['commit'] or 'local'}_{marca}.json")
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=1)
+    return salida
+
+
+def comparar(ruta_base, ruta_nueva, umbral=UMBRAL_REGRESION):
+    """Tabla de tiempos y memoria lado a lado; marca como regresión lo que sube más de `umbral`."""
+    def _tabla(ruta):
+        with open(ruta, encoding="utf-8") as f:
+            return pd.DataFrame(json.load(f)["resultados"]).set_index(["escala", "clase", "metodo"])
+
+    base, nueva = _tabla(ruta_base), _tabla(ruta_nueva)
+    cols = ["segundos", "memoria_pico_mb"]
+    tabla = base[cols].join(nueva[cols], how="inner", lsuffix="_base", rsuffix="_nuevo")
+    tabla["ratio_tiempo"] = tabla["segundos_nuevo"] / tabla["segundos_base"]
+    tabla["ratio_memoria"] = tabla["memoria_pico_mb_nuevo"] / tabla["memoria_pico_mb_base"]
+    tabla["regresion"] = (tabla["ratio_tiempo"] > umbral) | (tabla["ratio_memoria"] > umbral)
+    return tabla
+
+
+def ejecutar(escalas=ESCALAS_DEFAULT, repeticiones=1, memoria=True, salida=None, ventas=None, indice=None,
+             sintetico=False, semilla=0):
+    if not sintetico and (ventas is None or indice is None):
+        ventas, indice = cargar_base()
+    filas = []
+    for nombre in escalas:
+        ordenes = ESCALAS[nombre] if isinstance(nombre, str) else nombre
+        v, i = generar_escala(ordenes, semilla) if sintetico else escalar(ventas, indice, ordenes)
+        print(f"\n📏 {nombre}: {len(v):,} órdenes, {len(i):,} filas de Índice")
+        filas.extend(medir_escala(str(nombre), v, i, repeticiones=repeticiones, memoria=memoria))
+
+    datos = f"sintetico (semilla {semilla})" if sintetico else "reportes anuales replicados"
+    resultados = {"entorno": _entorno(), "datos": datos, "repeticiones": repeticiones, "resultados": filas}
+    ruta = guardar(resultados, salida)
+    print(f"\n💾 Resultados en {ruta}")
+    return resultados, ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--escalas", default=",".join(ESCALAS_DEFAULT),
+                        help=f"Separadas por coma. Disponibles: {', '.join(ESCALAS)} o un número de órdenes")
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--sin-memoria", action="store_true", help="Omite la pasada con tracemalloc")
+    parser.add_argument("--salida", help="Ruta del JSON (por defecto en benchmarks/resultados/)")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NUEVO"), help="Compara dos JSON y termina")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION)
+    parser.add_argument("--sintetico", action="store_true", help="Usa exports generados en lugar de los CSV reales")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        tabla = comparar(*args.comparar, umbral=args.umbral)
+        with pd.option_context("display.width", 200, "display.max_rows", None):
+            print(tabla.round(3).to_string())
+        regresiones = int(tabla["regresion"].sum())
+        print(f"\n{'⚠️' if regresiones else '✅'} {regresiones} regresiones (umbral x{args.umbral})")
+        return 1 if regresiones else 0
+
+    escalas = [e if e in ESCALAS else int(e) for e in args.escalas.split(",")]
+    resultados, _ = ejecutar(escalas, args.repeticiones, not args.sin_memoria, args.salida,
+                             sintetico=args.sintetico, semilla=args.semilla)
+    tabla = pd.DataFrame(resultados["resultados"])
+    print(tabla.pivot_table(index=["clase", "metodo"], columns="escala", values="segundos", sort=False).round(3).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# benchmarks/reglas_canasta.py
+"""
+Tiempo de market_basket_rules (Apriori con poda) frente a la enumeración completa
+de combinaciones que usaba antes, variando max_len y la cantidad de transacciones.
+
+Uso:
+    python -m benchmarks.reglas_canasta [ruta_csv]
+"""
+import itertools
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+from application.procesamiento import AnalistaDeDatos
+from data.esquemas_reportes import leer_reporte
+
+RUTA_DEFAULT = "data/reportes/VENTAS_ANUAL_2025.csv"
+ESCALAS = [0.25, 0.5, 1, 2, 4]
+MAX_LENS = [2, 3, 4, 5]
+MIN_SUPPORT = 0.002
+LIMITE_ENUMERACION = 60.0  # segundos; la enumeración completa se omite si la anterior ya superó esto
+
+
+def _escalar(df, factor):
+    """Submuestra (factor < 1) o replica (factor > 1) las órdenes con Ids desplazados."""
+    if factor <= 1:
+        return df.iloc[: int(len(df) * factor)]
+    copias = []
+    paso = int(df["Id"].max()) + 1
+    for i in range(int(factor)):
+        copia = df.copy()
+        copia["Id"] = copia["Id"] + i * paso
+        copias.append(copia)
+    return pd.concat(copias, ignore_index=True)
+
+
+def _enumeracion_completa(analista, min_support, max_len):
+    """Conteo sin poda: todas las combinaciones 1..max_len de cada ticket (algoritmo anterior)."""
+    lineas = analista._lineas_validas()
+    tx_items = lineas.groupby("Id_Venta")["producto"].agg(lambda s: sorted(set(s))).tolist()
+    conteos = Counter()
+    for items in tx_items:
+        for k in range(1, max_len + 1):
+            conteos.update(itertools.combinations(items, k))
+    n = len(tx_items)
+    return sum(1 for c, v in conteos.items() if len(c) >= 2 and v / n >= min_support)
+
+
+def _medir(fn):
+    t0 = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - t0, resultado
+
+
+def main(ruta=RUTA_DEFAULT):
+    base = leer_reporte(ruta).dropna(how="all")
+    filas = []
+    for factor in ESCALAS:
+        analista = AnalistaDeDatos(_escalar(base, factor), "VENTAS")
+        analista.lineas  # el parseo no entra en la medición
+        n_tx = analista._lineas_validas()["Id_Venta"].nunique()
+        t_enum_prev = 0.0
+        for max_len in MAX_LENS:
+            t_apriori, reglas = _medir(lambda: analista.market_basket_rules(
+                min_support=MIN_SUPPORT, min_confidence=0.1, max_len=max_len, top_n=10**9))
+            t_enum = None
+            if t_enum_prev < LIMITE_ENUMERACION:
+                t_enum, _ = _medir(lambda: _enumeracion_completa(analista, MIN_SUPPORT, max_len))
+                t_enum_prev = t_enum
+            filas.append({
+                "transacciones": n_tx,
+                "max_len": max_len,
+                "reglas": 0 if reglas is None else len(reglas),
+                "apriori_ms": round(t_apriori * 1000, 1),
+                "enumeracion_ms": None if t_enum is None else round(t_enum * 1000, 1),
+            })
+            print(filas[-1])
+    print()
+    print(pd.DataFrame(filas).to_string(index=False))
+    return filas
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
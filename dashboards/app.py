@@ -1,4 +1,5 @@
 import time
+import tracemalloc
 import streamlit as st
 import pandas as pd
 import plotly.express as px
@@ -14,14 +15,35 @@ sys.path.append(os.getcwd())
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
-from data.robotMercat import RobotMercat
+from data.robotMercat import RobotMercat, limpiar_carpeta
+from data.cliente_http_mercat import ClienteMercatHTTP
+from data.descargas_paralelas import (INACTIVIDAD_DEFAULT, MAX_SESIONES_DEFAULT, RUTA_COOKIES_DEFAULT,
+                                      SUCURSAL_DEFAULT, OrquestadorDescargas, borrar_csv_ingerido, pedido)
+from data.cola_descargas import DESCARGANDO, EN_COLA, ColaDescargas
 from data.config_reportes import REPORTES_CONFIG
+from data.registro_descargas import RegistroDescargas
+from data.cache_reportes import CacheColumnar
+from data.esquemas_reportes import leer_reporte
+from data.cargador_reportes import cargar_conjunto
+from data.almacen_reportes import AlmacenReportes, ESQUEMAS_ALMACEN
 from application.procesamiento import AnalistaDeDatos
 from application.analista_operacional import AnalistaOperacional
+from application.analista_sql import AnalistaSQL, DUCKDB_DISPONIBLE
+from application.cubo_ventas import CuboVentas
+from application.instrumentacion import CapturaRendimiento
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Dashboard C&C", layout="wide", page_icon="☕")
 
+# Registro de las llamadas a los analistas de este rerun (panel "Performance" del sidebar)
+captura_rendimiento = CapturaRendimiento().iniciar()
+# tracemalloc es global al proceso y encarece cada asignación de todas las sesiones:
+# se decide al iniciar el servidor, no desde la interfaz
+MEDIR_MEMORIA = os.environ.get("PERF_MEMORIA", "").lower() in ("1", "true", "yes")
+if MEDIR_MEMORIA and not tracemalloc.is_tracing():
+    tracemalloc.start()
+inicio_rerun = time.perf_counter()
+
 # --- FUNCIONES UTILITARIAS ---
 def obtener_archivos_disponibles():
     ruta = os.path.join("data", "reportes")
@@ -30,20 +52,252 @@ def obtener_archivos_disponibles():
     files.sort(key=lambda x: os.path.getctime(os.path.join(ruta, x)), reverse=True)
     return files
 
-def cargar_df(nombre_archivo):
+CACHE_REPORTES = CacheColumnar(os.path.join("data", "cache"))
+ALMACEN = AlmacenReportes(os.path.join("data", "almacen"))
+REGISTRO_DESCARGAS = RegistroDescargas()
+
+# Las pestañas por canal y Total calculaban Pendientes sobre órdenes ya filtradas y mostraban 0
+AYUDA_PENDIENTES = ("Órdenes válidas con pago pendiente (no suman en Ventas Totales). Versiones anteriores "
+                    "mostraban 0 en esta pestaña: no es comparable con esas cifras.")
+
+MODOS_DESCARGA = {"Navegador (Chrome)": RobotMercat, "HTTP (sin navegador)": ClienteMercatHTTP}
+TRAMOS_DESCARGA = {"Sin dividir": None, "Semanas": "W", "Meses": "M"}
+
+@st.cache_resource(show_spinner=False)
+def _orquestador_memorizado(carpeta, usuario, _password, modo):
+    return OrquestadorDescargas(carpeta, usuario, _password, almacen=ALMACEN,
+                                fabrica_robot=MODOS_DESCARGA[modo], ruta_cookies=RUTA_COOKIES_DEFAULT,
+                                inactividad=INACTIVIDAD_DEFAULT, registro=REGISTRO_DESCARGAS)
+
+def obtener_orquestador(carpeta, usuario, password, max_sesiones, modo):
+    """
+    Orquestador que sobrevive entre envíos del formulario del Robot: los navegadores
+    (o sesiones HTTP) quedan abiertos y logueados, y se cierran solos tras
+    INACTIVIDAD_DEFAULT segundos. Cambiar el número de sesiones ajusta el mismo
+    orquestador (no abre otro pool de navegadores al lado del anterior).
+    """
+    orquestador = _orquestador_memorizado(carpeta, usuario, password, modo)
+    orquestador.max_sesiones = max(1, int(max_sesiones))
+    return orquestador
+
+@st.cache_resource(show_spinner=False)
+def obtener_cola():
+    """Cola de descargas del servidor: los trabajos siguen aunque se cambie de módulo o se recargue la página."""
+    return ColaDescargas()
+
+def descargar_en_segundo_plano(orquestador, tipos, fini, ffin, nombres, tramo, conservar_csv, forzar=False):
+    """Trabajo de la cola (fuera del hilo de Streamlit): descarga y borra los CSV ya guardados en el almacén."""
+    if tramo:
+        manifiesto = [orquestador.descargar_por_tramos(t, fini, ffin, tramo=tramo, nombre=nombres[t]) for t in tipos]
+    else:
+        manifiesto = orquestador.descargar([pedido(t, fini, ffin, nombre=nombres[t]) for t in tipos], forzar=forzar)
+    if not conservar_csv:
+        for entrada in manifiesto:
+            borrar_csv_ingerido(entrada)
+    return manifiesto
+
+def resumen_fases(fases):
+    """'pagina 1.2 s · campo ×5 0.8 s · generar 12.3 s ⚠️ · ...' (las fases repetidas se suman)."""
+    totales = {}
+    for f in fases:
+        segundos, veces, ok = totales.get(f["fase"], (0.0, 0, True))
+        totales[f["fase"]] = (segundos + f["segundos"], veces + 1, ok and f["ok"])
+    return " · ".join(f"{fase}{f' ×{veces}' if veces > 1 else ''} {segundos:.1f} s{'' if ok else ' ⚠️'}"
+                      for fase, (segundos, veces, ok) in totales.items())
+
+def panel_descargas():
+    """Estado de la cola de descargas; con trabajos activos se refresca solo (st.fragment con run_every)."""
+    cola = obtener_cola()
+    trabajos = cola.trabajos()
+    terminados = {t["id"] for t in trabajos if t["estado"] not in (EN_COLA, DESCARGANDO)}
+    vistos = st.session_state.setdefault("descargas_vistas", set(terminados))
+    if terminados - vistos:
+        # Archivos nuevos: rerun completo para que aparezcan en los selectores
+        vistos.update(terminados)
+        st.rerun()
+    if not trabajos:
+        st.caption("Sin descargas.")
+        return
+    ahora = time.time()
+    st.dataframe(pd.DataFrame([{
+        "Trabajo": t["descripcion"],
+        "Estado": t["estado"],
+        "Segundos": t["segundos"] if t["segundos"] is not None else round(ahora - (t["inicio"] or t["creado"]), 1),
+    } for t in trabajos]), hide_index=True, use_container_width=True)
+    for t in trabajos:
+        if t["estado"] in (EN_COLA, DESCARGANDO):
+            continue
+        if t["manifiesto"] is None:
+            st.error(f"❌ {t['descripcion']}: {t['error']}")
+            continue
+        for entrada in t["manifiesto"]:
+            if not entrada["ok"]:
+                st.error(f"❌ {entrada['reporte']}: {entrada['error']}")
+                continue
+            resumen = entrada["almacen"]
+            estado_csv = "" if os.path.exists(entrada["archivo"]) else " (CSV borrado)"
+            if entrada.get("reutilizado"):
+                st.info(f"⏭️ {os.path.basename(entrada['archivo'])}: ya descargado el {entrada['reutilizado']}, no se pidió de nuevo.")
+                continue
+            st.success(f"✅ {os.path.basename(entrada['archivo'])}{estado_csv} ({entrada['segundos']} s).")
+            if entrada.get("duplicado_de"):
+                st.caption("♻️ Idéntico a una descarga anterior: se conservó el archivo existente.")
+            if entrada.get("fases"):
+                st.caption(f"⏱️ {resumen_fases(entrada['fases'])}")
+            if entrada.get("marca"):
+                st.caption(f"🔖 {entrada['reporte']} sincronizado hasta el {entrada['marca']}.")
+            if resumen:
+                st.info(f"📦 Almacén: {resumen['nuevas']} nuevas, {resumen['actualizadas']} actualizadas.")
+    if terminados and st.button("Limpiar terminadas", key="limpiar_descargas"):
+        cola.limpiar_terminados()
+        st.rerun()
+
+def _leer_reporte(ruta):
+    """Parseo tipado del export de Mercat (solo se usa si no hay caché válida)."""
+    df = leer_reporte(ruta)
+    df = df.dropna(axis=1, how='all')
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    return df
+
+# --- MEMOIZACIÓN ENTRE RERUNS ---
+# Streamlit re-ejecuta el script completo con cada click. Todo lo costoso queda
+# memorizado por la huella del archivo (ruta, tamaño, mtime, sha256) más los
+# parámetros; las entradas más viejas se descartan al llegar a max_entries.
+MAX_REPORTES_EN_MEMORIA = 4
+MAX_RESULTADOS_EN_MEMORIA = 64
+
+def huella_reporte(nombre_archivo):
+    return CACHE_REPORTES.huella(os.path.join("data", "reportes", nombre_archivo))
+
+@st.cache_data(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Cargando reporte...")
+def _cargar_df_memorizado(ruta, huella):
+    return CACHE_REPORTES.cargar(ruta, _leer_reporte)
+
+def cargar_df(nombre_archivo, huella=None):
     try:
         ruta = os.path.join("data", "reportes", nombre_archivo)
-        if nombre_archivo.endswith('.csv'):
-            df = pd.read_csv(ruta)
-        else:
-            df = pd.read_excel(ruta)
-        df = df.dropna(axis=1, how='all')
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-        return df
+        return _cargar_df_memorizado(ruta, huella or CACHE_REPORTES.huella(ruta))
     except Exception as e:
         st.error(f"Error leyendo {nombre_archivo}: {e}")
         return None
 
+@st.cache_data(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Combinando reportes...")
+def _cargar_conjunto_memorizado(rutas, huellas):
+    return cargar_conjunto(rutas, lector=lambda r: CACHE_REPORTES.cargar(r, _leer_reporte))
+
+def cargar_conjunto_df(nombres_archivos, huellas):
+    """Varios exports del mismo tipo como un solo frame, sin órdenes repetidas (gana la descarga más nueva)."""
+    try:
+        rutas = tuple(os.path.join("data", "reportes", n) for n in nombres_archivos)
+        return _cargar_conjunto_memorizado(rutas, huellas)
+    except Exception as e:
+        st.error(f"Error combinando archivos: {e}")
+        return None
+
+@st.cache_data(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Leyendo almacén...")
+def _cargar_almacen_memorizado(esquema, desde, hasta, huella):
+    return ALMACEN.leer(esquema, desde, hasta).dropna(axis=1, how='all')
+
+def cargar_almacen_df(esquema, desde, hasta):
+    """Órdenes del almacén en el rango; devuelve (df, huella). La huella son las partes leídas."""
+    try:
+        huella = (esquema, str(desde), str(hasta)) + ALMACEN.huella(esquema, desde, hasta)
+        return _cargar_almacen_memorizado(esquema, desde, hasta, huella), huella
+    except Exception as e:
+        st.error(f"Error leyendo el almacén: {e}")
+        return None, None
+
+@st.cache_resource(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Procesando reporte...")
+def obtener_analista(_df_raw, huella, tipo):
+    """Una instancia por archivo: conserva su tabla de items (lineas) entre reruns."""
+    return AnalistaDeDatos(_df_raw, tipo)
+
+@st.cache_resource(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Armando cubo de ventas...")
+def obtener_cubo(_analista, huella, rango_almacen=None):
+    """
+    Cubo pre-agregado que alimenta los gráficos por hora, día, turno y mes. Desde el
+    almacén se reutilizan los cubos mensuales guardados y solo se recalculan los meses nuevos.
+    """
+    if rango_almacen is not None:
+        return CuboVentas.desde_almacen(ALMACEN, *rango_almacen)
+    return CuboVentas.desde_analista(_analista)
+
+@st.cache_resource(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Preparando consultas SQL...")
+def obtener_analista_sql(desde, hasta, huella):
+    """Una conexión DuckDB (con su tabla `ordenes` del rango) por rango y partes del almacén."""
+    return AnalistaSQL.desde_almacen(ALMACEN.carpeta / "Ventas", desde, hasta)
+
+@st.cache_resource(max_entries=MAX_REPORTES_EN_MEMORIA, show_spinner="Procesando reporte...")
+def obtener_operacional(_df_ventas, _df_indice, huella_ventas, huella_indice):
+    return AnalistaOperacional(df_ventas=_df_ventas, df_indice=_df_indice)
+
+@st.cache_data(max_entries=MAX_RESULTADOS_EN_MEMORIA, show_spinner=False)
+def analisis_memorizado(_analista, huella, metodo, **kwargs):
+    """Resultado de `_analista.metodo(**kwargs)`; la clave es huella + método + parámetros."""
+    return getattr(_analista, metodo)(**kwargs)
+
+def filtrar_por_canal(analista, canal=None, incluir_alquiler=False):
+    """Órdenes válidas del canal (columna categórica 'Canal'; None: todos los canales)."""
+    df_tmp = analista.df
+    if not incluir_alquiler:
+        df_tmp = analista._excluir_alquiler(df_tmp)
+    if "Es_Valido" in df_tmp.columns:
+        df_tmp = df_tmp[df_tmp["Es_Valido"] == True]
+    if canal is None:
+        return df_tmp
+    return df_tmp[df_tmp["Canal"] == canal]
+
+def filtrar_productos_por_canal(df_prod, canal=None):
+    if df_prod is None or df_prod.empty:
+        return pd.DataFrame()
+    if canal is None:
+        return df_prod
+    return df_prod[df_prod["Canal"] == canal]
+
+def top_pedidos_completos(df_prod, n=5):
+    """Pedidos completos (2+ productos base distintos) más repetidos, p.ej. 'Cappuccino + Croissant'."""
+    if df_prod is None or df_prod.empty:
+        return None
+    items = df_prod[["Id_Venta", "Producto_Base"]].dropna().drop_duplicates().sort_values(["Id_Venta", "Producto_Base"])
+    pedidos = items.groupby("Id_Venta")["Producto_Base"].agg(n="size", Pedido=" + ".join)
+    combos = pedidos.loc[pedidos["n"] > 1, "Pedido"].value_counts().head(n).reset_index()
+    combos.columns = ["Pedido", "Veces"]
+    return combos
+
+@st.cache_data(max_entries=MAX_RESULTADOS_EN_MEMORIA, show_spinner=False)
+def resumen_canal(_analista, huella, canal=None, incluir_alquiler=False):
+    """
+    Órdenes, productos, parejas y pedidos completos de un canal (None: total).
+    Devuelve (df_canal, df_prod_canal, parejas, combos). Los KPIs salen de kpis_por_canal.
+    """
+    df_canal = filtrar_por_canal(_analista, canal, incluir_alquiler=incluir_alquiler)
+    if df_canal.empty:
+        return df_canal, pd.DataFrame(), None, None
+
+    df_productos = analisis_memorizado(_analista, huella, "analizar_productos")
+    df_prod_canal = filtrar_productos_por_canal(df_productos, canal)
+    lineas_canal = filtrar_productos_por_canal(_analista.lineas, canal)
+    parejas = _analista.basket_analysis(top_n=20, min_support=2, lineas=lineas_canal) if not lineas_canal.empty else None
+    return df_canal, df_prod_canal, parejas, top_pedidos_completos(df_prod_canal)
+
+def mostrar_rendimiento(contenedor, captura, segundos_rerun):
+    """Desglose por método del rerun actual. Lo servido desde caché no aparece."""
+    tabla = captura.tabla()
+    with contenedor:
+        st.caption(f"Rerun: {segundos_rerun:.2f} s · Métodos ejecutados: {len(tabla)}")
+        if tabla.empty:
+            st.caption("Todo salió de caché en este rerun.")
+            return
+        tabla["Metodo"] = ["· " * n + m for n, m in zip(tabla["Nivel"], tabla["Metodo"])]
+        columnas = ["Metodo", "Segundos", "Filas_Entrada", "Filas_Salida"]
+        if tabla["Memoria_Pico_MB"].notna().any():
+            columnas.append("Memoria_Pico_MB")
+        st.dataframe(
+            tabla[columnas].style.format({"Segundos": "{:.3f}", "Memoria_Pico_MB": "{:.1f}"}, na_rep="-"),
+            hide_index=True,
+            use_container_width=True,
+        )
+
 def obtener_coordenadas_mesas():
     """
     Coordenadas normalizadas (0-130 en X, 0-100 en Y) alineadas al plano físico:
@@ -190,6 +444,213 @@ def renderizar_mapa_mesas(df_mesas):
     
     return fig
 
+
+@st.fragment
+def seccion_variantes(df_prod, nombre):
+    """Selector de producto y su distribución de variantes (solo esta sección se re-ejecuta al cambiar el producto)."""
+    st.markdown("### Variantes") # Ya no "y modificadores" si quitaste esa parte
+
+    if not df_prod.empty:
+        # 1. El selector de producto queda arriba (ancho completo)
+        productos_disponibles = sorted(df_prod["Producto_Base"].unique())
+        prod_sel = st.selectbox("Producto", productos_disponibles, key=f"prod_{nombre}")
+
+        # 2. Procesamiento de datos
+        df_sel = df_prod[df_prod["Producto_Base"] == prod_sel]
+        total_prod = df_sel["Cantidad"].sum()
+        variantes = df_sel.groupby("Variante")["Cantidad"].sum().reset_index()
+        variantes["Porcentaje"] = variantes["Cantidad"] / total_prod * 100 if total_prod else 0
+
+        if not variantes.empty:
+            # 3. AQUÍ CREAMOS LAS COLUMNAS: Gráfico (Izquierda) | Tabla (Derecha)
+            # El array [2, 1] le da más espacio al gráfico (2/3) y menos a la tabla (1/3)
+            col_grafico, col_tabla = st.columns([2, 1]) 
+
+            with col_grafico:
+                fig_var = px.pie(variantes, values="Cantidad", names="Variante", 
+                                title=f"Distribución de {prod_sel}", hole=0.45)
+                # Opcional: poner la leyenda abajo si molesta a los lados
+                # fig_var.update_layout(legend=dict(orientation="h", y=-0.1))
+                st.plotly_chart(fig_var, use_container_width=True, key=f"fig_var_{nombre}")
+
+            with col_tabla:
+                # Agregué un margen superior o un título pequeño para que no se vea desalineado
+                st.write(f"**Total: {total_prod}**") 
+                st.dataframe(
+                    variantes[["Variante", "Cantidad", "Porcentaje"]], 
+                    hide_index=True, 
+                    use_container_width=True,
+                    height=300 # Opcional: fuerza una altura similar al gráfico si hay pocas filas
+                )
+        else:
+            st.info("Sin variantes registradas para este producto.")
+
+    else:
+        st.info("Sin detalle de productos para analizar variantes.")
+
+
+@st.fragment
+def seccion_dia_semana(cubo, canal, nombre, incluir_alquiler=False):
+    """KPIs, horas y turnos del día de la semana elegido (solo esta sección se re-ejecuta al cambiar el día)."""
+    st.markdown("### Análisis por día de la semana")
+    if not cubo.ordenes.empty:
+        # Mapeo de nombres en inglés a español para mejor UX
+        dias_map = {
+            'Monday': 'Lunes',
+            'Tuesday': 'Martes',
+            'Wednesday': 'Miércoles',
+            'Thursday': 'Jueves',
+            'Friday': 'Viernes',
+            'Saturday': 'Sábado',
+            'Sunday': 'Domingo'
+        }
+        dias_disponibles = cubo.dias_semana(canal, incluir_alquiler)
+
+        if dias_disponibles:
+            dia_seleccionado = st.selectbox(
+                "Selecciona un día:", 
+                dias_disponibles,
+                format_func=lambda x: dias_map.get(x, x),
+                key=f"dia_sel_{nombre}"
+            )
+
+            # Totales de la semana (para porcentaje) y del día seleccionado, desde el cubo
+            pedidos_semana, monto_semana = cubo.totales(canal, incluir_alquiler)
+            pedidos_dia, monto_dia = cubo.totales(canal, incluir_alquiler, dia_seleccionado)
+
+            if pedidos_dia or monto_dia:
+                # KPIs del día
+                ticket_prom_dia = monto_dia / pedidos_dia if pedidos_dia > 0 else 0
+
+                # Porcentajes respecto a la semana
+                porc_pedidos = (pedidos_dia / pedidos_semana * 100) if pedidos_semana > 0 else 0
+                porc_monto = (monto_dia / monto_semana * 100) if monto_semana > 0 else 0
+
+                k_d1, k_d2, k_d3 = st.columns(3)
+                k_d1.metric(
+                    f"Pedidos ({dias_map.get(dia_seleccionado, dia_seleccionado)})", 
+                    pedidos_dia,
+                    f"{porc_pedidos:.1f}% de la semana"
+                )
+                k_d2.metric("Ticket Promedio", f"Bs {ticket_prom_dia:,.0f}")
+                k_d3.metric(
+                    "Monto Total", 
+                    f"Bs {monto_dia:,.0f}",
+                    f"{porc_monto:.1f}% de la semana"
+                )
+
+                # Análisis por hora del día seleccionado
+                st.markdown(f"#### Pedidos por hora - {dias_map.get(dia_seleccionado, dia_seleccionado)}")
+                horas_dia = cubo.por_hora(canal, incluir_alquiler, dia_seleccionado)
+                horas_dia.columns = ["Hora", "Pedidos", "Monto", "Ticket_Promedio"]
+
+                # Gráfico de pedidos por hora
+                fig_hora_dia = px.bar(
+                    horas_dia, 
+                    x="Hora", 
+                    y="Pedidos",
+                    title=f"Distribución horaria - {dias_map.get(dia_seleccionado, dia_seleccionado)}",
+                    text_auto=True,
+                    color="Pedidos",
+                    color_continuous_scale="Blues"
+                )
+                st.plotly_chart(fig_hora_dia, use_container_width=True, key=f"hora_dia_{nombre}")
+
+                # Análisis por turno
+                st.markdown("#### Análisis por Turno")
+                turnos = cubo.por_turno(canal, incluir_alquiler, dia_seleccionado)
+
+                # Calcular porcentajes respecto al total del día
+                turnos["Porc_Pedidos"] = (turnos["Pedidos"] / pedidos_dia * 100) if pedidos_dia > 0 else 0
+                turnos["Porc_Monto"] = (turnos["Monto"] / monto_dia * 100) if monto_dia > 0 else 0
+
+                # Asegurar orden: Mañana primero
+                turnos = turnos.sort_values("Turno", ascending=True)
+
+                # Mostrar métricas por turno
+                col_turnos = st.columns(len(turnos))
+                for idx, (_, turno_row) in enumerate(turnos.iterrows()):
+                    with col_turnos[idx]:
+                        st.markdown(f"**{turno_row['Turno']}**")
+                        st.metric(
+                            "Pedidos", 
+                            f"{int(turno_row['Pedidos'])}",
+                            f"{turno_row['Porc_Pedidos']:.1f}% del día"
+                        )
+                        st.metric("Ticket Promedio", f"Bs {turno_row['Ticket_Promedio']:,.0f}")
+                        st.metric(
+                            "Monto Total", 
+                            f"Bs {turno_row['Monto']:,.0f}",
+                            f"{turno_row['Porc_Monto']:.1f}% del día"
+                        )
+
+                # Tabla detallada de turnos
+                with st.expander("Ver tabla detallada por turno"):
+                    st.dataframe(
+                        turnos[["Turno", "Pedidos", "Porc_Pedidos", "Monto", "Porc_Monto", "Ticket_Promedio"]].style.format({
+                            "Pedidos": "{:,.0f}",
+                            "Porc_Pedidos": "{:.1f}%",
+                            "Monto": "Bs {:,.2f}",
+                            "Porc_Monto": "{:.1f}%",
+                            "Ticket_Promedio": "Bs {:,.2f}"
+                        }),
+                        hide_index=True,
+                        use_container_width=True
+                    )
+            else:
+                st.info(f"No hay datos para {dias_map.get(dia_seleccionado, dia_seleccionado)}.")
+        else:
+            st.info("No hay datos de días de la semana disponibles.")
+    else:
+        st.info("No hay información suficiente para análisis por día.")
+
+def resumen_sql(desde, hasta):
+    """
+    KPIs, canales, tendencia y mapa de calor del almacén de Ventas calculados con DuckDB
+    sobre los Parquet, sin cargar las órdenes en pandas (rangos de varios años).
+    """
+    # "sql" en la huella: analisis_memorizado no mira el analista, y sin esto compartiría
+    # resultados con el AnalistaDeDatos del mismo rango (cargar_almacen_df)
+    huella = ("sql", "Ventas", str(desde), str(hasta)) + ALMACEN.huella("Ventas", desde, hasta)
+    analista_sql = obtener_analista_sql(desde, hasta, huella)
+    kpis = analisis_memorizado(analista_sql, huella, "get_kpis_financieros")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Ventas Operativas", f"Bs {kpis['Ventas Totales']:,.0f}", help="Venta de productos (Sin alquileres)")
+    c2.metric("Ticket Promedio", f"Bs {kpis['Ticket Promedio']:,.0f}")
+    c3.metric("Transacciones", kpis['Transacciones'])
+    c4.metric("Descuentos", f"Bs {kpis['Total Descuentos']:,.0f}")
+    c5, c6, c7, c8 = st.columns(4)
+    c5.metric("Pendientes", f"Bs {kpis['Ventas Pendientes']:,.0f}")
+    c6.metric("Consumo Interno", f"Bs {kpis['Consumo Interno']:,.0f}")
+    c7.metric("Ingreso Yango (Alquiler)", f"Bs {analisis_memorizado(analista_sql, huella, 'get_kpi_alquileres'):,.0f}")
+    c8.metric("Cobranza (%)", f"{kpis['Ratio Pagado']*100:,.1f}%")
+
+    st.markdown("### Ventas por canal")
+    kpis_canales = analisis_memorizado(analista_sql, huella, "kpis_por_canal")
+    st.dataframe(kpis_canales.style.format("{:,.2f}"), use_container_width=True)
+
+    st.markdown("### Tendencia diaria")
+    tendencia = analisis_memorizado(analista_sql, huella, "ventas_por_tiempo", agrupacion="D")
+    if not tendencia.empty:
+        st.plotly_chart(px.line(tendencia, x="Fecha", y="Monto total"), use_container_width=True, key="sql_tendencia")
+
+    st.markdown("### Mapa de calor semanal")
+    mapa = analisis_memorizado(analista_sql, huella, "weekly_heatmap")
+    if mapa is not None:
+        st.plotly_chart(px.imshow(mapa, aspect="auto", color_continuous_scale="Blues"), use_container_width=True, key="sql_heatmap")
+
+    st.markdown("### Frecuencia de pedidos por canal")
+    canales = [str(c) for c in kpis_canales.index[kpis_canales["Transacciones"] > 0]]
+    canal = st.selectbox("Canal:", ["Todos"] + canales, key="sql_canal")
+    canal = None if canal == "Todos" else canal
+    c_h, c_d = st.columns(2)
+    horas = analisis_memorizado(analista_sql, huella, "frecuencia_pedidos", canal=canal, por="Hora_Num")
+    c_h.plotly_chart(px.bar(horas, x="Hora_Num", y="Pedidos", title="Cantidad de pedidos por hora", color="Pedidos",
+                            color_continuous_scale="Blues", text_auto=True), use_container_width=True, key="sql_freq_hora")
+    dias = analisis_memorizado(analista_sql, huella, "frecuencia_pedidos", canal=canal, por="Dia_Semana")
+    c_d.plotly_chart(px.bar(dias, x="Dia_Semana", y="Pedidos", title="Cantidad de pedidos por día", color="Pedidos",
+                            color_continuous_scale="Blues", text_auto=True), use_container_width=True, key="sql_freq_dia")
+
 # ==============================================================================
 #                                   SIDEBAR
 # ==============================================================================
@@ -208,60 +669,134 @@ with st.sidebar:
         st.subheader("Descargar Reporte")
         with st.form("form_robot"):
             opciones = list(REPORTES_CONFIG.keys())
-            tipo = st.selectbox("Reporte", opciones)
+            tipos = st.multiselect("Reportes", opciones, default=opciones[:1],
+                                   help="Varios reportes se descargan en paralelo, cada uno en su propia sesión")
             c1, c2 = st.columns(2)
             from datetime import date, timedelta
             hoy = date.today()
             hace_7_dias = hoy - timedelta(days=7)
             fini = c1.date_input("Desde", value=hace_7_dias)
             ffin = c2.date_input("Hasta", value=hoy)
-            nombre = st.text_input("Nombre:", value=f"{tipo}_{fini.strftime('%d%m')}")
+            nombre = st.text_input("Nombre:", value=f"{opciones[0]}_{fini.strftime('%d%m')}",
+                                   help="Con varios reportes cada archivo se llama <Reporte>_<ddmm>")
             limpiar = st.checkbox("Borrar previos", value=False)
+            conservar_csv = st.checkbox("Conservar CSV", value=True,
+                                        help="Ventas e Índice se guardan en el almacén; sin esta opción el CSV se borra después")
+            sesiones = st.slider("Sesiones en paralelo", 1, 4, MAX_SESIONES_DEFAULT)
+            modo = st.radio("Modo", list(MODOS_DESCARGA), horizontal=True,
+                            help="HTTP envía los formularios directamente, sin abrir Chrome (más rápido y liviano)")
+            forzar = st.checkbox("Forzar descarga", value=False,
+                                 help="Sin esta opción, un pedido igual a uno descargado hace poco reutiliza ese archivo")
+            tramo = st.selectbox("Dividir en", list(TRAMOS_DESCARGA),
+                                 help="Rangos largos: cada tramo se baja en paralelo, se valida y se reintenta solo si falla")
             
-            if st.form_submit_button("⬇️ Ejecutar"):
+            c_ejecutar, c_sincronizar = st.columns(2)
+            ejecutar = c_ejecutar.form_submit_button("⬇️ Ejecutar")
+            sincronizar = c_sincronizar.form_submit_button(
+                "🔄 Días nuevos", help="Ventas e Índice desde la última sincronización (con unos días de solapamiento), "
+                                      "directo al almacén. Ignora reportes y fechas de arriba")
+            if ejecutar or sincronizar:
                 try:
                     folder = os.path.join(os.getcwd(), "data", "reportes")
                     if not os.path.exists(folder): os.makedirs(folder)
-                    bot = RobotMercat(folder)
-                    if limpiar: bot.limpiar_carpeta_descargas()
                     # Credenciales desde variables de entorno
                     user = os.environ.get("MERCAT_USER")
                     pwd = os.environ.get("MERCAT_PASS")
                     if not user or not pwd:
                         st.error("Faltan variables de entorno MERCAT_USER y MERCAT_PASS.")
                         st.stop()
-                    bot.login(user, pwd)
-                    params = {
-                        "fecha_inicio": fini.strftime("%d/%m/%Y"),
-                        "fecha_fin": ffin.strftime("%d/%m/%Y"),
-                        "sucursal": "1087", "con_factura": "", "anulado": ""
-                    }
-                    bot.descargar_reporte(REPORTES_CONFIG[tipo], params)
-                    bot.renombrar_ultimo_archivo(nombre)
-                    bot.cerrar()
-                    st.success(f"✅ {nombre} descargado.")
-                    time.sleep(1)
-                    st.rerun()
+                    orquestador = obtener_orquestador(folder, user, pwd, sesiones, modo)
+                    if sincronizar:
+                        obtener_cola().encolar(f"Días nuevos (sucursal {SUCURSAL_DEFAULT})", orquestador.sincronizar,
+                                               conservar_csv=conservar_csv)
+                        st.toast("🔄 Sincronización en cola.")
+                    elif not tipos:
+                        st.error("Elige al menos un reporte.")
+                    else:
+                        if limpiar:
+                            if obtener_cola().activos:
+                                st.warning("Hay descargas en curso: no se borran los archivos previos.")
+                            else:
+                                limpiar_carpeta(folder)
+                        nombres = {t: nombre if len(tipos) == 1 else f"{t}_{fini.strftime('%d%m')}" for t in tipos}
+                        obtener_cola().encolar(
+                            f"{', '.join(tipos)} {fini:%d/%m}-{ffin:%d/%m}", descargar_en_segundo_plano,
+                            orquestador, tipos, fini, ffin, nombres, TRAMOS_DESCARGA[tramo], conservar_csv, forzar,
+                        )
+                        st.toast("📥 Descarga en cola: puedes seguir analizando mientras tanto.")
                 except Exception as e:
                     st.error(f"Error: {e}")
 
+        with st.expander("⏱️ Tiempos del robot", expanded=False):
+            tiempos = REGISTRO_DESCARGAS.resumen_fases()
+            if tiempos.empty:
+                st.caption("Todavía no hay descargas medidas.")
+            else:
+                st.dataframe(tiempos, hide_index=True, use_container_width=True)
+                esperas = {r: REGISTRO_DESCARGAS.esperas_sugeridas(r) for r in tiempos["reporte"].unique()}
+                st.caption("Esperas medidas (s; el navegador solo las usa si superan las suyas): " + "; ".join(
+                    f"{r}: {', '.join(f'{f} {v:g}' for f, v in e.items())}" for r, e in esperas.items() if e)
+                    if any(esperas.values()) else "Esperas por defecto del robot (pocas mediciones todavía).")
+
+    with st.expander("📥 Descargas", expanded=obtener_cola().activos > 0):
+        st.fragment(panel_descargas, run_every=2 if obtener_cola().activos else None)()
+
     archivos = obtener_archivos_disponibles()
     st.caption(f"Archivos: {len(archivos)}")
 
+    panel_rendimiento = st.expander("⏱️ Performance", expanded=False)
+    panel_rendimiento.caption(
+        "Memoria pico: activada para todo el servidor (PERF_MEMORIA); incluye lo que asignan otras sesiones."
+        if MEDIR_MEMORIA else "Memoria pico: desactivada (PERF_MEMORIA=1 al iniciar el servidor para medirla).")
+
 # ==============================================================================
 #                           MODO 1: ANÁLISIS INDIVIDUAL
 # ==============================================================================
 if modo_app == "📊 Análisis Individual":
     st.header("📊 Análisis Detallado")
     
-    if not archivos:
+    particiones_almacen = {e: ALMACEN.particiones(e) for e in ESQUEMAS_ALMACEN}
+    if not archivos and not any(particiones_almacen.values()):
         st.warning("No hay archivos.")
         st.stop()
-        
-    archivo_sel = st.selectbox("Selecciona archivo:", archivos)
+
+    origenes = ["Un archivo", "Combinar archivos"] + (["Almacén"] if any(particiones_almacen.values()) else [])
+    origen = st.radio("Origen:", origenes, horizontal=True, key="origen_datos",
+                      help="Combinar: une exports del mismo tipo sin contar dos veces las órdenes repetidas. "
+                           "Almacén: lee solo los meses del rango desde el historial en Parquet")
+    combinar = origen == "Combinar archivos"
+    if origen == "Almacén":
+        c_esq, c_desde, c_hasta = st.columns(3)
+        esquema_alm = c_esq.selectbox("Reporte:", [e for e in ESQUEMAS_ALMACEN if particiones_almacen[e]])
+        meses = particiones_almacen[esquema_alm]
+        primer_dia = pd.Timestamp(meses[0][0], meses[0][1], 1).date()
+        ultimo_dia = (pd.Timestamp(meses[-1][0], meses[-1][1], 1) + pd.offsets.MonthEnd(0)).date()
+        desde_alm = c_desde.date_input("Desde", value=primer_dia, min_value=primer_dia, max_value=ultimo_dia)
+        hasta_alm = c_hasta.date_input("Hasta", value=ultimo_dia, min_value=primer_dia, max_value=ultimo_dia)
+        archivo_sel = f"Almacén {esquema_alm} {desde_alm:%d/%m/%Y}-{hasta_alm:%d/%m/%Y}"
+        usar_sql = esquema_alm == "Ventas" and st.toggle(
+            "Resumen SQL (DuckDB)", key="resumen_sql", disabled=not DUCKDB_DISPONIBLE,
+            help="KPIs y gráficos principales consultando el Parquet en el lugar: no carga las órdenes en memoria")
+    elif combinar:
+        seleccion = st.multiselect("Archivos a combinar:", archivos, key="archivos_combinados")
+        archivo_sel = " + ".join(seleccion)
+    else:
+        archivo_sel = st.selectbox("Selecciona archivo:", archivos)
     
-    if archivo_sel:
-        df_raw = cargar_df(archivo_sel)
+    if origen == "Almacén" and usar_sql:
+        try:
+            resumen_sql(desde_alm, hasta_alm)
+        except Exception as e:
+            st.error(f"Error en el motor SQL: {e}")
+    elif archivo_sel:
+        if origen == "Almacén":
+            df_raw, huella = cargar_almacen_df(esquema_alm, desde_alm, hasta_alm)
+        elif combinar:
+            huella = tuple(huella_reporte(a) for a in seleccion)
+            df_raw = cargar_conjunto_df(seleccion, huella)
+        else:
+            huella = huella_reporte(archivo_sel)
+            df_raw = cargar_df(archivo_sel, huella)
         if df_raw is not None:
             # Detección
             tipo = "OTRO"
@@ -269,7 +804,7 @@ if modo_app == "📊 Análisis Individual":
             elif "Creado el" in df_raw.columns: tipo = "INDICE"
             
             # Instancia Analista Base
-            analista = AnalistaDeDatos(df_raw, tipo)
+            analista = obtener_analista(df_raw, huella, tipo)
             st.caption(f"Tipo: {tipo} | Filas: {len(df_raw)}")
             
             # -------------------------------------------------------
@@ -277,8 +812,8 @@ if modo_app == "📊 Análisis Individual":
             # -------------------------------------------------------
             if tipo == "VENTAS":
                 # KPIs globales
-                kpis = analista.get_kpis_financieros()
-                monto_alquiler = analista.get_kpi_alquileres()
+                kpis = analisis_memorizado(analista, huella, "get_kpis_financieros")
+                monto_alquiler = analisis_memorizado(analista, huella, "get_kpi_alquileres")
                 c1, c2, c3, c4 = st.columns(4)
                 c1.metric("Ventas Operativas", f"Bs {kpis.get('Ventas Totales',0):,.0f}", help="Venta de productos (Sin alquileres)")
                 c2.metric("Ticket Promedio", f"Bs {kpis.get('Ticket Promedio',0):,.0f}")
@@ -293,67 +828,40 @@ if modo_app == "📊 Análisis Individual":
 
                 st.divider()
 
-                # Precomputos y helpers para las nuevas vistas por canal
-                df_productos = analista.analizar_productos()
-                df_global_valid = analista._excluir_alquiler(analista.df.copy())
-                if "Es_Valido" in df_global_valid.columns:
-                    df_global_valid = df_global_valid[df_global_valid["Es_Valido"] == True]
-                total_ventas_validas = df_global_valid["Monto total"].sum()
-
-                CANAL_ALIASES = {
-                    "Mesa": ["MESA", "EN LOCAL", "DINE IN"],
-                    "Recojo": ["RECOJO", "RETIRO", "PICKUP", "PARA LLEVAR"],
-                    "Interno": ["INTERNO"],
-                    "PedidosYa": ["PEDIDOSYA", "PEDIDOS YA", "PEDIDOS-YA"],
-                    "Yango": ["YANGO"]
-                }
-
-                def filtrar_por_canal(df_base, alias_list, incluir_alquiler=False):
-                    df_tmp = df_base.copy()
-                    if not incluir_alquiler:
-                        df_tmp = analista._excluir_alquiler(df_tmp)
-                    if "Es_Valido" in df_tmp.columns:
-                        df_tmp = df_tmp[df_tmp["Es_Valido"] == True]
-                    if "Tipo_Norm" in df_tmp.columns:
-                        tipos = df_tmp["Tipo_Norm"].fillna("").str.upper()
-                    else:
-                        tipos = df_tmp["Tipo de orden"].fillna("").str.upper()
-                    mask = tipos.apply(lambda t: any(alias in t for alias in alias_list))
-                    return df_tmp[mask]
-
-                def filtrar_productos_por_canal(df_prod, alias_list):
-                    if df_prod is None or df_prod.empty:
-                        return pd.DataFrame()
-                    tipos = df_prod["Tipo Orden"].fillna("").str.upper()
-                    mask = tipos.apply(lambda t: any(alias in t for alias in alias_list))
-                    return df_prod[mask]
-
-                def render_tab_canal(nombre, alias_list, incluir_alquiler=False, permitir_internos=False):
-                    df_canal = filtrar_por_canal(analista.df, alias_list, incluir_alquiler=incluir_alquiler)
-                    df_prod_canal = filtrar_productos_por_canal(df_productos, alias_list)
-
-                    # Los internos vienen marcados como no venta real; para mostrar sus KPIs los habilitamos
-                    if permitir_internos and not df_canal.empty:
-                        df_canal = df_canal.copy()
-                        df_canal["Es_Venta_Real"] = df_canal["Es_Valido"]
+                # Precomputos para las vistas por canal (memorizados por archivo)
+                df_total, df_productos_total, reglas_total, combos_total = resumen_canal(analista, huella)
+                total_ventas_validas = df_total["Monto total"].sum() if not df_total.empty else 0
+                kpis_canales = analisis_memorizado(analista, huella, "kpis_por_canal")
+                cubo = obtener_cubo(analista, huella, (desde_alm, hasta_alm) if origen == "Almacén" else None)
+
+                def render_tab_canal(nombre, incluir_alquiler=False):
+                    df_canal, df_prod_canal, reglas, combos = resumen_canal(
+                        analista, huella, nombre, incluir_alquiler=incluir_alquiler
+                    )
 
                     if df_canal.empty:
                         st.info("No hay datos válidos para este canal.")
                         return
 
-                    kpi_canal = AnalistaDeDatos(df_canal, "VENTAS").get_kpis_financieros()
+                    kpi_canal = kpis_canales.loc[nombre].to_dict()
+                    kpi_canal["Transacciones"] = int(kpi_canal["Transacciones"])
                     share = (kpi_canal.get("Ventas Totales", 0) / total_ventas_validas) if total_ventas_validas else 0
 
                     k1, k2, k3, k4, k5 = st.columns(5)
-                    k1.metric("Ventas Totales", f"Bs {kpi_canal.get('Ventas Totales',0):,.0f}", f"{share*100:,.1f}% del total")
+                    if nombre == "Interno":
+                        # El consumo interno no es venta (Ventas Totales siempre 0 aquí)
+                        k1.metric("Consumo Interno", f"Bs {kpi_canal.get('Consumo Interno',0):,.0f}",
+                                  help="Órdenes de consumo interno válidas; no cuentan en Ventas Totales.")
+                    else:
+                        k1.metric("Ventas Totales", f"Bs {kpi_canal.get('Ventas Totales',0):,.0f}", f"{share*100:,.1f}% del total")
                     k2.metric("Ticket Promedio", f"Bs {kpi_canal.get('Ticket Promedio',0):,.0f}")
                     k3.metric("Transacciones", kpi_canal.get('Transacciones',0))
                     k4.metric("Descuentos", f"Bs {kpi_canal.get('Total Descuentos',0):,.0f}")
-                    k5.metric("Pendientes", f"Bs {kpi_canal.get('Ventas Pendientes',0):,.0f}")
+                    k5.metric("Pendientes", f"Bs {kpi_canal.get('Ventas Pendientes',0):,.0f}", help=AYUDA_PENDIENTES)
 
                     st.markdown("### Top 15 productos más vendidos")
                     if not df_prod_canal.empty:
-                        top_base = df_prod_canal.groupby("Producto_Base")["Cantidad"].sum().nlargest(15).reset_index()
+                        top_base = cubo.productos_de(nombre).groupby("Producto_Base")["Cantidad"].sum().nlargest(15).reset_index()
                         fig_top = px.bar(top_base, x="Cantidad", y="Producto_Base", orientation="h", text_auto=True, color="Cantidad")
                         fig_top.update_layout(yaxis=dict(autorange="reversed"))
                         st.plotly_chart(fig_top, width='stretch', key=f"fig_top_{nombre}")
@@ -361,53 +869,10 @@ if modo_app == "📊 Análisis Individual":
                         st.info("Sin productos detallados para este canal.")
 
                     
-                    st.markdown("### Variantes") # Ya no "y modificadores" si quitaste esa parte
-
-                    if not df_prod_canal.empty:
-                        # 1. El selector de producto queda arriba (ancho completo)
-                        productos_disponibles = sorted(df_prod_canal["Producto_Base"].unique())
-                        prod_sel = st.selectbox("Producto", productos_disponibles, key=f"prod_{nombre}")
-                        
-                        # 2. Procesamiento de datos
-                        df_sel = df_prod_canal[df_prod_canal["Producto_Base"] == prod_sel]
-                        total_prod = df_sel["Cantidad"].sum()
-                        variantes = df_sel.groupby("Variante")["Cantidad"].sum().reset_index()
-                        variantes["Porcentaje"] = variantes["Cantidad"] / total_prod * 100 if total_prod else 0
-
-                        if not variantes.empty:
-                            # 3. AQUÍ CREAMOS LAS COLUMNAS: Gráfico (Izquierda) | Tabla (Derecha)
-                            # El array [2, 1] le da más espacio al gráfico (2/3) y menos a la tabla (1/3)
-                            col_grafico, col_tabla = st.columns([2, 1]) 
-
-                            with col_grafico:
-                                fig_var = px.pie(variantes, values="Cantidad", names="Variante", 
-                                                title=f"Distribución de {prod_sel}", hole=0.45)
-                                # Opcional: poner la leyenda abajo si molesta a los lados
-                                # fig_var.update_layout(legend=dict(orientation="h", y=-0.1))
-                                st.plotly_chart(fig_var, use_container_width=True, key=f"fig_var_{nombre}")
-
-                            with col_tabla:
-                                # Agregué un margen superior o un título pequeño para que no se vea desalineado
-                                st.write(f"**Total: {total_prod}**") 
-                                st.dataframe(
-                                    variantes[["Variante", "Cantidad", "Porcentaje"]], 
-                                    hide_index=True, 
-                                    use_container_width=True,
-                                    height=300 # Opcional: fuerza una altura similar al gráfico si hay pocas filas
-                                )
-                        else:
-                            st.info("Sin variantes registradas para este producto.")
-
-                    else:
-                        st.info("Sin detalle de productos para analizar variantes.")
+                    seccion_variantes(cubo.productos_de(nombre), nombre)
 
                     st.markdown("### Productos comprados juntos")
                     if not df_prod_canal.empty:
-                        pedidos = df_prod_canal.groupby("Id_Venta")["Producto_Base"].apply(lambda s: tuple(sorted(set([p for p in s.dropna()]))))
-                        pedidos = pedidos[pedidos.apply(len) > 1]
-                        combos = pedidos.value_counts().head(5).reset_index()
-                        combos.columns = ["Pedido", "Veces"]
-                        combos["Pedido"] = combos["Pedido"].apply(lambda t: " + ".join(t))
                         if not combos.empty:
                             st.write("Top 5 pedidos completos:")
                             st.dataframe(combos, hide_index=True, use_container_width=True)
@@ -416,7 +881,6 @@ if modo_app == "📊 Análisis Individual":
                     else:
                         st.info("Sin detalle de productos para analizar combos.")
 
-                    reglas = AnalistaDeDatos(df_canal, "VENTAS").basket_analysis(top_n=20, min_support=2)
                     if reglas is not None and not reglas.empty and "item_a" in reglas.columns:
                         reglas["Pareja"] = reglas.apply(lambda r: f"{str(r['item_a']).title()} + {str(r['item_b']).title()}", axis=1)
                         st.write("Top 20 parejas de productos más solicitados")
@@ -427,8 +891,12 @@ if modo_app == "📊 Análisis Individual":
                     st.markdown("### Frecuencia de pedidos")
                     c_h, c_d = st.columns(2)
 
-                    if "Hora_Num" in df_canal.columns:
-                        horas = df_canal.groupby("Hora_Num")["Id"].nunique().reset_index().rename(columns={"Id": "Pedidos"})
+                    # Pedidos, monto y ticket por hora y por día de la semana salen del cubo de ventas
+                    por_hora = cubo.por_hora(nombre, incluir_alquiler)
+                    por_dia = cubo.por_dia_semana(nombre, incluir_alquiler)
+
+                    if not por_hora.empty:
+                        horas = por_hora[["Hora_Num", "Pedidos"]]
                         # AGREGADO: color="Pedidos", color_continuous_scale y text_auto
                         fig_h = px.bar(horas, x="Hora_Num", y="Pedidos", 
                                     title="Cantidad de pedidos por hora",
@@ -438,9 +906,8 @@ if modo_app == "📊 Análisis Individual":
                     else:
                         c_h.info("No hay información horaria disponible.")
 
-                    if "Dia_Semana" in df_canal.columns:
-                        orden_dias = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        dias = df_canal.groupby("Dia_Semana")["Id"].nunique().reindex(orden_dias).dropna().reset_index().rename(columns={"Id": "Pedidos"})
+                    if not por_dia.empty:
+                        dias = por_dia[["Dia_Semana", "Pedidos"]]
                         
                         fig_d = px.bar(dias, x="Dia_Semana", y="Pedidos", 
                                     title="Cantidad de pedidos por día",
@@ -453,8 +920,8 @@ if modo_app == "📊 Análisis Individual":
                     st.markdown("### Venta total (monto) por hora y día")
                     c_vh, c_vd = st.columns(2)
 
-                    if "Hora_Num" in df_canal.columns:
-                        ventas_hora = df_canal.groupby("Hora_Num")["Monto total"].sum().reset_index().rename(columns={"Monto total": "Venta_Total"})
+                    if not por_hora.empty:
+                        ventas_hora = por_hora.rename(columns={"Monto_Total": "Venta_Total"})
                         # CAMBIO: text_auto='.2f' para 2 decimales y escala de color
                         fig_vh = px.bar(ventas_hora, x="Hora_Num", y="Venta_Total", 
                                         title="Venta total por hora (Bs)",
@@ -464,8 +931,8 @@ if modo_app == "📊 Análisis Individual":
                     else:
                         c_vh.info("No hay información horaria disponible.")
 
-                    if "Dia_Semana" in df_canal.columns:
-                        ventas_dia = df_canal.groupby("Dia_Semana")["Monto total"].sum().reindex(orden_dias).dropna().reset_index().rename(columns={"Monto total": "Venta_Total"})
+                    if not por_dia.empty:
+                        ventas_dia = por_dia.rename(columns={"Monto_Total": "Venta_Total"})
                         
                         fig_vd = px.bar(ventas_dia, x="Dia_Semana", y="Venta_Total", 
                                         title="Venta total por día (Bs)",
@@ -478,13 +945,8 @@ if modo_app == "📊 Análisis Individual":
                     st.markdown("### Ticket promedio por hora y día")
                     c_th, c_td = st.columns(2)
 
-                    if "Hora_Num" in df_canal.columns:
-                        ticket_hora = df_canal.groupby("Hora_Num").agg(
-                            Monto_Total=("Monto total", "sum"),
-                            Pedidos=("Id", "nunique")
-                        ).reset_index()
-                        # CAMBIO: Redondeo .round(2) aquí
-                        ticket_hora["Ticket_Promedio"] = (ticket_hora["Monto_Total"] / ticket_hora["Pedidos"]).round(2)
+                    if not por_hora.empty:
+                        ticket_hora = por_hora.assign(Ticket_Promedio=por_hora["Ticket_Promedio"].round(2))
                         
                         fig_th = px.bar(ticket_hora, x="Hora_Num", y="Ticket_Promedio", 
                                         title="Ticket promedio por hora (Bs)",
@@ -494,13 +956,8 @@ if modo_app == "📊 Análisis Individual":
                     else:
                         c_th.info("No hay información horaria disponible.")
 
-                    if "Dia_Semana" in df_canal.columns:
-                        ticket_dia = df_canal.groupby("Dia_Semana").agg(
-                            Monto_Total=("Monto total", "sum"),
-                            Pedidos=("Id", "nunique")
-                        ).reindex(orden_dias).dropna().reset_index()
-                        # CAMBIO: Redondeo .round(2) aquí
-                        ticket_dia["Ticket_Promedio"] = (ticket_dia["Monto_Total"] / ticket_dia["Pedidos"]).round(2)
+                    if not por_dia.empty:
+                        ticket_dia = por_dia.assign(Ticket_Promedio=por_dia["Ticket_Promedio"].round(2))
                         
                         fig_td = px.bar(ticket_dia, x="Dia_Semana", y="Ticket_Promedio", 
                                         title="Ticket promedio por día (Bs)",
@@ -510,150 +967,13 @@ if modo_app == "📊 Análisis Individual":
                     else:
                         c_td.info("No hay información de día disponible.")
                     # Análisis detallado por día de la semana
-                    st.markdown("### Análisis por día de la semana")
-                    if "Dia_Semana" in df_canal.columns and "Hora_Num" in df_canal.columns:
-                        # Mapeo de nombres en inglés a español para mejor UX
-                        dias_map = {
-                            'Monday': 'Lunes',
-                            'Tuesday': 'Martes',
-                            'Wednesday': 'Miércoles',
-                            'Thursday': 'Jueves',
-                            'Friday': 'Viernes',
-                            'Saturday': 'Sábado',
-                            'Sunday': 'Domingo'
-                        }
-                        dias_disponibles = [d for d in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'] 
-                                           if d in df_canal["Dia_Semana"].values]
-                        
-                        if dias_disponibles:
-                            dia_seleccionado = st.selectbox(
-                                "Selecciona un día:", 
-                                dias_disponibles,
-                                format_func=lambda x: dias_map.get(x, x),
-                                key=f"dia_sel_{nombre}"
-                            )
-                            
-                            # Filtrar datos del día seleccionado
-                            df_dia = df_canal[df_canal["Dia_Semana"] == dia_seleccionado].copy()
-                            
-                            if not df_dia.empty:
-                                # Calcular totales de la semana para porcentaje
-                                pedidos_semana = df_canal["Id"].nunique()
-                                monto_semana = df_canal["Monto total"].sum()
-                                
-                                # KPIs del día
-                                pedidos_dia = df_dia["Id"].nunique()
-                                monto_dia = df_dia["Monto total"].sum()
-                                ticket_prom_dia = monto_dia / pedidos_dia if pedidos_dia > 0 else 0
-                                
-                                # Porcentajes respecto a la semana
-                                porc_pedidos = (pedidos_dia / pedidos_semana * 100) if pedidos_semana > 0 else 0
-                                porc_monto = (monto_dia / monto_semana * 100) if monto_semana > 0 else 0
-                                
-                                k_d1, k_d2, k_d3 = st.columns(3)
-                                k_d1.metric(
-                                    f"Pedidos ({dias_map.get(dia_seleccionado, dia_seleccionado)})", 
-                                    pedidos_dia,
-                                    f"{porc_pedidos:.1f}% de la semana"
-                                )
-                                k_d2.metric("Ticket Promedio", f"Bs {ticket_prom_dia:,.0f}")
-                                k_d3.metric(
-                                    "Monto Total", 
-                                    f"Bs {monto_dia:,.0f}",
-                                    f"{porc_monto:.1f}% de la semana"
-                                )
-                                
-                                # Análisis por hora del día seleccionado
-                                st.markdown(f"#### Pedidos por hora - {dias_map.get(dia_seleccionado, dia_seleccionado)}")
-                                horas_dia = df_dia.groupby("Hora_Num").agg({
-                                    "Id": "nunique",
-                                    "Monto total": "sum"
-                                }).reset_index()
-                                horas_dia.columns = ["Hora", "Pedidos", "Monto"]
-                                horas_dia["Ticket_Promedio"] = horas_dia["Monto"] / horas_dia["Pedidos"]
-                                horas_dia = horas_dia.sort_values("Hora")
-                                
-                                # Gráfico de pedidos por hora
-                                fig_hora_dia = px.bar(
-                                    horas_dia, 
-                                    x="Hora", 
-                                    y="Pedidos",
-                                    title=f"Distribución horaria - {dias_map.get(dia_seleccionado, dia_seleccionado)}",
-                                    text_auto=True,
-                                    color="Pedidos",
-                                    color_continuous_scale="Blues"
-                                )
-                                st.plotly_chart(fig_hora_dia, use_container_width=True, key=f"hora_dia_{nombre}")
-                                
-                                # Análisis por turno
-                                st.markdown("#### Análisis por Turno")
-                                df_dia["Turno"] = df_dia["Hora_Num"].apply(lambda h: "Mañana (00:00-14:00)" if h < 14 else "Tarde (14:00-00:00)")
-                                
-                                turnos = df_dia.groupby("Turno").agg({
-                                    "Id": "nunique",
-                                    "Monto total": "sum"
-                                }).reset_index()
-                                turnos.columns = ["Turno", "Pedidos", "Monto"]
-                                turnos["Ticket_Promedio"] = turnos["Monto"] / turnos["Pedidos"]
-                                
-                                # Calcular porcentajes respecto al total del día
-                                turnos["Porc_Pedidos"] = (turnos["Pedidos"] / pedidos_dia * 100) if pedidos_dia > 0 else 0
-                                turnos["Porc_Monto"] = (turnos["Monto"] / monto_dia * 100) if monto_dia > 0 else 0
-                                
-                                # Asegurar orden: Mañana primero
-                                turnos = turnos.sort_values("Turno", ascending=True)
-                                
-                                # Mostrar métricas por turno
-                                col_turnos = st.columns(len(turnos))
-                                for idx, (_, turno_row) in enumerate(turnos.iterrows()):
-                                    with col_turnos[idx]:
-                                        st.markdown(f"**{turno_row['Turno']}**")
-                                        st.metric(
-                                            "Pedidos", 
-                                            f"{int(turno_row['Pedidos'])}",
-                                            f"{turno_row['Porc_Pedidos']:.1f}% del día"
-                                        )
-                                        st.metric("Ticket Promedio", f"Bs {turno_row['Ticket_Promedio']:,.0f}")
-                                        st.metric(
-                                            "Monto Total", 
-                                            f"Bs {turno_row['Monto']:,.0f}",
-                                            f"{turno_row['Porc_Monto']:.1f}% del día"
-                                        )
-                                
-                                # Tabla detallada de turnos
-                                with st.expander("Ver tabla detallada por turno"):
-                                    st.dataframe(
-                                        turnos[["Turno", "Pedidos", "Porc_Pedidos", "Monto", "Porc_Monto", "Ticket_Promedio"]].style.format({
-                                            "Pedidos": "{:,.0f}",
-                                            "Porc_Pedidos": "{:.1f}%",
-                                            "Monto": "Bs {:,.2f}",
-                                            "Porc_Monto": "{:.1f}%",
-                                            "Ticket_Promedio": "Bs {:,.2f}"
-                                        }),
-                                        hide_index=True,
-                                        use_container_width=True
-                                    )
-                            else:
-                                st.info(f"No hay datos para {dias_map.get(dia_seleccionado, dia_seleccionado)}.")
-                        else:
-                            st.info("No hay datos de días de la semana disponibles.")
-                    else:
-                        st.info("No hay información suficiente para análisis por día.")
+                    seccion_dia_semana(cubo, nombre, nombre, incluir_alquiler)
 
                     # Análisis mensual por canal
                     st.markdown(f"### Resumen de ventas por mes - {nombre}")
                     if "Fecha_DT" in df_canal.columns:
-                        df_mes_canal = df_canal.copy()
-                        df_mes_canal["Mes"] = df_mes_canal["Fecha_DT"].dt.to_period("M").astype(str)
-                        
-                        ventas_mes_canal = df_mes_canal.groupby("Mes").agg({
-                            "Id": "nunique",
-                            "Monto total": "sum"
-                        }).reset_index()
-                        ventas_mes_canal.columns = ["Mes", "Transacciones", "Monto_Total"]
-                        ventas_mes_canal["Ticket_Promedio"] = ventas_mes_canal["Monto_Total"] / ventas_mes_canal["Transacciones"]
-                        ventas_mes_canal = ventas_mes_canal.sort_values("Mes")
-                        
+                        ventas_mes_canal = cubo.por_mes(nombre, incluir_alquiler)
+
                         if not ventas_mes_canal.empty:
                             col_m1, col_m2 = st.columns(2)
                             
@@ -718,22 +1038,22 @@ if modo_app == "📊 Análisis Individual":
                 ])
 
                 with pestanas[0]:
-                    render_tab_canal("Mesa", CANAL_ALIASES["Mesa"])
+                    render_tab_canal("Mesa")
 
                 with pestanas[1]:
-                    render_tab_canal("Recojo", CANAL_ALIASES["Recojo"])    
+                    render_tab_canal("Recojo")
 
                 with pestanas[2]:
-                    render_tab_canal("Interno", CANAL_ALIASES["Interno"], permitir_internos=True)
+                    render_tab_canal("Interno")
 
                 with pestanas[3]:
-                    render_tab_canal("PedidosYa", CANAL_ALIASES["PedidosYa"])
+                    render_tab_canal("PedidosYa")
 
                 with pestanas[4]:
-                    render_tab_canal("Yango", CANAL_ALIASES["Yango"], incluir_alquiler=True)
+                    render_tab_canal("Yango", incluir_alquiler=True)
 
                 with pestanas[5]:
-                    analisis_pagos = analista.analisis_pagos_avanzado()
+                    analisis_pagos = analisis_memorizado(analista, huella, "analisis_pagos_avanzado")
 
                     if analisis_pagos:
                         c_p1, c_p2 = st.columns(2)
@@ -769,7 +1089,7 @@ if modo_app == "📊 Análisis Individual":
                         st.info("No se encontraron datos de métodos de pago.")
 
                 with pestanas[6]:
-                    meseros_df = analista.performance_meseros()
+                    meseros_df = analisis_memorizado(analista, huella, "performance_meseros")
                     if meseros_df is not None and not meseros_df.empty:
                         mesero_norm = (
                             meseros_df["Mesero"]
@@ -871,80 +1191,38 @@ if modo_app == "📊 Análisis Individual":
                     st.markdown("### 📊 Análisis Total (Todas las órdenes válidas)")
                     st.info("Este análisis incluye: Mesa, Recojo, Delivery (PedidosYa, Yango), Interno. Excluye: Alquileres y órdenes anuladas.")
                     
-                    # Filtrar todas las órdenes válidas excluyendo alquileres
-                    df_total = analista._excluir_alquiler(analista.df.copy())
-                    if "Es_Valido" in df_total.columns:
-                        df_total = df_total[df_total["Es_Valido"] == True]
-                    
-                    # Obtener productos totales
-                    df_productos_total = df_productos.copy() if df_productos is not None and not df_productos.empty else pd.DataFrame()
-                    
+                    # Órdenes válidas sin alquileres, productos y parejas: precalculados en resumen_canal
                     if not df_total.empty:
-                        kpi_total = AnalistaDeDatos(df_total, "VENTAS").get_kpis_financieros()
-
+                        kpi_total = kpis
                         k1, k2, k3, k4, k5 = st.columns(5)
                         k1.metric("Ventas Totales", f"Bs {kpi_total.get('Ventas Totales',0):,.0f}", "100% del total")
                         k2.metric("Ticket Promedio", f"Bs {kpi_total.get('Ticket Promedio',0):,.0f}")
                         k3.metric("Transacciones", kpi_total.get('Transacciones',0))
                         k4.metric("Descuentos", f"Bs {kpi_total.get('Total Descuentos',0):,.0f}")
-                        k5.metric("Pendientes", f"Bs {kpi_total.get('Ventas Pendientes',0):,.0f}")
+                        k5.metric("Pendientes", f"Bs {kpi_total.get('Ventas Pendientes',0):,.0f}", help=AYUDA_PENDIENTES)
 
                         st.markdown("### Top 15 productos más vendidos (Todos los canales)")
                         if not df_productos_total.empty:
-                            top_base = df_productos_total.groupby("Producto_Base")["Cantidad"].sum().nlargest(15).reset_index()
+                            top_base = cubo.productos.groupby("Producto_Base")["Cantidad"].sum().nlargest(15).reset_index()
                             fig_top = px.bar(top_base, x="Cantidad", y="Producto_Base", orientation="h", text_auto=True, color="Cantidad")
                             fig_top.update_layout(yaxis=dict(autorange="reversed"))
                             st.plotly_chart(fig_top, use_container_width=True, key="fig_top_total")
                         else:
                             st.info("Sin productos detallados.")
 
-                        st.markdown("### Variantes")
-                        if not df_productos_total.empty:
-                            productos_disponibles = sorted(df_productos_total["Producto_Base"].unique())
-                            prod_sel = st.selectbox("Producto", productos_disponibles, key="prod_total")
-                            
-                            df_sel = df_productos_total[df_productos_total["Producto_Base"] == prod_sel]
-                            total_prod = df_sel["Cantidad"].sum()
-                            variantes = df_sel.groupby("Variante")["Cantidad"].sum().reset_index()
-                            variantes["Porcentaje"] = variantes["Cantidad"] / total_prod * 100 if total_prod else 0
-
-                            if not variantes.empty:
-                                col_grafico, col_tabla = st.columns([2, 1]) 
-
-                                with col_grafico:
-                                    fig_var = px.pie(variantes, values="Cantidad", names="Variante", 
-                                                    title=f"Distribución de {prod_sel}", hole=0.45)
-                                    st.plotly_chart(fig_var, use_container_width=True, key="fig_var_total")
-
-                                with col_tabla:
-                                    st.write(f"**Total: {total_prod}**") 
-                                    st.dataframe(
-                                        variantes[["Variante", "Cantidad", "Porcentaje"]], 
-                                        hide_index=True, 
-                                        use_container_width=True,
-                                        height=300
-                                    )
-                            else:
-                                st.info("Sin variantes registradas para este producto.")
-                        else:
-                            st.info("Sin detalle de productos para analizar variantes.")
+                        seccion_variantes(cubo.productos, "total")
 
                         st.markdown("### Productos comprados juntos")
                         if not df_productos_total.empty:
-                            pedidos = df_productos_total.groupby("Id_Venta")["Producto_Base"].apply(lambda s: tuple(sorted(set([p for p in s.dropna()]))))
-                            pedidos = pedidos[pedidos.apply(len) > 1]
-                            combos = pedidos.value_counts().head(5).reset_index()
-                            combos.columns = ["Pedido", "Veces"]
-                            combos["Pedido"] = combos["Pedido"].apply(lambda t: " + ".join(t))
-                            if not combos.empty:
+                            if not combos_total.empty:
                                 st.write("Top 5 pedidos completos:")
-                                st.dataframe(combos, hide_index=True, use_container_width=True)
+                                st.dataframe(combos_total, hide_index=True, use_container_width=True)
                             else:
                                 st.info("No hay pedidos con múltiples productos.")
                         else:
                             st.info("Sin detalle de productos para analizar combos.")
 
-                        reglas = AnalistaDeDatos(df_total, "VENTAS").basket_analysis(top_n=20, min_support=2)
+                        reglas = reglas_total
                         if reglas is not None:
                             reglas["Pareja"] = reglas.apply(lambda r: f"{str(r['item_a']).title()} + {str(r['item_b']).title()}", axis=1)
                             st.write("Top 20 parejas de productos más solicitados")
@@ -956,8 +1234,12 @@ if modo_app == "📊 Análisis Individual":
                         st.markdown("### Frecuencia de pedidos")
                         c_h, c_d = st.columns(2)
 
-                        if "Hora_Num" in df_total.columns:
-                            horas = df_total.groupby("Hora_Num")["Id"].nunique().reset_index().rename(columns={"Id": "Pedidos"})
+                        # Pedidos, monto y ticket por hora y por día de la semana salen del cubo de ventas
+                        por_hora = cubo.por_hora()
+                        por_dia = cubo.por_dia_semana()
+
+                        if not por_hora.empty:
+                            horas = por_hora[["Hora_Num", "Pedidos"]]
                             # AGREGADO: color="Pedidos" y color_continuous_scale
                             fig_h = px.bar(horas, x="Hora_Num", y="Pedidos", 
                                         title="Cantidad de pedidos por hora",
@@ -967,9 +1249,8 @@ if modo_app == "📊 Análisis Individual":
                         else:
                             c_h.info("No hay información horaria disponible.")
 
-                        if "Dia_Semana" in df_total.columns:
-                            orden_dias = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                            dias = df_total.groupby("Dia_Semana")["Id"].nunique().reindex(orden_dias).dropna().reset_index().rename(columns={"Id": "Pedidos"})
+                        if not por_dia.empty:
+                            dias = por_dia[["Dia_Semana", "Pedidos"]]
                             # AGREGADO: color="Pedidos"
                             fig_d = px.bar(dias, x="Dia_Semana", y="Pedidos", 
                                         title="Cantidad de pedidos por día",
@@ -981,8 +1262,8 @@ if modo_app == "📊 Análisis Individual":
                         st.markdown("### Venta total (monto) por hora y día")
                         c_vh, c_vd = st.columns(2)
 
-                        if "Hora_Num" in df_total.columns:
-                            ventas_hora = df_total.groupby("Hora_Num")["Monto total"].sum().reset_index().rename(columns={"Monto total": "Venta_Total"})
+                        if not por_hora.empty:
+                            ventas_hora = por_hora.rename(columns={"Monto_Total": "Venta_Total"})
                             # CAMBIO: text_auto='.2f' para mostrar 2 decimales y color para degradado
                             fig_vh = px.bar(ventas_hora, x="Hora_Num", y="Venta_Total", 
                                             title="Venta total por hora (Bs)",
@@ -990,8 +1271,8 @@ if modo_app == "📊 Análisis Individual":
                                             text_auto='.2f') 
                             c_vh.plotly_chart(fig_vh, use_container_width=True, key="venta_hora_total")
 
-                        if "Dia_Semana" in df_total.columns:
-                            ventas_dia = df_total.groupby("Dia_Semana")["Monto total"].sum().reindex(orden_dias).dropna().reset_index().rename(columns={"Monto total": "Venta_Total"})
+                        if not por_dia.empty:
+                            ventas_dia = por_dia.rename(columns={"Monto_Total": "Venta_Total"})
                             fig_vd = px.bar(ventas_dia, x="Dia_Semana", y="Venta_Total", 
                                             title="Venta total por día (Bs)",
                                             color="Venta_Total", color_continuous_scale="Viridis",
@@ -1002,13 +1283,8 @@ if modo_app == "📊 Análisis Individual":
                         st.markdown("### Ticket promedio por hora y día")
                         c_th, c_td = st.columns(2)
 
-                        if "Hora_Num" in df_total.columns:
-                            ticket_hora = df_total.groupby("Hora_Num").agg(
-                                Monto_Total=("Monto total", "sum"),
-                                Pedidos=("Id", "nunique")
-                            ).reset_index()
-                            # CAMBIO: Se agrega .round(2) al final de la operación
-                            ticket_hora["Ticket_Promedio"] = (ticket_hora["Monto_Total"] / ticket_hora["Pedidos"]).round(2)
+                        if not por_hora.empty:
+                            ticket_hora = por_hora.assign(Ticket_Promedio=por_hora["Ticket_Promedio"].round(2))
                             
                             fig_th = px.bar(ticket_hora, x="Hora_Num", y="Ticket_Promedio", 
                                             title="Ticket promedio por hora (Bs)",
@@ -1016,13 +1292,8 @@ if modo_app == "📊 Análisis Individual":
                                             text_auto='.2f')
                             c_th.plotly_chart(fig_th, use_container_width=True, key="ticket_hora_total")
 
-                        if "Dia_Semana" in df_total.columns:
-                            ticket_dia = df_total.groupby("Dia_Semana").agg(
-                                Monto_Total=("Monto total", "sum"),
-                                Pedidos=("Id", "nunique")
-                            ).reindex(orden_dias).dropna().reset_index()
-                            # CAMBIO: Se agrega .round(2)
-                            ticket_dia["Ticket_Promedio"] = (ticket_dia["Monto_Total"] / ticket_dia["Pedidos"]).round(2)
+                        if not por_dia.empty:
+                            ticket_dia = por_dia.assign(Ticket_Promedio=por_dia["Ticket_Promedio"].round(2))
                             
                             fig_td = px.bar(ticket_dia, x="Dia_Semana", y="Ticket_Promedio", 
                                             title="Ticket promedio por día (Bs)",
@@ -1031,142 +1302,14 @@ if modo_app == "📊 Análisis Individual":
                             c_td.plotly_chart(fig_td, use_container_width=True, key="ticket_dia_total")
 
                         # Análisis detallado por día de la semana
-                        st.markdown("### Análisis por día de la semana")
-                        if "Dia_Semana" in df_total.columns and "Hora_Num" in df_total.columns:
-                            dias_map = {
-                                'Monday': 'Lunes',
-                                'Tuesday': 'Martes',
-                                'Wednesday': 'Miércoles',
-                                'Thursday': 'Jueves',
-                                'Friday': 'Viernes',
-                                'Saturday': 'Sábado',
-                                'Sunday': 'Domingo'
-                            }
-                            dias_disponibles = [d for d in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'] 
-                                               if d in df_total["Dia_Semana"].values]
-                            
-                            if dias_disponibles:
-                                dia_seleccionado = st.selectbox(
-                                    "Selecciona un día:", 
-                                    dias_disponibles,
-                                    format_func=lambda x: dias_map.get(x, x),
-                                    key="dia_sel_total"
-                                )
-                                
-                                df_dia = df_total[df_total["Dia_Semana"] == dia_seleccionado].copy()
-                                
-                                if not df_dia.empty:
-                                    # Calcular totales de la semana para porcentaje
-                                    pedidos_semana = df_total["Id"].nunique()
-                                    monto_semana = df_total["Monto total"].sum()
-                                    
-                                    pedidos_dia = df_dia["Id"].nunique()
-                                    monto_dia = df_dia["Monto total"].sum()
-                                    ticket_prom_dia = monto_dia / pedidos_dia if pedidos_dia > 0 else 0
-                                    
-                                    # Porcentajes respecto a la semana
-                                    porc_pedidos = (pedidos_dia / pedidos_semana * 100) if pedidos_semana > 0 else 0
-                                    porc_monto = (monto_dia / monto_semana * 100) if monto_semana > 0 else 0
-                                    
-                                    k_d1, k_d2, k_d3 = st.columns(3)
-                                    k_d1.metric(
-                                        f"Pedidos ({dias_map.get(dia_seleccionado, dia_seleccionado)})", 
-                                        pedidos_dia,
-                                        f"{porc_pedidos:.1f}% de la semana"
-                                    )
-                                    k_d2.metric("Ticket Promedio", f"Bs {ticket_prom_dia:,.0f}")
-                                    k_d3.metric(
-                                        "Monto Total", 
-                                        f"Bs {monto_dia:,.0f}",
-                                        f"{porc_monto:.1f}% de la semana"
-                                    )
-                                    
-                                    st.markdown(f"#### Pedidos por hora - {dias_map.get(dia_seleccionado, dia_seleccionado)}")
-                                    horas_dia = df_dia.groupby("Hora_Num").agg({
-                                        "Id": "nunique",
-                                        "Monto total": "sum"
-                                    }).reset_index()
-                                    horas_dia.columns = ["Hora", "Pedidos", "Monto"]
-                                    horas_dia["Ticket_Promedio"] = horas_dia["Monto"] / horas_dia["Pedidos"]
-                                    horas_dia = horas_dia.sort_values("Hora")
-                                    
-                                    fig_hora_dia = px.bar(
-                                        horas_dia, 
-                                        x="Hora", 
-                                        y="Pedidos",
-                                        title=f"Distribución horaria - {dias_map.get(dia_seleccionado, dia_seleccionado)}",
-                                        text_auto=True,
-                                        color="Pedidos",
-                                        color_continuous_scale="Blues"
-                                    )
-                                    st.plotly_chart(fig_hora_dia, use_container_width=True, key="hora_dia_total")
-                                    
-                                    st.markdown("#### Análisis por Turno")
-                                    df_dia["Turno"] = df_dia["Hora_Num"].apply(lambda h: "Mañana (00:00-14:00)" if h < 14 else "Tarde (14:00-00:00)")
-                                    
-                                    turnos = df_dia.groupby("Turno").agg({
-                                        "Id": "nunique",
-                                        "Monto total": "sum"
-                                    }).reset_index()
-                                    turnos.columns = ["Turno", "Pedidos", "Monto"]
-                                    turnos["Ticket_Promedio"] = turnos["Monto"] / turnos["Pedidos"]
-                                    
-                                    # Calcular porcentajes respecto al total del día
-                                    turnos["Porc_Pedidos"] = (turnos["Pedidos"] / pedidos_dia * 100) if pedidos_dia > 0 else 0
-                                    turnos["Porc_Monto"] = (turnos["Monto"] / monto_dia * 100) if monto_dia > 0 else 0
-                                    
-                                    turnos = turnos.sort_values("Turno", ascending=True)
-                                    
-                                    col_turnos = st.columns(len(turnos))
-                                    for idx, (_, turno_row) in enumerate(turnos.iterrows()):
-                                        with col_turnos[idx]:
-                                            st.markdown(f"**{turno_row['Turno']}**")
-                                            st.metric(
-                                                "Pedidos", 
-                                                f"{int(turno_row['Pedidos'])}",
-                                                f"{turno_row['Porc_Pedidos']:.1f}% del día"
-                                            )
-                                            st.metric("Ticket Promedio", f"Bs {turno_row['Ticket_Promedio']:,.0f}")
-                                            st.metric(
-                                                "Monto Total", 
-                                                f"Bs {turno_row['Monto']:,.0f}",
-                                                f"{turno_row['Porc_Monto']:.1f}% del día"
-                                            )
-                                    
-                                    with st.expander("Ver tabla detallada por turno"):
-                                        st.dataframe(
-                                            turnos[["Turno", "Pedidos", "Porc_Pedidos", "Monto", "Porc_Monto", "Ticket_Promedio"]].style.format({
-                                                "Pedidos": "{:,.0f}",
-                                                "Porc_Pedidos": "{:.1f}%",
-                                                "Monto": "Bs {:,.2f}",
-                                                "Porc_Monto": "{:.1f}%",
-                                                "Ticket_Promedio": "Bs {:,.2f}"
-                                            }),
-                                            hide_index=True,
-                                            use_container_width=True
-                                        )
-                                else:
-                                    st.info(f"No hay datos para {dias_map.get(dia_seleccionado, dia_seleccionado)}.")
-                            else:
-                                st.info("No hay datos de días de la semana disponibles.")
-                        else:
-                            st.info("No hay información suficiente para análisis por día.")
+                        seccion_dia_semana(cubo, None, "total")
 
                         # Análisis mensual GLOBAL (solo en Total)
                         st.markdown("### Resumen de ventas por mes (Global)")
                         if "Fecha_DT" in df_total.columns:
-                            df_mes = df_total.copy()
-                            df_mes["Mes"] = df_mes["Fecha_DT"].dt.to_period("M").astype(str)
-                            
-                            # Agregar análisis completo: transacciones, monto y ticket promedio
-                            ventas_mes = df_mes.groupby("Mes").agg({
-                                "Id": "nunique",
-                                "Monto total": "sum"
-                            }).reset_index()
-                            ventas_mes.columns = ["Mes", "Transacciones", "Monto_Total"]
-                            ventas_mes["Ticket_Promedio"] = ventas_mes["Monto_Total"] / ventas_mes["Transacciones"]
-                            ventas_mes = ventas_mes.sort_values("Mes")
-                            
+                            # Transacciones, monto y ticket promedio por mes desde el cubo
+                            ventas_mes = cubo.por_mes()
+
                             if not ventas_mes.empty:
                                 col_m1, col_m2 = st.columns(2)
                                 
@@ -1229,12 +1372,12 @@ if modo_app == "📊 Análisis Individual":
                 st.info("Reporte Operativo Detectado. Usando AnalistaOperacional en modo individual.")
                 
                 # Usamos la clase Operacional aunque sea solo un archivo
-                ops = AnalistaOperacional(df_ventas=None, df_indice=df_raw)
+                ops = obtener_operacional(None, df_raw, None, huella)
                 
                 c1, c2 = st.columns(2)
                 with c1:
                     st.subheader("⏱️ Velocidad (Creado -> Pagado)")
-                    kpis_vel, df_vel = ops.kpis_velocidad()
+                    kpis_vel, df_vel = analisis_memorizado(ops, huella, "kpis_velocidad")
                     if kpis_vel:
                         st.metric("Tiempo Promedio", f"{kpis_vel['Tiempo Promedio Global']:.1f} min")
                         st.metric("Ticket Más Lento", f"{kpis_vel['Ticket Más Lento']:.1f} min")
@@ -1243,7 +1386,7 @@ if modo_app == "📊 Análisis Individual":
                 
                 with c2:
                     st.subheader("🪑 Ocupación de Mesas")
-                    hm = ops.heatmap_mesas()
+                    hm = analisis_memorizado(ops, huella, "heatmap_mesas")
                     if hm is not None:
                         fig = renderizar_mapa_mesas(hm)
                         if fig:
@@ -1275,17 +1418,19 @@ elif modo_app == "🔗 Análisis Maestro (Fusión)":
     file_i = c2.selectbox("Archivo ÍNDICE:", f_i, key="m_i")
     
     if st.button("🚀 Fusionar"):
-        df_v = cargar_df(file_v)
-        df_i = cargar_df(file_i)
+        huella_v, huella_i = huella_reporte(file_v), huella_reporte(file_i)
+        df_v = cargar_df(file_v, huella_v)
+        df_i = cargar_df(file_i, huella_i)
         
         if df_v is not None and df_i is not None:
-            ops = AnalistaOperacional(df_v, df_i)
+            ops = obtener_operacional(df_v, df_i, huella_v, huella_i)
+            huella_fusion = (huella_v, huella_i)
             st.success(f"Fusión exitosa: {len(ops.df_maestro)} registros combinados.")
             
             tab_v, tab_m = st.tabs(["⏱️ Velocidad por Canal", "🪑 Rentabilidad Mesas"])
             
             with tab_v:
-                kpis, df_vel = ops.kpis_velocidad()
+                kpis, df_vel = analisis_memorizado(ops, huella_fusion, "kpis_velocidad")
                 if kpis:
                     m1, m2, m3 = st.columns(3)
                     m1.metric("Global", f"{kpis['Tiempo Promedio Global']:.1f} min")
@@ -1294,7 +1439,7 @@ elif modo_app == "🔗 Análisis Maestro (Fusión)":
                     st.plotly_chart(px.box(df_vel, x="Tipo_Orden", y="Minutos_Servicio", points="all"), width='stretch', key="box_vel_maestro")
             
             with tab_m: # Tab Mesas en Fusión
-                hm = ops.heatmap_mesas()
+                hm = analisis_memorizado(ops, huella_fusion, "heatmap_mesas")
                 if hm is not None:
                     c_map1, c_map2 = st.columns([2, 1])
                     
@@ -1329,4 +1474,9 @@ elif modo_app == "🤖 Robot Descargas":
     
     with st.expander("Ver historial de archivos"):
         df_files = pd.DataFrame({"Archivos en sistema": archivos})
-        st.dataframe(df_files, use_container_width=True)
\ No newline at end of file
+        st.dataframe(df_files, use_container_width=True)
+
+# ==============================================================================
+#                           PANEL DE RENDIMIENTO
+# ==============================================================================
+mostrar_rendimiento(panel_rendimiento, captura_rendimiento, time.perf_counter() - inicio_rerun)
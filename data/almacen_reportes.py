@@ -0,0 +1,289 @@
+# data/almacen_reportes.py
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from data.cache_reportes import PARQUET_DISPONIBLE, CacheColumnar
+from data.cargador_reportes import COLUMNA_FECHA, clave_orden, combinar_reportes
+from data.esquemas_reportes import detectar_esquema, leer_reporte
+
+CARPETA_ALMACEN_DEFAULT = os.path.join("data", "almacen")
+
+# Solo los reportes con clave de orden y fecha se pueden particionar y actualizar
+ESQUEMAS_ALMACEN = tuple(COLUMNA_FECHA)
+
+
+def dias_de_orden(df, esquema):
+    """Día de cada orden (Timestamp a medianoche) según la columna de fecha del esquema."""
+    texto = df[COLUMNA_FECHA[esquema]].astype(str).str.slice(0, 10)
+    return pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+
+
+def _firma_filas(df):
+    """Hash por fila del contenido, como texto y con un único nulo para no depender de los dtypes."""
+    return pd.util.hash_pandas_object(df.astype(str).mask(df.isna(), ""), index=False).to_numpy()
+
+
+def _hash_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def _secuencia(ruta):
+    return int(ruta.stem.split("-")[1])
+
+
+class AlmacenReportes:
+    """
+    Historial de órdenes en Parquet, particionado por tipo de reporte, año y mes:
+
+        data/almacen/Ventas/anio=2025/mes=03/parte-<secuencia>.parquet
+
+    Cada descarga se agrega como una parte nueva con solo las órdenes nuevas o
+    modificadas (upsert por Id en Ventas; por Número y día en el Índice). Al leer,
+    ante una orden repetida gana la parte más reciente. Cuando un mes acumula más de
+    MAX_PARTES partes se compacta en un único archivo; `compactar` hace lo mismo
+    para todo el almacén.
+    """
+    NOMBRE_INGESTAS = "ingestas.json"
+    NOMBRE_MARCAS = "marcas.json"  # último día completo sincronizado por reporte y sucursal
+    MAX_PARTES = 8
+
+    def __init__(self, carpeta=CARPETA_ALMACEN_DEFAULT):
+        if not PARQUET_DISPONIBLE:
+            raise RuntimeError("El almacén de reportes requiere pyarrow.")
+        self.carpeta = Path(carpeta)
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        self._ruta_ingestas = self.carpeta / self.NOMBRE_INGESTAS
+        self._ruta_marcas = self.carpeta / self.NOMBRE_MARCAS
+        self._lock = threading.RLock()
+
+    # --- Particiones ---
+    def _carpeta_particion(self, esquema, anio, mes):
+        return self.carpeta / esquema / f"anio={anio}" / f"mes={mes:02d}"
+
+    @staticmethod
+    def _partes(carpeta):
+        """Partes de una partición, de la más vieja a la más nueva."""
+        return sorted(Path(carpeta).glob("parte-*.parquet"), key=_secuencia)
+
+    def particiones(self, esquema, desde=None, hasta=None):
+        """[(anio, mes, partes)] del esquema; con `desde`/`hasta` solo los meses que tocan el rango."""
+        base = self.carpeta / esquema
+        if not base.exists():
+            return []
+        desde = pd.Timestamp(desde).to_period("M") if desde is not None else None
+        hasta = pd.Timestamp(hasta).to_period("M") if hasta is not None else None
+        resultado = []
+        for dir_anio in sorted(base.glob("anio=*")):
+            for dir_mes in sorted(dir_anio.glob("mes=*")):
+                anio, mes = int(dir_anio.name[5:]), int(dir_mes.name[4:])
+                periodo = pd.Period(year=anio, month=mes, freq="M")
+                if (desde is not None and periodo < desde) or (hasta is not None and periodo > hasta):
+                    continue
+                partes = self._partes(dir_mes)
+                if partes:
+                    resultado.append((anio, mes, partes))
+        return resultado
+
+    def _leer_partes(self, partes, esquema):
+        frames = [CacheColumnar._restaurar_nulos(pd.read_parquet(p)) for p in partes]
+        return combinar_reportes(frames, esquema)
+
+    def _escribir_parte(self, df, carpeta):
+        """Escribe `df` como la parte más nueva de la partición (tmp + rename)."""
+        carpeta.mkdir(parents=True, exist_ok=True)
+        partes = self._partes(carpeta)
+        secuencia = max(time.time_ns(), _secuencia(partes[-1]) + 1 if partes else 0)
+        destino = carpeta / f"parte-{secuencia}.parquet"
+        tmp = destino.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, destino)
+        return destino
+
+    def _compactar_particion(self, carpeta, esquema):
+        partes = self._partes(carpeta)
+        if len(partes) < 2:
+            return False
+        self._escribir_parte(self._leer_partes(partes, esquema), carpeta)
+        # Si el proceso se corta acá, la parte compactada ya es la más nueva y las lecturas siguen siendo correctas
+        for parte in partes:
+            parte.unlink()
+        return True
+
+    # --- API ---
+    def upsert(self, df, esquema=None):
+        """
+        Agrega las órdenes de `df` a sus particiones. Solo se escriben las nuevas o las que
+        cambiaron respecto a lo guardado. Devuelve un resumen con los conteos.
+        """
+        esquema = esquema or detectar_esquema(df.columns)
+        if esquema not in ESQUEMAS_ALMACEN:
+            raise ValueError(f"El almacén solo guarda {list(ESQUEMAS_ALMACEN)}; recibido: {esquema}")
+        df = df.loc[:, ~df.columns.astype(str).str.startswith("Unnamed")]
+        df = combinar_reportes([df], esquema)  # sin fila de totales ni órdenes repetidas
+        resumen = {"esquema": esquema, "nuevas": 0, "actualizadas": 0, "sin_cambios": 0, "particiones": []}
+        if df.empty:  # rango sin órdenes (p. ej. días sin ventas en una sincronización)
+            return resumen
+        dias = dias_de_orden(df, esquema)
+        df, dias = df[dias.notna()], dias[dias.notna()]
+
+        with self._lock:
+            for (anio, mes), grupo in df.groupby([dias.dt.year, dias.dt.month], sort=True):
+                carpeta = self._carpeta_particion(esquema, anio, mes)
+                partes = self._partes(carpeta)
+                grupo = grupo.reset_index(drop=True)
+                claves = clave_orden(grupo, esquema)
+                nuevas = pd.Series(True, index=grupo.index)
+                cambiadas = pd.Series(False, index=grupo.index)
+                if partes:
+                    actual = self._leer_partes(partes, esquema).reindex(columns=grupo.columns)
+                    firmas = pd.Series(_firma_filas(actual), index=clave_orden(actual, esquema).to_numpy())
+                    nuevas = ~claves.isin(firmas.index)
+                    existentes = ~nuevas
+                    cambiadas[existentes] = _firma_filas(grupo[existentes]) != firmas.loc[claves[existentes]].to_numpy()
+
+                n_nuevas, n_cambiadas = int(nuevas.sum()), int(cambiadas.sum())
+                resumen["nuevas"] += n_nuevas
+                resumen["actualizadas"] += n_cambiadas
+                resumen["sin_cambios"] += len(grupo) - n_nuevas - n_cambiadas
+                if n_nuevas or n_cambiadas:
+                    self._escribir_parte(grupo[nuevas | cambiadas], carpeta)
+                    resumen["particiones"].append(f"{anio}-{mes:02d}")
+                    if len(partes) + 1 > self.MAX_PARTES:
+                        self._compactar_particion(carpeta, esquema)
+        return resumen
+
+    def ingerir(self, ruta, lector=leer_reporte):
+        """
+        Upsert de un export descargado. Un archivo con el mismo contenido que uno ya
+        ingerido (re-descarga, copia 'Nombre (1).csv') se reconoce por su sha256 y no se relee.
+        """
+        contenido = _hash_archivo(ruta)
+        with self._lock:
+            ingestas = self._leer_ingestas()
+            if contenido in ingestas:
+                print(f"ℹ️ {os.path.basename(ruta)} ya estaba en el almacén ({ingestas[contenido]['archivo']}).")
+                return {**ingestas[contenido]["resumen"], "repetido": True}
+            resumen = self.upsert(lector(ruta))
+            ingestas[contenido] = {
+                "archivo": os.path.basename(ruta),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "resumen": resumen,
+            }
+            tmp = self._ruta_ingestas.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(ingestas, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self._ruta_ingestas)
+        print(f"📦 {os.path.basename(ruta)}: {resumen['nuevas']} nuevas, {resumen['actualizadas']} actualizadas, "
+              f"{resumen['sin_cambios']} sin cambios.")
+        return {**resumen, "repetido": False}
+
+    def _leer_ingestas(self):
+        return self._leer_json(self._ruta_ingestas)
+
+    @staticmethod
+    def _leer_json(ruta):
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    # --- Marcas de sincronización ---
+    def marca(self, reporte, sucursal):
+        """Último día completo ya ingerido de `reporte` en `sucursal` (Timestamp) o None si nunca se sincronizó."""
+        valor = self._leer_json(self._ruta_marcas).get(f"{reporte}|{sucursal}")
+        return pd.Timestamp(valor) if valor else None
+
+    def fijar_marca(self, reporte, sucursal, dia):
+        """Registra `dia` como último día completo; nunca retrocede una marca ya guardada."""
+        dia = pd.Timestamp(dia).normalize()
+        with self._lock:
+            marcas = self._leer_json(self._ruta_marcas)
+            clave = f"{reporte}|{sucursal}"
+            if clave in marcas and pd.Timestamp(marcas[clave]) >= dia:
+                return
+            marcas[clave] = f"{dia:%Y-%m-%d}"
+            tmp = self._ruta_marcas.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(marcas, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self._ruta_marcas)
+
+    def ultimo_dia(self, esquema):
+        """Día más reciente guardado de `esquema` (lee solo la última partición) o None."""
+        particiones = self.particiones(esquema)
+        if not particiones:
+            return None
+        anio, mes, _ = particiones[-1]
+        dias = dias_de_orden(self.leer(esquema, pd.Timestamp(anio, mes, 1), None), esquema)
+        return dias.max() if dias.notna().any() else None
+
+    def leer(self, esquema, desde=None, hasta=None):
+        """Órdenes de `esquema` entre `desde` y `hasta` (inclusive), leyendo solo las particiones de esos meses."""
+        partes = [p for _, _, partes_mes in self.particiones(esquema, desde, hasta) for p in partes_mes]
+        if not partes:
+            return pd.DataFrame()
+        df = self._leer_partes(partes, esquema)
+        if desde is None and hasta is None:
+            return df
+        dias = dias_de_orden(df, esquema)
+        desde = pd.Timestamp(desde) if desde is not None else dias.min()
+        hasta = pd.Timestamp(hasta) if hasta is not None else dias.max()
+        return df[dias.between(desde, hasta)].reset_index(drop=True)
+
+    def huella(self, esquema, desde=None, hasta=None):
+        """Nombres de las partes que lee `leer(...)`: cambia con cada upsert o compactación."""
+        return tuple(p.name for _, _, partes in self.particiones(esquema, desde, hasta) for p in partes)
+
+    def compactar(self, esquema=None, min_partes=2):
+        """Une en un archivo las particiones con `min_partes` partes o más. Devuelve cuántas se compactaron."""
+        compactadas = 0
+        with self._lock:
+            for nombre in [esquema] if esquema else ESQUEMAS_ALMACEN:
+                for anio, mes, partes in self.particiones(nombre):
+                    if len(partes) >= min_partes:
+                        compactadas += self._compactar_particion(self._carpeta_particion(nombre, anio, mes), nombre)
+        return compactadas
+
+    def resumen(self):
+        """Una fila por partición: esquema, año, mes, partes y filas guardadas (antes de quitar repetidas)."""
+        import pyarrow.parquet as pq
+
+        filas = []
+        for esquema in ESQUEMAS_ALMACEN:
+            for anio, mes, partes in self.particiones(esquema):
+                filas.append({
+                    "Esquema": esquema, "Año": anio, "Mes": mes, "Partes": len(partes),
+                    "Filas": sum(pq.ParquetFile(p).metadata.num_rows for p in partes),
+                })
+        return pd.DataFrame(filas, columns=["Esquema", "Año", "Mes", "Partes", "Filas"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingiere exports de Mercat en el almacén particionado.")
+    parser.add_argument("archivos", nargs="*", help="CSV/XLSX de Ventas o Índice a ingerir")
+    parser.add_argument("--carpeta", default=CARPETA_ALMACEN_DEFAULT)
+    parser.add_argument("--compactar", action="store_true", help="compacta todas las particiones al terminar")
+    args = parser.parse_args()
+
+    almacen = AlmacenReportes(args.carpeta)
+    for archivo in args.archivos:
+        try:
+            almacen.ingerir(archivo)
+        except ValueError as e:
+            print(f"⚠️ {os.path.basename(archivo)}: {e}")
+    if args.compactar:
+        print(f"🗜️ Particiones compactadas: {almacen.compactar()}")
+    print(almacen.resumen().to_string(index=False))
@@ -0,0 +1,138 @@
+# data/cache_reportes.py
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (motor de pd.read_parquet / to_parquet)
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+
+CARPETA_CACHE_DEFAULT = os.path.join("data", "cache")
+
+
+class CacheColumnar:
+    """
+    Caché en disco (Parquet) para los reportes CSV/XLSX de Mercat.
+
+    La primera vez que se ve un archivo se parsea con el lector original y se
+    guarda en formato columnar. Las lecturas siguientes usan el Parquet mientras
+    el archivo fuente no cambie.
+
+    Clave de la caché:
+    - ruta, tamaño y mtime: camino rápido, no requiere leer el archivo fuente.
+    - hash del contenido (sha256): si cambió el mtime pero no el contenido
+      (copias, re-descargas idénticas) se reutiliza el mismo Parquet.
+    """
+    VERSION = 3  # v2: frames tipados (data/esquemas_reportes.py); v3: Cliente y Número factura como texto
+    NOMBRE_INDICE = "indice.json"
+    BLOQUE_HASH = 1 << 20
+
+    def __init__(self, carpeta_cache=CARPETA_CACHE_DEFAULT):
+        self.carpeta = Path(carpeta_cache)
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        self._ruta_indice = self.carpeta / self.NOMBRE_INDICE
+        self._lock = threading.Lock()
+
+    # --- Huella del archivo fuente ---
+    def hash_contenido(self, ruta):
+        """sha256 del archivo leído por bloques."""
+        h = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(self.BLOQUE_HASH), b""):
+                h.update(bloque)
+        return h.hexdigest()
+
+    def huella(self, ruta):
+        """
+        Devuelve (ruta, tamaño, mtime_ns, hash). El hash se toma del índice si
+        tamaño y mtime coinciden; solo se recalcula cuando el archivo cambió.
+        """
+        ruta = str(Path(ruta).resolve())
+        st = os.stat(ruta)
+        entrada = self._leer_indice().get(ruta)
+        if entrada and entrada["tamano"] == st.st_size and entrada["mtime_ns"] == st.st_mtime_ns:
+            contenido = entrada["hash"]
+        else:
+            contenido = self.hash_contenido(ruta)
+        return ruta, st.st_size, st.st_mtime_ns, contenido
+
+    # --- Índice (ruta -> huella) ---
+    def _leer_indice(self):
+        try:
+            with open(self._ruta_indice, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _guardar_entrada(self, ruta, tamano, mtime_ns, contenido):
+        entrada = {"tamano": tamano, "mtime_ns": mtime_ns, "hash": contenido}
+        with self._lock:
+            indice = self._leer_indice()
+            if indice.get(ruta) == entrada:
+                return
+            indice[ruta] = entrada
+            tmp = self._ruta_indice.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(indice, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self._ruta_indice)
+
+    def _ruta_parquet(self, contenido):
+        return self.carpeta / f"{contenido}.v{self.VERSION}.parquet"
+
+    # --- API ---
+    def cargar(self, ruta, lector):
+        """
+        Devuelve el DataFrame de `ruta`. `lector(ruta)` solo se invoca si no hay
+        una copia columnar válida para el contenido actual del archivo.
+        """
+        if not PARQUET_DISPONIBLE:
+            return lector(ruta)
+
+        ruta, tamano, mtime_ns, contenido = self.huella(ruta)
+        destino = self._ruta_parquet(contenido)
+
+        if destino.exists():
+            try:
+                df = pd.read_parquet(destino)
+                self._guardar_entrada(ruta, tamano, mtime_ns, contenido)
+                return self._restaurar_nulos(df)
+            except Exception as e:
+                print(f"⚠️ Caché corrupta para {os.path.basename(ruta)}, se regenera: {e}")
+
+        df = lector(ruta)
+        try:
+            tmp = destino.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, destino)
+            self._guardar_entrada(ruta, tamano, mtime_ns, contenido)
+        except Exception as e:
+            # Columnas con tipos mezclados (p.ej. Excel) no siempre se pueden serializar
+            print(f"⚠️ No se pudo cachear {os.path.basename(ruta)}: {e}")
+        return df
+
+    def limpiar(self):
+        """Borra los Parquet, el índice y los temporales de escritura; nada más de la carpeta."""
+        propios = [*self.carpeta.glob("*.parquet"), *self.carpeta.glob("*.tmp"), self._ruta_indice]
+        for archivo in (a for a in propios if a.exists()):
+            try:
+                archivo.unlink()
+            except OSError as e:
+                print(f"   ! No se pudo borrar {archivo}: {e}")
+
+    @staticmethod
+    def _restaurar_nulos(df):
+        """Parquet devuelve None en columnas de texto; read_csv devuelve NaN."""
+        cols_obj = df.columns[df.dtypes == object]
+        if len(cols_obj):
+            # where (no fillna): fillna sobre object intenta bajar el dtype y pandas lo depreca
+            df[cols_obj] = df[cols_obj].where(df[cols_obj].notna(), np.nan)
+        return df
@@ -0,0 +1,134 @@
+# data/cargador_reportes.py
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data.esquemas_reportes import aplicar_esquema, detectar_esquema, leer_reporte
+
+MAX_HILOS_DEFAULT = 8
+
+MESES_ARCHIVO = {
+    "ENERO": 1, "FEBRERO": 2, "MARZO": 3, "ABRIL": 4, "MAYO": 5, "JUNIO": 6, "JULIO": 7,
+    "AGOSTO": 8, "SEPTIEMBRE": 9, "SETIEMBRE": 9, "OCTUBRE": 10, "NOVIEMBRE": 11, "DICIEMBRE": 12,
+}
+# Periodos de varios meses que aparecen en los nombres: (mes inicial, cantidad de meses)
+PERIODOS_ARCHIVO = {
+    "ANUAL": (1, 12),
+    "2DOSEMESTRE": (7, 6), "SEGUNDO_SEMESTRE": (7, 6), "1ERSEMESTRE": (1, 6), "PRIMER_SEMESTRE": (1, 6),
+    "ULT_TRIMESTRE": (10, 3),
+}
+
+# Columna de fecha ('dd/mm/aaaa...') por esquema, para filtrar por rango y armar claves
+COLUMNA_FECHA = {"Ventas": "Fecha", "Indice_Mercat": "Creado el"}
+
+
+def periodo_de_archivo(nombre):
+    """
+    (inicio, fin) que cubre un export según su nombre ('VENTAS_ENERO_2025.csv',
+    'Índice_Mercat_ANUAL_2025.csv', 'Reporte de ventas  Mercat ENERO 2026.csv'), o None.
+    """
+    texto = os.path.basename(nombre).upper().replace(" ", "_")
+    anio = re.search(r"(20\d{2})", texto)
+    if not anio:
+        return None
+    anio = int(anio.group(1))
+    for clave, (mes, meses) in PERIODOS_ARCHIVO.items():
+        if clave in texto:
+            break
+    else:
+        mes = next((n for m, n in MESES_ARCHIVO.items() if re.search(rf"(^|_){m}(_|$)", texto)), None)
+        if mes is None:
+            return None
+        meses = 1
+    inicio = pd.Timestamp(anio, mes, 1)
+    return inicio, inicio + pd.DateOffset(months=meses) - pd.Timedelta(days=1)
+
+
+def clave_orden(df, esquema):
+    """
+    Serie que identifica cada orden: 'Id' en el Reporte de Ventas; (Número, día) en el
+    Índice, o la marca 'Creado el' completa si la orden no tiene Número (anuladas).
+    """
+    if esquema == "Ventas":
+        return df["Id"]
+    creado = df["Creado el"].astype(str)
+    numero = df["Número"].astype("Int64").astype(str)
+    return numero.where(df["Número"].notna(), "sin_numero") + "|" + creado.where(
+        df["Número"].isna(), creado.str.slice(0, 10))
+
+
+def combinar_reportes(frames, esquema=None):
+    """
+    Concatena exports del mismo tipo y elimina órdenes repetidas. `frames` va del
+    archivo más viejo al más nuevo: ante un duplicado se conserva la fila más nueva.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    esquema = esquema or detectar_esquema(frames[0].columns)
+    # Categorías distintas por archivo: concat las deja en object y el esquema las restaura.
+    # Las columnas vacías de un archivo no entran al concat (pandas cambiará cómo influyen
+    # en el dtype del resultado); el reindex conserva las columnas y su orden, y las que no
+    # traen datos en ningún archivo recuperan el dtype que tenían.
+    columnas = list(dict.fromkeys(c for f in frames for c in f.columns))
+    df = pd.concat([f.dropna(axis=1, how="all") for f in frames], ignore_index=True).reindex(columns=columnas)
+    for col in df.columns[df.isna().all()]:
+        tipos = {f[col].dtype for f in frames if col in f.columns}
+        df[col] = df[col].astype(tipos.pop() if len(tipos) == 1 else object)
+    if esquema in COLUMNA_FECHA:
+        clave = clave_orden(df, esquema)
+        df = df[clave.notna() & df[COLUMNA_FECHA[esquema]].notna()]  # fuera la fila de totales
+        df = df[~clave[df.index].duplicated(keep="last")]
+        if esquema == "Ventas":
+            df = df.sort_values("Id", kind="stable")
+    return aplicar_esquema(df.reset_index(drop=True), esquema)
+
+
+def cargar_conjunto(rutas, lector=leer_reporte, max_hilos=MAX_HILOS_DEFAULT):
+    """
+    Lee varios exports en paralelo (hilos: el parseo de pyarrow libera el GIL) y devuelve
+    un solo DataFrame sin órdenes repetidas. La descarga más reciente (mtime) gana.
+    Todos los archivos deben ser del mismo tipo de reporte.
+    """
+    rutas = sorted({str(r) for r in rutas}, key=lambda r: (os.path.getmtime(r), r))
+    if not rutas:
+        return pd.DataFrame()
+
+    with ThreadPoolExecutor(max_workers=min(max_hilos, len(rutas))) as pool:
+        frames = list(pool.map(lector, rutas))  # map conserva el orden de `rutas`
+
+    esquemas = {detectar_esquema(df.columns) for df in frames}
+    if len(esquemas) > 1:
+        raise ValueError(f"Los archivos mezclan tipos de reporte: {sorted(map(str, esquemas))}")
+    return combinar_reportes(frames, esquemas.pop())
+
+
+def archivos_en_rango(carpeta, desde, hasta, esquema="Ventas"):
+    """
+    Exports de `carpeta` del tipo `esquema` que pueden tener órdenes entre `desde` y `hasta`.
+    Los archivos cuyo nombre no indica periodo se incluyen siempre.
+    """
+    desde, hasta = pd.Timestamp(desde), pd.Timestamp(hasta)
+    rutas = []
+    for nombre in sorted(os.listdir(carpeta)):
+        if not nombre.endswith(".csv"):
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        if detectar_esquema(pd.read_csv(ruta, nrows=0).columns) != esquema:
+            continue
+        periodo = periodo_de_archivo(nombre)
+        if periodo is None or (periodo[0] <= hasta and periodo[1] >= desde):
+            rutas.append(ruta)
+    return rutas
+
+
+def cargar_rango(carpeta, desde, hasta, esquema="Ventas", lector=leer_reporte, max_hilos=MAX_HILOS_DEFAULT):
+    """Órdenes entre `desde` y `hasta` (inclusive) combinando los exports de la carpeta."""
+    df = cargar_conjunto(archivos_en_rango(carpeta, desde, hasta, esquema), lector, max_hilos)
+    if df.empty:
+        return df
+    dias = pd.to_datetime(df[COLUMNA_FECHA[esquema]].astype(str).str.slice(0, 10), format="%d/%m/%Y", errors="coerce")
+    return df[dias.between(pd.Timestamp(desde), pd.Timestamp(hasta))].reset_index(drop=True)
@@ -0,0 +1,270 @@
+# data/cliente_http_mercat.py
+
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from data.robotMercat import RobotMercat, VALORES_VERDADEROS, escribir_json_privado, formatear_datetime
+
+
+class _LectorHTML(HTMLParser):
+    """Formularios (action, method y valores por defecto), token CSRF y tablas de una página."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.formularios = []
+        self.csrf = None
+        self.tablas = []
+        self._select = None
+        self._fila = None
+        self._celda = None
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        nombre = a.get("name")
+        campos = self.formularios[-1]["campos"] if self.formularios else None
+        if tag == "meta" and nombre == "csrf-token":
+            self.csrf = a.get("content")
+        elif tag == "form":
+            self.formularios.append({"action": a.get("action") or "", "method": (a.get("method") or "get").lower(), "campos": {}})
+        elif tag == "input" and campos is not None and nombre:
+            tipo = (a.get("type") or "text").lower()
+            if tipo in ("submit", "button", "image", "file") or (tipo in ("checkbox", "radio") and "checked" not in a):
+                return
+            campos[nombre] = a.get("value") or ("1" if tipo == "checkbox" else "")
+        elif tag == "select" and campos is not None and nombre:
+            self._select = nombre
+            campos.setdefault(nombre, None)
+        elif tag == "option" and self._select:
+            # Primera opción o la marcada como 'selected'
+            if campos.get(self._select) is None or "selected" in a:
+                campos[self._select] = a.get("value") or ""
+        elif tag == "tr" and self.tablas:
+            self._fila = []
+        elif tag in ("td", "th") and self._fila is not None:
+            self._celda = []
+        elif tag == "table":
+            self.tablas.append([])
+
+    def handle_data(self, data):
+        if self._celda is not None:
+            self._celda.append(data)
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self._celda is not None:
+            self._fila.append(" ".join("".join(self._celda).split()))
+            self._celda = None
+        elif tag == "tr" and self._fila is not None:
+            if self._fila:
+                self.tablas[-1].append(self._fila)
+            self._fila = None
+        elif tag == "select":
+            self._select = None
+
+
+class ClienteMercatHTTP:
+    """
+    Descarga los reportes de data/config_reportes.py con una sesión HTTP (requests), sin
+    Chrome. Lee el formulario del reporte (action, método, token CSRF y valores por
+    defecto), completa los `campos` de la config con los mismos formatos que el robot y
+    guarda la respuesta en disco en bloques. Si el ERP responde con la tabla en HTML
+    (la que DataTables exporta a CSV en el navegador) se convierte a CSV.
+
+    Tiene la misma interfaz que RobotMercat para OrquestadorDescargas (login,
+    iniciar_sesion, descargar_reporte, renombrar_ultimo_archivo, guardar_en_almacen,
+    cerrar). `url_base` (o MERCAT_URL) apunta a otro servidor, p. ej. el de
+    data/servidor_mercat_falso.py en los tests.
+    """
+    TIMEOUT = (10, 120)  # conexión, lectura (segundos)
+    BLOQUE = 1 << 16
+
+    def __init__(self, download_folder, almacen=None, ruta_cookies=None, url_base=None):
+        self.almacen = almacen
+        self.ruta_cookies = ruta_cookies
+        self.url_base = (url_base or os.environ.get("MERCAT_URL") or RobotMercat.URL_BASE).rstrip("/")
+        self.download_folder = str(Path(download_folder).resolve())
+        Path(self.download_folder).mkdir(parents=True, exist_ok=True)
+        self.sesion = requests.Session()
+        self.sesion.headers["User-Agent"] = "Mozilla/5.0 (reportes C&C)"
+        self._credenciales = None
+        self.ultimo_archivo = None
+        self.telemetria = []
+
+    # Mismo comportamiento que el robot: sesión desde cookies, mover sin pisar, almacén y tiempos por fase
+    iniciar_sesion = RobotMercat.iniciar_sesion
+    _fase = RobotMercat._fase
+    tomar_telemetria = RobotMercat.tomar_telemetria
+    renombrar_ultimo_archivo = RobotMercat.renombrar_ultimo_archivo
+    guardar_en_almacen = RobotMercat.guardar_en_almacen
+    limpiar_carpeta_descargas = RobotMercat.limpiar_carpeta_descargas
+
+    def _url(self, url):
+        """Las URLs de la config son de mercat.bo: se conserva la ruta sobre `url_base`."""
+        partes = urlparse(url)
+        return self.url_base + partes.path + (f"?{partes.query}" if partes.query else "")
+
+    def _pagina(self, url):
+        respuesta = self.sesion.get(self._url(url), timeout=self.TIMEOUT)
+        respuesta.raise_for_status()
+        lector = _LectorHTML()
+        lector.feed(respuesta.text)
+        return respuesta, lector
+
+    @staticmethod
+    def _es_login(respuesta):
+        return "/users/sign_in" in respuesta.url
+
+    def login(self, usuario, password):
+        """Login con el formulario de Devise (user[login], user[password] y authenticity_token)."""
+        self._credenciales = (usuario, password)
+        with self._fase("login") as fase:
+            try:
+                respuesta, pagina = self._pagina(RobotMercat.URL_LOGIN)
+                formulario = next((f for f in pagina.formularios if "user[password]" in f["campos"]),
+                                  {"action": "", "method": "post", "campos": {}})
+                datos = {**formulario["campos"], "user[login]": usuario, "user[password]": password, "commit": "Ingresar"}
+                respuesta = self.sesion.post(urljoin(respuesta.url, formulario["action"]), data=datos, timeout=self.TIMEOUT)
+                respuesta.raise_for_status()
+                if self._es_login(respuesta):
+                    print("❌ Error en Login: el ERP rechazó las credenciales.")
+                    fase["ok"] = False
+                    return False
+                self.guardar_cookies()
+                return True
+            except Exception as e:
+                print(f"❌ Error en Login: {e}")
+                fase["ok"] = False
+                return False
+
+    def guardar_cookies(self):
+        if not self.ruta_cookies:
+            return
+        try:
+            escribir_json_privado(self.ruta_cookies, requests.utils.dict_from_cookiejar(self.sesion.cookies))
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar las cookies: {e}")
+
+    def restaurar_sesion(self):
+        if not self.ruta_cookies or not os.path.exists(self.ruta_cookies):
+            return False
+        try:
+            with open(self.ruta_cookies, "r", encoding="utf-8") as f:
+                cookies = json.load(f)
+            if isinstance(cookies, list):  # formato del robot (Selenium)
+                cookies = {c["name"]: c["value"] for c in cookies}
+            self.sesion.cookies.update(cookies)
+            respuesta = self.sesion.get(self._url(RobotMercat.URL_PANEL), timeout=self.TIMEOUT)
+            return respuesta.ok and not self._es_login(respuesta)
+        except Exception as e:
+            print(f"⚠️ No se pudo restaurar la sesión: {e}")
+            return False
+
+    # --- Reportes ---
+    @staticmethod
+    def _formulario_reporte(pagina, config):
+        """El formulario de la página que contiene más campos de la config."""
+        nombres = {info.get("valor") for info in config.get("campos", {}).values()}
+        formularios = sorted(pagina.formularios, key=lambda f: len(nombres & set(f["campos"])), reverse=True)
+        return formularios[0] if formularios else {"action": "", "method": "get", "campos": {}}
+
+    @staticmethod
+    def _datos_formulario(config, parametros, formulario):
+        """Valores a enviar: los del formulario y encima los `campos` de la config, como los llena el robot."""
+        datos = {k: v for k, v in formulario["campos"].items() if v is not None}
+        for clave_config, info in config.get("campos", {}).items():
+            nombre, tipo = info.get("valor", ""), info.get("tipo", "text")
+            if info.get("by", "").lower() != "name" or not nombre:
+                print(f"⚠️ Campo sin 'name' no soportado por HTTP: {info}")
+                continue
+            valor = info.get("valor_fijo", parametros.get(clave_config, ""))
+            if tipo == "checkbox":
+                if str(valor).lower() in VALORES_VERDADEROS:
+                    datos[nombre] = "1"
+                else:
+                    datos.pop(nombre, None)
+            elif tipo == "select":
+                if str(valor) != "":  # sin valor queda la opción por defecto del formulario
+                    datos[nombre] = str(valor)
+            else:
+                datos[nombre] = formatear_datetime(valor, nombre, tipo if tipo in ("date", "datetime") else "text")
+        return datos
+
+    @staticmethod
+    def _nombre_respuesta(respuesta, config):
+        disposicion = respuesta.headers.get("Content-Disposition", "")
+        encontrado = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposicion)
+        if encontrado:
+            return os.path.basename(encontrado.group(1))
+        return re.sub(r"\W+", "_", config.get("nombre", "reporte")).strip("_") + ".csv"
+
+    def _guardar_respuesta(self, respuesta, config, carpeta):
+        nombre = self._nombre_respuesta(respuesta, config)
+        if "html" in respuesta.headers.get("Content-Type", ""):
+            lector = _LectorHTML()
+            lector.feed(respuesta.text)
+            if not lector.tablas or not max(lector.tablas, key=len):
+                raise ValueError("La respuesta no trae la tabla del reporte.")
+            nombre = os.path.splitext(nombre)[0] + ".csv"
+            parcial = os.path.join(carpeta, nombre + ".part")
+            with open(parcial, "w", encoding="utf-8", newline="") as f:
+                csv.writer(f, lineterminator="\n").writerows(max(lector.tablas, key=len))
+        else:
+            parcial = os.path.join(carpeta, nombre + ".part")
+            with open(parcial, "wb") as f:
+                for bloque in respuesta.iter_content(chunk_size=self.BLOQUE):
+                    f.write(bloque)
+        destino = os.path.join(carpeta, nombre)
+        os.replace(parcial, destino)
+        return destino
+
+    def descargar_reporte(self, config_reporte, parametros):
+        """
+        Descarga un reporte de data/config_reportes.py por HTTP. Devuelve la ruta del
+        archivo (también en `ultimo_archivo`), en su carpeta de trabajo .descarga-*, o False.
+        """
+        self.ultimo_archivo = None
+        carpeta_trabajo = tempfile.mkdtemp(prefix=".descarga-", dir=self.download_folder)
+        try:
+            with self._fase("pagina"):
+                respuesta, pagina = self._pagina(config_reporte["url"])
+            if self._es_login(respuesta) and self._credenciales:
+                print("🔑 Sesión vencida, reingresando...")
+                if self.login(*self._credenciales):
+                    with self._fase("pagina", reingreso=True):
+                        respuesta, pagina = self._pagina(config_reporte["url"])
+
+            formulario = self._formulario_reporte(pagina, config_reporte)
+            datos = self._datos_formulario(config_reporte, parametros, formulario)
+            metodo = formulario["method"].upper()
+            cabeceras = {"X-CSRF-Token": pagina.csrf} if pagina.csrf else {}
+            # generar: hasta que el ERP empieza a responder; archivo: recibir y guardar el cuerpo
+            with self._fase("generar"):
+                envio = self.sesion.request(
+                    metodo, urljoin(respuesta.url, formulario["action"]),
+                    params=datos if metodo == "GET" else None, data=datos if metodo != "GET" else None,
+                    headers=cabeceras, stream=True, timeout=self.TIMEOUT,
+                )
+                if not envio.ok or self._es_login(envio):
+                    envio.close()
+                    envio.raise_for_status()
+                    raise RuntimeError("La sesión venció durante la descarga.")
+            with envio, self._fase("archivo"):
+                self.ultimo_archivo = self._guardar_respuesta(envio, config_reporte, carpeta_trabajo)
+            return self.ultimo_archivo
+        except Exception as e:
+            print(f"❌ Error en proceso: {e}")
+            return False
+        finally:
+            if not self.ultimo_archivo:
+                shutil.rmtree(carpeta_trabajo, ignore_errors=True)
+
+    def cerrar(self):
+        self.sesion.close()
@@ -0,0 +1,102 @@
+# data/cola_descargas.py
+
+import itertools
+import queue
+import threading
+import time
+
+EN_COLA = "En cola"
+DESCARGANDO = "Descargando"
+LISTO = "Listo"
+FALLO = "Falló"
+MAX_HISTORIAL = 20  # trabajos terminados que se conservan para el panel
+
+
+class ColaDescargas:
+    """
+    Ejecuta trabajos de descarga (funciones que devuelven un manifiesto de
+    OrquestadorDescargas) en un hilo propio, en orden de llegada, para que el
+    dashboard no quede bloqueado mientras el robot trabaja. `trabajos()` devuelve una
+    copia del estado de cada uno (en cola, descargando, listo o falló, con tiempos y
+    manifiesto) para el panel de Descargas.
+
+    La función corre fuera del hilo de Streamlit: no debe llamar a `st.*`.
+    """
+
+    def __init__(self, max_historial=MAX_HISTORIAL):
+        self.max_historial = max_historial
+        self._cola = queue.Queue()
+        self._trabajos = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def encolar(self, descripcion, funcion, *args, **kwargs):
+        """Agrega un trabajo y vuelve de inmediato con su id."""
+        with self._lock:
+            numero = next(self._ids)
+            self._trabajos[numero] = {
+                "id": numero, "descripcion": descripcion, "estado": EN_COLA, "creado": time.time(),
+                "inicio": None, "fin": None, "segundos": None, "manifiesto": None, "error": None,
+            }
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._trabajar, name="cola-descargas", daemon=True)
+                self._hilo.start()
+        self._cola.put((numero, funcion, args, kwargs))
+        return numero
+
+    def _trabajar(self):
+        while True:
+            numero, funcion, args, kwargs = self._cola.get()
+            if numero is None:
+                self._cola.task_done()  # si no, `esperar` después de `cerrar` no vuelve nunca
+                return
+            self._actualizar(numero, estado=DESCARGANDO, inicio=time.time())
+            reloj = time.perf_counter()
+            try:
+                manifiesto = funcion(*args, **kwargs)
+                fallidos = [e for e in manifiesto or [] if not e.get("ok")]
+                error = "; ".join(f"{e.get('reporte')}: {e.get('error')}" for e in fallidos) or None
+                estado = FALLO if fallidos else LISTO
+            except Exception as e:
+                manifiesto, error, estado = None, str(e), FALLO
+            self._actualizar(numero, estado=estado, fin=time.time(), manifiesto=manifiesto, error=error,
+                             segundos=round(time.perf_counter() - reloj, 2))
+            self._cola.task_done()
+            self._recortar_historial()
+
+    def _actualizar(self, numero, **cambios):
+        with self._lock:
+            self._trabajos[numero].update(cambios)
+
+    def _recortar_historial(self):
+        with self._lock:
+            terminados = [n for n, t in self._trabajos.items() if t["estado"] in (LISTO, FALLO)]
+            for numero in terminados[:max(len(terminados) - self.max_historial, 0)]:
+                del self._trabajos[numero]
+
+    def trabajos(self):
+        """Copia del estado de cada trabajo, del más nuevo al más viejo."""
+        with self._lock:
+            return [dict(t) for t in reversed(self._trabajos.values())]
+
+    @property
+    def activos(self):
+        """Trabajos en cola o descargando."""
+        with self._lock:
+            return sum(t["estado"] in (EN_COLA, DESCARGANDO) for t in self._trabajos.values())
+
+    def limpiar_terminados(self):
+        with self._lock:
+            for numero in [n for n, t in self._trabajos.items() if t["estado"] in (LISTO, FALLO)]:
+                del self._trabajos[numero]
+
+    def esperar(self):
+        """Bloquea hasta que no queden trabajos pendientes (tests y scripts)."""
+        self._cola.join()
+
+    def cerrar(self):
+        """Termina el hilo después de los trabajos ya encolados."""
+        if self._hilo is not None and self._hilo.is_alive():
+            self._cola.put((None, None, None, None))
+            self._hilo.join()
@@ -0,0 +1,490 @@
+# data/descargas_paralelas.py
+
+import contextlib
+import itertools
+import os
+import queue
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from data.almacen_reportes import CARPETA_ALMACEN_DEFAULT, ESQUEMAS_ALMACEN, AlmacenReportes
+from data.cargador_reportes import COLUMNA_FECHA, combinar_reportes
+from data.config_reportes import REPORTES_CONFIG
+from data.esquemas_reportes import aplicar_esquema, detectar_esquema, leer_reporte
+from data.robotMercat import RobotMercat, mover_sin_pisar
+
+MAX_SESIONES_DEFAULT = 3
+RUTA_COOKIES_DEFAULT = os.path.join("data", "estado", "sesion_mercat.json")  # fuera de la caché de Parquet
+INACTIVIDAD_DEFAULT = 600  # segundos sin descargas antes de cerrar los navegadores
+SUCURSAL_DEFAULT = "1087"
+# Paquete de un mes: base financiera, base operativa y detalle por producto
+REPORTES_DEL_MES = ("Ventas", "Indice_Mercat", "Por_Producto")
+
+# Tramos para rangos largos: 'M' meses calendario, 'W' semanas (lunes a domingo) o días (int).
+# Por_Producto agrupa por hora y es el más lento de generar en Mercat.
+TRAMO_POR_REPORTE = {"Por_Producto": "W", "Indice_Mercat": "M", "Ventas": "M"}
+REINTENTOS_TRAMO = 2
+# El Acumulado suma desde el inicio del rango: partido en tramos daría otra cifra
+REPORTES_SIN_TRAMOS = ("Acumulado",)
+
+# Sincronización incremental: se vuelven a pedir estos días antes de la marca para
+# recoger anulaciones y ediciones tardías (el upsert del almacén solo escribe lo que cambió)
+SOLAPAMIENTO_DIAS = 3
+DIAS_PRIMERA_SINCRONIZACION = 30
+
+
+def _fecha(valor):
+    """Timestamp de un date/Timestamp o de un texto 'dd/mm/aaaa'."""
+    return pd.to_datetime(valor, format="%d/%m/%Y") if isinstance(valor, str) else pd.Timestamp(valor)
+
+
+def pedido(reporte, fecha_inicio, fecha_fin, nombre=None, sucursal=SUCURSAL_DEFAULT, **parametros):
+    """
+    Un reporte a descargar. Las fechas pueden ser date/Timestamp o texto 'dd/mm/aaaa';
+    `nombre` es el nombre final del archivo (sin extensión se conserva la descargada).
+    """
+    if reporte not in REPORTES_CONFIG:
+        raise ValueError(f"Reporte desconocido: {reporte}")
+    inicio, fin = _fecha(fecha_inicio), _fecha(fecha_fin)
+    return {
+        "reporte": reporte,
+        "nombre": nombre or f"{reporte}_{inicio:%d%m%Y}_{fin:%d%m%Y}",
+        "parametros": {
+            "fecha_inicio": f"{inicio:%d/%m/%Y}", "fecha_fin": f"{fin:%d/%m/%Y}",
+            "sucursal": sucursal, "con_factura": "", "anulado": "", **parametros,
+        },
+    }
+
+
+def pedidos_del_mes(anio, mes, reportes=REPORTES_DEL_MES, sucursal=SUCURSAL_DEFAULT):
+    """Un pedido por reporte para el mes completo (p. ej. Ventas + Índice + Por_Producto)."""
+    inicio = pd.Timestamp(anio, mes, 1)
+    fin = inicio + pd.offsets.MonthEnd(0)
+    return [pedido(r, inicio, fin, nombre=f"{r}_{inicio:%m_%Y}", sucursal=sucursal) for r in reportes]
+
+
+def dividir_rango(desde, hasta, tramo="M"):
+    """[(inicio, fin)] consecutivos que cubren `desde`..`hasta` (inclusive), cortados según `tramo`."""
+    desde, hasta = _fecha(desde).normalize(), _fecha(hasta).normalize()
+    if isinstance(tramo, int):
+        fines = pd.date_range(desde + pd.Timedelta(days=tramo - 1), hasta, freq=f"{tramo}D")
+    else:
+        fines = pd.date_range(desde, hasta, freq={"M": "ME", "W": "W-SUN"}[tramo])
+    tramos, inicio = [], desde
+    for fin in fines:
+        tramos.append((inicio, fin))
+        inicio = fin + pd.Timedelta(days=1)
+    if inicio <= hasta:
+        tramos.append((inicio, hasta))
+    return tramos
+
+
+def validar_tramo(ruta, inicio, fin):
+    """
+    Lee un tramo descargado y verifica que sea un export reconocible con todas sus
+    fechas dentro de [inicio, fin]. Devuelve (df, None) o (None, motivo).
+    """
+    try:
+        df = leer_reporte(ruta)
+    except Exception as e:
+        return None, f"no se pudo leer ({e})"
+    esquema = detectar_esquema(df.columns)
+    if esquema is None:
+        return None, "columnas desconocidas"
+    columna = COLUMNA_FECHA.get(esquema, "Fecha")
+    if columna in df.columns:
+        dias = pd.to_datetime(df[columna].astype(str).str.slice(0, 10), format="%d/%m/%Y", errors="coerce")
+        fuera = int((dias.notna() & ~dias.between(inicio, fin)).sum())
+        if fuera:
+            return None, f"{fuera} filas fuera del tramo"
+    return df, None
+
+
+def borrar_csv_ingerido(entrada):
+    """
+    Borra el CSV de una entrada del manifiesto que ya quedó en el almacén y devuelve si
+    lo borró. Una entrada con 'duplicado_de' no se toca: su 'archivo' es una descarga
+    anterior que el usuario conservó (la copia nueva, idéntica, ya la borró el registro).
+    """
+    if not entrada["ok"] or not entrada["almacen"] or entrada.get("duplicado_de"):
+        return False
+    os.remove(entrada["archivo"])
+    return True
+
+
+def unir_tramos(frames):
+    """
+    Une los tramos (del más viejo al más nuevo) en un solo reporte sin repetidos: por
+    orden en Ventas e Índice (combinar_reportes); en el resto, sin filas de totales
+    (sin fecha) ni filas idénticas.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    esquema = detectar_esquema(frames[0].columns)
+    if esquema in COLUMNA_FECHA:
+        return combinar_reportes(frames, esquema)
+    df = pd.concat(frames, ignore_index=True)
+    if "Fecha" in df.columns:
+        df = df[df["Fecha"].notna()]
+    return aplicar_esquema(df.drop_duplicates(ignore_index=True), esquema)
+
+
+class OrquestadorDescargas:
+    """
+    Pool de sesiones de RobotMercat ya autenticadas para descargar varios reportes a la vez.
+
+    Cada sesión es un Chrome con su propia carpeta (<carpeta>/.sesiones/sesion-N) y cada
+    descarga una carpeta de trabajo propia dentro de ella, así el archivo recién bajado
+    de un reporte nunca se confunde con el de otro. Las sesiones se abren a medida que hacen falta (hasta
+    `max_sesiones`), inician sesión una sola vez y se reutilizan entre pedidos; el
+    archivo terminado se mueve a `carpeta`. Un paquete mensual tarda aproximadamente lo
+    que el reporte más lento.
+
+    Con `ruta_cookies` una sesión nueva reutiliza las cookies guardadas y solo hace login
+    si vencieron. Con `inactividad` los navegadores quedan abiertos entre llamadas a
+    `descargar` y se cierran solos tras esos segundos sin uso (el dashboard mantiene un
+    orquestador vivo entre envíos del formulario).
+
+        with OrquestadorDescargas("data/reportes", usuario, password) as orq:
+            manifiesto = orq.descargar(pedidos_del_mes(2025, 11))
+    """
+
+    def __init__(self, carpeta, usuario, password, max_sesiones=MAX_SESIONES_DEFAULT,
+                 almacen=None, fabrica_robot=RobotMercat, ruta_cookies=None, inactividad=None, registro=None):
+        self.carpeta = Path(carpeta).resolve()
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        self.usuario = usuario
+        self.password = password
+        self.max_sesiones = max(1, int(max_sesiones))
+        self.almacen = almacen
+        self.fabrica_robot = fabrica_robot
+        self.ruta_cookies = ruta_cookies
+        self.inactividad = inactividad
+        self.registro = registro
+        self._en_curso = 0
+        self._ultimo_uso = time.monotonic()
+        self._temporizador = None
+        self._libres = queue.Queue()
+        self._sesiones = []
+        self._numeros = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- Sesiones ---
+    def _abrir_sesion(self, numero):
+        carpeta_sesion = self.carpeta / ".sesiones" / f"sesion-{numero}"
+        robot = self.fabrica_robot(str(carpeta_sesion), almacen=self.almacen, ruta_cookies=self.ruta_cookies)
+        if not robot.iniciar_sesion(self.usuario, self.password):
+            robot.cerrar()
+            raise RuntimeError(f"No se pudo iniciar sesión en la sesión {numero}.")
+        return robot
+
+    def _tomar_sesion(self):
+        """Sesión libre; si no hay y el pool no está lleno se abre una nueva."""
+        while True:
+            try:
+                return self._libres.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                if len(self._sesiones) < self.max_sesiones:
+                    self._sesiones.append(None)  # reserva el lugar mientras abre Chrome (fuera del lock)
+                    numero = next(self._numeros)
+                    break
+            try:
+                return self._libres.get(timeout=1)
+            except queue.Empty:
+                continue  # una sesión que no pudo abrirse libera su lugar
+        try:
+            robot = self._abrir_sesion(numero)
+        except Exception:
+            with self._lock:
+                self._sesiones.remove(None)
+            raise
+        with self._lock:
+            self._sesiones[self._sesiones.index(None)] = robot
+        return robot
+
+    # --- Descargas ---
+    def _descargar_uno(self, tarea):
+        entrada = {"reporte": tarea["reporte"], "nombre": tarea["nombre"],
+                   "desde": tarea["parametros"]["fecha_inicio"], "hasta": tarea["parametros"]["fecha_fin"],
+                   "archivo": None, "ok": False, "sesion": None, "segundos": None, "almacen": None, "error": None}
+        inicio = time.perf_counter()
+        try:
+            robot = self._tomar_sesion()
+        except Exception as e:
+            entrada["error"] = str(e)
+            return entrada
+        try:
+            entrada["sesion"] = Path(robot.download_folder).name
+            if self.registro is not None and hasattr(robot, "ajustar_esperas"):
+                dias = (_fecha(tarea["parametros"]["fecha_fin"]) - _fecha(tarea["parametros"]["fecha_inicio"])).days + 1
+                robot.ajustar_esperas(self.registro.esperas_sugeridas(tarea["reporte"], dias=dias))
+            if not robot.descargar_reporte(REPORTES_CONFIG[tarea["reporte"]], tarea["parametros"]):
+                entrada["error"] = "La descarga falló."
+                return entrada
+            # Movimiento atómico a la carpeta final; dos sesiones con el mismo nombre no se pisan
+            carpeta = Path(tarea.get("carpeta", self.carpeta))
+            carpeta.mkdir(parents=True, exist_ok=True)
+            nombre_final = robot.renombrar_ultimo_archivo(tarea["nombre"], carpeta_destino=carpeta)
+            if not nombre_final:
+                entrada["error"] = "No se encontró el archivo descargado."
+                return entrada
+            destino = carpeta / nombre_final
+            if tarea.get("ingerir", True):
+                entrada["almacen"] = robot.guardar_en_almacen(str(destino))
+            entrada.update(archivo=str(destino), ok=True)
+        except Exception as e:
+            entrada["error"] = str(e)
+        finally:
+            entrada["segundos"] = round(time.perf_counter() - inicio, 2)
+            # Tiempos por fase; la primera descarga de una sesión trae también el arranque y el login
+            entrada["fases"] = robot.tomar_telemetria() if hasattr(robot, "tomar_telemetria") else []
+            self._libres.put(robot)
+            if self.registro is not None:
+                try:
+                    # Los tramos (carpeta propia) son temporales: se registran pero no se deduplican
+                    self.registro.registrar(entrada, tarea["parametros"], deduplicar="carpeta" not in tarea)
+                except Exception as e:
+                    print(f"⚠️ No se pudo registrar la descarga: {e}")
+        return entrada
+
+    def _reutilizable(self, tarea):
+        """Entrada de manifiesto para un pedido con una descarga vigente en el registro, o None."""
+        if self.registro is None or "carpeta" in tarea:
+            return None
+        previa = self.registro.vigente(tarea["reporte"], tarea["parametros"])
+        if previa is None:
+            return None
+        minutos = round((time.time() - previa["instante"]) / 60)
+        print(f"⏭️ {tarea['reporte']} {previa['desde']}-{previa['hasta']}: descargado hace {minutos} min, se reutiliza.")
+        return {"reporte": tarea["reporte"], "nombre": tarea["nombre"], "desde": previa["desde"], "hasta": previa["hasta"],
+                "archivo": previa["archivo"], "ok": True, "sesion": None, "segundos": 0.0, "almacen": None,
+                "error": None, "filas": previa["filas"], "reutilizado": previa["fecha"]}
+
+    def descargar(self, pedidos, forzar=False):
+        """
+        Descarga los pedidos en paralelo (uno por sesión) y devuelve el manifiesto: una
+        entrada por pedido, en el mismo orden, con reporte, rango, archivo, ok, sesión,
+        segundos, resumen del almacén y error. Con `registro`, un pedido que ya tiene una
+        descarga vigente no se vuelve a pedir ('reutilizado' en su entrada) salvo con `forzar`.
+        """
+        if not pedidos:
+            return []
+        manifiesto = [None if forzar else self._reutilizable(t) for t in pedidos]
+        pendientes = [i for i, entrada in enumerate(manifiesto) if entrada is None]
+        if not pendientes:
+            return manifiesto
+        with self._lock:
+            self._en_curso += 1
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_sesiones, len(pendientes))) as pool:
+                for i, entrada in zip(pendientes, pool.map(self._descargar_uno, [pedidos[i] for i in pendientes])):
+                    manifiesto[i] = entrada
+        finally:
+            with self._lock:
+                self._en_curso -= 1
+                self._ultimo_uso = time.monotonic()
+            self._programar_cierre()
+        ok = sum(manifiesto[i]["ok"] for i in pendientes)
+        print(f"📥 {ok}/{len(pendientes)} reportes descargados con {len(self._sesiones)} sesiones.")
+        return manifiesto
+
+    def descargar_por_tramos(self, reporte, desde, hasta, tramo=None, nombre=None,
+                             reintentos=REINTENTOS_TRAMO, sucursal=SUCURSAL_DEFAULT, **parametros):
+        """
+        Descarga un rango largo partido en tramos (TRAMO_POR_REPORTE por defecto) en
+        paralelo, valida cada tramo y los une en un solo archivo sin órdenes repetidas.
+        Un tramo que falla o no valida se reintenta solo (hasta `reintentos` veces); los
+        tramos válidos quedan en <carpeta>/.tramos/<nombre>/, así una nueva llamada con
+        el mismo nombre retoma sin volver a bajarlos. Devuelve una entrada como las del
+        manifiesto de `descargar`, con además 'filas' y 'tramos' (la entrada de cada tramo).
+        """
+        if reporte in REPORTES_SIN_TRAMOS:
+            raise ValueError(f"{reporte} no se puede dividir en tramos (acumula desde el inicio del rango).")
+        inicio, fin = _fecha(desde), _fecha(hasta)
+        nombre = nombre or f"{reporte}_{inicio:%d%m%Y}_{fin:%d%m%Y}"
+        carpeta_tramos = self.carpeta / ".tramos" / nombre
+        rangos = dividir_rango(inicio, fin, tramo or TRAMO_POR_REPORTE.get(reporte, "M"))
+        resultado = {"reporte": reporte, "nombre": nombre, "desde": f"{inicio:%d/%m/%Y}", "hasta": f"{fin:%d/%m/%Y}",
+                     "archivo": None, "ok": False, "sesion": None, "segundos": None, "almacen": None, "error": None,
+                     "filas": 0, "tramos": []}
+        reloj = time.perf_counter()
+
+        validos, registro, pendientes = {}, {}, {}
+        for i, (a, b) in enumerate(rangos):
+            tarea = pedido(reporte, a, b, nombre=f"{nombre}_{a:%Y%m%d}", sucursal=sucursal, **parametros)
+            tarea.update(carpeta=carpeta_tramos, ingerir=False)
+            previo = sorted(carpeta_tramos.glob(f"{tarea['nombre']}.*"))
+            df = validar_tramo(previo[0], a, b)[0] if previo else None
+            if df is not None:
+                validos[i] = df
+                registro[i] = {"reporte": reporte, "nombre": tarea["nombre"], "desde": tarea["parametros"]["fecha_inicio"],
+                               "hasta": tarea["parametros"]["fecha_fin"], "archivo": str(previo[0]), "ok": True,
+                               "intentos": 0, "error": None}
+            else:
+                pendientes[i] = tarea
+
+        for intento in range(1, reintentos + 2):
+            if not pendientes:
+                break
+            indices = list(pendientes)
+            for i, entrada in zip(indices, self.descargar([pendientes[i] for i in indices])):
+                entrada["intentos"] = intento
+                if entrada["ok"]:
+                    df, motivo = validar_tramo(entrada["archivo"], *rangos[i])
+                    if df is None:
+                        os.remove(entrada["archivo"])
+                        entrada.update(ok=False, archivo=None, error=f"Tramo inválido: {motivo}")
+                    else:
+                        validos[i] = df
+                        del pendientes[i]
+                registro[i] = entrada
+            if pendientes:
+                print(f"🔁 {len(pendientes)} tramos de {reporte} para reintentar.")
+
+        resultado["tramos"] = [registro[i] for i in range(len(rangos))]
+        resultado["segundos"] = round(time.perf_counter() - reloj, 2)
+        if pendientes:
+            resultado["error"] = f"{len(pendientes)} de {len(rangos)} tramos fallaron: " + "; ".join(
+                f"{registro[i]['desde']}-{registro[i]['hasta']}: {registro[i]['error']}" for i in pendientes)
+            return resultado
+
+        df = unir_tramos([validos[i] for i in range(len(rangos))])
+        unido = carpeta_tramos / f"{nombre}.unido.csv"
+        df.to_csv(unido, index=False)
+        destino = self.carpeta / mover_sin_pisar(str(unido), str(self.carpeta), f"{nombre}.csv")
+        if self.almacen is not None and detectar_esquema(df.columns) in ESQUEMAS_ALMACEN:
+            resultado["almacen"] = self.almacen.ingerir(str(destino))
+        shutil.rmtree(carpeta_tramos, ignore_errors=True)
+        with contextlib.suppress(OSError):
+            carpeta_tramos.parent.rmdir()  # solo si no quedan otros rangos a medias
+        resultado.update(archivo=str(destino), ok=True, filas=len(df))
+        print(f"🧩 {reporte}: {len(rangos)} tramos unidos en {destino.name} ({len(df)} filas).")
+        return resultado
+
+    def sincronizar(self, reportes=None, sucursal=SUCURSAL_DEFAULT, hasta=None,
+                    solapamiento=SOLAPAMIENTO_DIAS, desde_inicial=None, conservar_csv=False):
+        """
+        Trae solo los días nuevos de cada reporte del almacén: desde la marca de
+        sincronización (último día completo ingerido para `sucursal`) menos `solapamiento`
+        días hasta `hasta` (hoy por defecto), y los agrega al almacén con upsert. Sin marca
+        parte del último día guardado o, con el almacén vacío, de `desde_inicial` (por
+        defecto DIAS_PRIMERA_SINCRONIZACION días atrás). El día de hoy no se marca como
+        completo: la próxima sincronización lo vuelve a pedir. Devuelve el manifiesto,
+        con 'marca' (nueva marca o None) en cada entrada.
+        """
+        if self.almacen is None:
+            raise ValueError("La sincronización incremental necesita un almacén.")
+        hoy = pd.Timestamp.today().normalize()
+        hasta = _fecha(hasta).normalize() if hasta is not None else hoy
+        completo = min(hasta, hoy - pd.Timedelta(days=1))
+        pedidos = []
+        for reporte in reportes or ESQUEMAS_ALMACEN:
+            marca = self.almacen.marca(reporte, sucursal)
+            base = marca if marca is not None else self.almacen.ultimo_dia(reporte)
+            if base is not None:
+                desde = base - pd.Timedelta(days=solapamiento)
+            else:
+                desde = _fecha(desde_inicial) if desde_inicial is not None else hasta - pd.Timedelta(days=DIAS_PRIMERA_SINCRONIZACION)
+            desde = min(desde, hasta)
+            origen = f"marca {marca:%d/%m/%Y}" if marca is not None else "sin marca"
+            print(f"🔄 {reporte} ({sucursal}): {origen}, se piden {desde:%d/%m/%Y}-{hasta:%d/%m/%Y}")
+            pedidos.append(pedido(reporte, desde, hasta, nombre=f"{reporte}_sync_{desde:%d%m%Y}_{hasta:%d%m%Y}",
+                                  sucursal=sucursal))
+
+        manifiesto = self.descargar(pedidos)
+        for entrada in manifiesto:
+            entrada["marca"] = None
+            if not entrada["ok"] or not entrada["almacen"]:
+                continue
+            self.almacen.fijar_marca(entrada["reporte"], sucursal, completo)
+            entrada["marca"] = f"{self.almacen.marca(entrada['reporte'], sucursal):%d/%m/%Y}"
+            if not conservar_csv:
+                borrar_csv_ingerido(entrada)
+        return manifiesto
+
+    @property
+    def sesiones_abiertas(self):
+        return sum(robot is not None for robot in self._sesiones)
+
+    def _programar_cierre(self):
+        if not self.inactividad:
+            return
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        self._temporizador = threading.Timer(self.inactividad, self._cerrar_si_inactivo)
+        self._temporizador.daemon = True
+        self._temporizador.start()
+
+    def _cerrar_si_inactivo(self):
+        # Revisar y soltar el pool en la misma sección crítica: un `descargar` que empieza
+        # justo después ya no puede tomar una de estas sesiones (abre otras nuevas)
+        with self._lock:
+            if self._en_curso > 0 or time.monotonic() - self._ultimo_uso < self.inactividad:
+                return
+            sesiones = self._soltar_sesiones()
+        print("💤 Navegadores inactivos: cerrando sesiones.")
+        self._cerrar_sesiones(sesiones)
+
+    def _soltar_sesiones(self):
+        """Vacía el pool y devuelve sus sesiones (llamar con `_lock` tomado)."""
+        sesiones, self._sesiones = self._sesiones, []
+        self._libres = queue.Queue()
+        return [robot for robot in sesiones if robot is not None]
+
+    @staticmethod
+    def _cerrar_sesiones(sesiones):
+        for robot in sesiones:
+            robot.cerrar()
+            shutil.rmtree(robot.download_folder, ignore_errors=True)
+
+    def cerrar(self):
+        with self._lock:
+            sesiones = self._soltar_sesiones()
+        self._cerrar_sesiones(sesiones)
+        shutil.rmtree(self.carpeta / ".sesiones", ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+        self.cerrar()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import find_dotenv, load_dotenv
+
+    parser = argparse.ArgumentParser(description="Sincroniza en el almacén los días nuevos de Mercat (p. ej. cada noche).")
+    parser.add_argument("--carpeta", default=os.path.join("data", "reportes"))
+    parser.add_argument("--almacen", default=CARPETA_ALMACEN_DEFAULT)
+    parser.add_argument("--sucursal", default=SUCURSAL_DEFAULT)
+    parser.add_argument("--solapamiento", type=int, default=SOLAPAMIENTO_DIAS, help="días ya sincronizados que se vuelven a pedir")
+    parser.add_argument("--http", action="store_true", help="descarga por HTTP, sin Chrome")
+    args = parser.parse_args()
+
+    load_dotenv(find_dotenv())
+    usuario, password = os.environ.get("MERCAT_USER"), os.environ.get("MERCAT_PASS")
+    if not usuario or not password:
+        raise SystemExit("Faltan MERCAT_USER o MERCAT_PASS.")
+    if args.http:
+        from data.cliente_http_mercat import ClienteMercatHTTP as fabrica
+    else:
+        fabrica = RobotMercat
+    with OrquestadorDescargas(args.carpeta, usuario, password, almacen=AlmacenReportes(args.almacen),
+                              fabrica_robot=fabrica, ruta_cookies=RUTA_COOKIES_DEFAULT) as orquestador:
+        manifiesto = orquestador.sincronizar(sucursal=args.sucursal, solapamiento=args.solapamiento)
+    for entrada in manifiesto:
+        estado = f"marca {entrada['marca']}" if entrada["ok"] else f"error: {entrada['error']}"
+        print(f"{'✅' if entrada['ok'] else '❌'} {entrada['reporte']} {entrada['desde']}-{entrada['hasta']}: {estado}")
+    raise SystemExit(0 if all(e["ok"] for e in manifiesto) else 1)
@@ -0,0 +1,238 @@
+# data/esquemas_reportes.py
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+# Tipos usados en los esquemas
+CATEGORIA = "category"          # Campos con pocos valores distintos (estados, canales, meseros)
+TEXTO = "string[pyarrow]"       # Texto libre (Detalle, fechas en texto): buffer Arrow, no objetos Python
+MONTO = "float64"
+ENTERO = "Int64"                # Entero con nulos (la fila de totales de Mercat viene vacía)
+
+# Cada entrada corresponde a una clave de REPORTES_CONFIG (Flujo_Caja cubre Ingresos y Egresos).
+# - columnas_clave: columnas que identifican al export (todas deben estar presentes)
+# - tipo_analista: tipo que entiende AnalistaDeDatos ("VENTAS", "INDICE") o None
+# - dtypes: tipos por columna; las columnas no declaradas se infieren como siempre
+ESQUEMAS_REPORTES = {
+    # -------------------------------------------------------------------------
+    # 1. ÍNDICE MERCAT
+    # -------------------------------------------------------------------------
+    "Indice_Mercat": {
+        "columnas_clave": ["Creado el", "Anulado"],
+        "tipo_analista": "INDICE",
+        "dtypes": {
+            "Sucursal": CATEGORIA,
+            "Número": ENTERO,
+            "Factura": TEXTO,
+            "Tarifa delivery": MONTO,
+            "Descuento": MONTO,
+            "Monto total": MONTO,
+            "Estado": CATEGORIA,
+            "Creado el": TEXTO,
+            "Anulado": CATEGORIA,
+            "Crédito": CATEGORIA,
+            "Mesa": CATEGORIA,
+            "Tipo": CATEGORIA,
+            "Pagado el": TEXTO,
+        },
+    },
+
+    # -------------------------------------------------------------------------
+    # 2. REPORTE DE VENTAS
+    # -------------------------------------------------------------------------
+    "Ventas": {
+        "columnas_clave": ["Detalle", "Tipo de orden"],
+        "tipo_analista": "VENTAS",
+        "dtypes": {
+            "Fecha": TEXTO,
+            "Hora": TEXTO,
+            "Id": ENTERO,
+            "Sucursal": CATEGORIA,
+            "Estado": CATEGORIA,
+            "Validez": CATEGORIA,
+            "Número": ENTERO,
+            "Tipo de orden": CATEGORIA,
+            "Medio": CATEGORIA,
+            "Cliente": TEXTO,
+            "Métodos de pago": CATEGORIA,
+            "Subtotal": MONTO,
+            "Tarifa delivery": MONTO,
+            "Descuento": MONTO,
+            "Monto gift card": MONTO,
+            "Monto total": MONTO,
+            "Detalle": TEXTO,
+            "PedidosYa": CATEGORIA,
+            "Yango": CATEGORIA,
+            "Consumo interno": CATEGORIA,
+            "Pagado el": TEXTO,
+            "Orden prog.": CATEGORIA,
+            "Día orden prog.": TEXTO,
+            "Inventario": CATEGORIA,
+            "Razón social": TEXTO,
+            "NIT/CI": TEXTO,
+            "Email": TEXTO,
+            "Fecha factura": TEXTO,
+            "Número factura": TEXTO,  # identificador: sin ".0" y con sus ceros a la izquierda
+            "Monto factura": MONTO,
+            "Sector factura": CATEGORIA,
+            "Mesero": CATEGORIA,
+            "Mesa": CATEGORIA,
+            "Almacén": CATEGORIA,
+        },
+    },
+
+    # -------------------------------------------------------------------------
+    # 3. REPORTE POR PRODUCTO
+    # -------------------------------------------------------------------------
+    "Por_Producto": {
+        "columnas_clave": ["Producto", "Cantidad"],
+        "tipo_analista": None,
+        "dtypes": {
+            "Sucursal": CATEGORIA,
+            "Fecha": TEXTO,
+            "Hora": TEXTO,
+            "Categoría": CATEGORIA,
+            "Producto": CATEGORIA,
+            "Tipo de orden": CATEGORIA,
+            "Cantidad": MONTO,
+            "Monto total": MONTO,
+        },
+    },
+
+    # -------------------------------------------------------------------------
+    # 4-5. FLUJO DE CAJA: Ingresos y Egresos bajan el mismo export (solo cambia el
+    # filtro "Tipo de flujo"), así que las columnas no los distinguen: un esquema
+    # -------------------------------------------------------------------------
+    "Flujo_Caja": {
+        "columnas_clave": ["Tipo de flujo", "Concepto"],
+        "tipo_analista": None,
+        "dtypes": {
+            "Sucursal": CATEGORIA,
+            "Fecha": TEXTO,
+            "Tipo de flujo": CATEGORIA,
+            "Supercategoría": CATEGORIA,
+            "Categoría": CATEGORIA,
+            "Concepto": TEXTO,
+            "Método de pago": CATEGORIA,
+            "Monto": MONTO,
+        },
+    },
+
+    # -------------------------------------------------------------------------
+    # 6. ACUMULADO
+    # -------------------------------------------------------------------------
+    "Acumulado": {
+        "columnas_clave": ["Acumulado"],
+        "tipo_analista": None,
+        "dtypes": {
+            "Sucursal": CATEGORIA,
+            "Fecha": TEXTO,
+            "Órdenes": ENTERO,
+            "Monto total": MONTO,
+            "Acumulado": MONTO,
+        },
+    },
+
+    # -------------------------------------------------------------------------
+    # 7. AÑADIDOS
+    # -------------------------------------------------------------------------
+    "Anadidos": {
+        "columnas_clave": ["Añadido"],
+        "tipo_analista": None,
+        "dtypes": {
+            "Sucursal": CATEGORIA,
+            "Producto": CATEGORIA,
+            "Añadido": CATEGORIA,
+            "Cantidad": MONTO,
+            "Monto total": MONTO,
+        },
+    },
+}
+
+
+def detectar_esquema(columnas):
+    """Devuelve la clave de ESQUEMAS_REPORTES cuyo set de columnas clave está presente, o None."""
+    columnas = set(columnas)
+    for nombre, esquema in ESQUEMAS_REPORTES.items():
+        if all(c in columnas for c in esquema["columnas_clave"]):
+            return nombre
+    return None
+
+
+def _dtypes_presentes(esquema, columnas):
+    return {c: t for c, t in ESQUEMAS_REPORTES[esquema]["dtypes"].items() if c in columnas}
+
+
+def aplicar_esquema(df, esquema=None):
+    """
+    Convierte columna a columna a los tipos del esquema (para Excel o lecturas de respaldo).
+    Una columna que no se puede convertir (p.ej. montos con 'Bs' o comas) se deja como está
+    y la limpieza de AnalistaDeDatos se encarga de ella.
+    """
+    esquema = esquema or detectar_esquema(df.columns)
+    if esquema is None:
+        return df
+    for col, tipo in _dtypes_presentes(esquema, df.columns).items():
+        if str(df[col].dtype) == tipo:
+            continue
+        try:
+            df[col] = df[col].astype(tipo)
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def _tipo_arrow(tipo):
+    return {
+        CATEGORIA: pa.dictionary(pa.int32(), pa.string()),
+        TEXTO: pa.string(),
+        MONTO: pa.float64(),
+        ENTERO: pa.int64(),
+    }[tipo]
+
+
+def _leer_csv_arrow(ruta, dtypes):
+    """
+    Parseo con pyarrow.csv fijando los tipos antes de convertir: sin esto pyarrow infiere
+    (p.ej. 'Hora' como time32) y la conversión posterior a texto cambia el formato.
+    """
+    convert = pv.ConvertOptions(
+        column_types={c: _tipo_arrow(t) for c, t in dtypes.items()},
+        strings_can_be_null=True,  # "" -> nulo, igual que pd.read_csv
+    )
+    tabla = pv.read_csv(ruta, convert_options=convert)
+    mapeo = {pa.string(): pd.StringDtype("pyarrow"), pa.int64(): pd.Int64Dtype()}
+    df = tabla.to_pandas(types_mapper=mapeo.get)
+    # Las columnas sin encabezado llegan con nombre vacío; igualamos al lector por defecto
+    df.columns = [c if c else f"Unnamed: {i}" for i, c in enumerate(df.columns)]
+    return df
+
+
+def leer_reporte(ruta, esquema=None):
+    """
+    Lee un export de Mercat con tipos declarados.
+    CSV: pyarrow con los dtypes del esquema; si el archivo no encaja (montos con
+    formato inesperado, columnas mezcladas) o no hay pyarrow se recurre al lector
+    por defecto y se convierte lo que se pueda.
+    """
+    ruta = str(ruta)
+    if not ruta.endswith(".csv"):
+        return aplicar_esquema(pd.read_excel(ruta), esquema)
+
+    columnas = pd.read_csv(ruta, nrows=0).columns
+    esquema = esquema or detectar_esquema(columnas)
+    if esquema is None:
+        return pd.read_csv(ruta)
+
+    if ARROW_DISPONIBLE:
+        try:
+            return _leer_csv_arrow(ruta, _dtypes_presentes(esquema, columnas))
+        except Exception as e:
+            print(f"⚠️ Lectura tipada falló ({esquema}), usando lector por defecto: {e}")
+    return aplicar_esquema(pd.read_csv(ruta), esquema)
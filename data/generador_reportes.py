@@ -0,0 +1,399 @@
+# data/generador_reportes.py
+"""
+Generador de exports sintéticos de Mercat (Reporte de Ventas + Índice) para pruebas de
+carga y escala. Mismo formato que los CSV reales: columnas, textos de fecha, 'Detalle'
+con items separados por '—' y variantes, métodos de pago combinados, mesas tipo
+"Sala S2"/"Balcon B3", cuotas de alquiler de Yango, anulados y pendientes. Cada orden
+aparece en ambos archivos con el mismo Número y día, así la fusión cruza al 100%.
+
+Determinista: la misma semilla produce exactamente los mismos archivos.
+
+Uso:
+    python -m data.generador_reportes 100000 --semilla 7 --carpeta /tmp/reportes
+"""
+import argparse
+import csv
+import datetime
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_VENTAS = [
+    "Fecha", "Hora", "Id", "Sucursal", "Estado", "Validez", "Número", "Tipo de orden", "Medio",
+    "Cliente", "Métodos de pago", "Subtotal", "Tarifa delivery", "Descuento", "Monto gift card",
+    "Monto total", "Detalle", "PedidosYa", "Yango", "Consumo interno", "Pagado el", "Orden prog.",
+    "Día orden prog.", "Inventario", "Supercategorías", "Razón social", "NIT/CI", "Email", "Teléfono",
+    "Fecha factura", "Número factura", "Monto factura", "Sector factura", "Mesero", "Mesa", "Almacén",
+]
+COLUMNAS_INDICE = [
+    "Sucursal", "Número", "Factura", "Tarifa delivery", "Descuento", "Monto total", "Estado",
+    "Creado el", "Anulado", "Crédito", "Mesa", "Tipo", "Pagado el",
+]
+COLUMNAS_VACIAS_INDICE = 8  # el export del Índice trae 8 columnas sin encabezado al final
+
+SUCURSAL = "C&C"
+
+# Catálogo: (producto, precio local en Bs, variantes). Una variante "" es el producto solo;
+# el resto se escribe como en Mercat: " (Doble)", ": Regular", " (Vainilla): Azúcar Blanca"...
+CATALOGO = [
+    ("CAPPUCCINO", 18, [""]),
+    ("FLAT WHITE", 20, [""]),
+    ("AMERICANO", 12, [" (Simple)", " (Doble)"]),
+    ("MIXTO", 26, [": A la plancha, Pan Blanco y Sin espinaca", ": A la plancha, Pan de tomate y albahaca y Con espinaca", ""]),
+    ("PUMPKIN CAPPUCCINO", 24, [""]),
+    ("Agua 600 ml", 8, [": Agua CON GAS", ": Agua SIN GAS"]),
+    ("ESPRESSO", 10, [" (Simple)", " (Doble)"]),
+    ("LICUADOS NATURALES", 18, ["", ": Frutilla", ": Piña", ": Papaya"]),
+    ("CAPPUCCINO CARAMEL", 22, [""]),
+    ("TIRAMISÚ", 25, [""]),
+    ("TORTA DE ZANAHORIA", 20, [""]),
+    ("HOT CHOCOLATE", 18, [""]),
+    ("ENSALADA DE FRUTAS", 22, [""]),
+    ("CAPPUCCINO BARISTA", 22, [""]),
+    ("BAGEL MEXICANO", 35, [""]),
+    ("TORTA DE CHOCOLATE", 22, [""]),
+    ("CAFÉ LATTE", 18, ["", ": Regular", ": Vainilla"]),
+    ("MATE", 10, [""]),
+    ("CHEESECAKE", 26, [" (Mora)", " (Maracuyá)"]),
+    ("ICED TEA", 15, ["", ": Azúcar Blanca"]),
+    ("LUNGO", 12, [" (Doble)"]),
+    ("MOCHA LATTE", 22, ["", ": Semi-amargo"]),
+    ("EMPANADA DE QUESO", 15, [" (EMPANADA DE QUESO NORMAL)"]),
+    ("GREEN ICE", 20, ["", ": Azúcar Blanca"]),
+    ("CRISPY MOCHA LATTE", 26, [" (Regular)"]),
+    ("Gaseosa 500 ml", 10, [": Coca Cola (Normal)", ": Coca Cola (ZERO)"]),
+    ("BAGEL SÁNDWICH", 30, [""]),
+    ("CRISPY ÓREO LATTE", 26, ["", ": Azúcar Blanca"]),
+    ("DESAYUNO AMERICANO", 38, [""]),
+    ("FROZEN CAPPUCCINO", 26, [" (Vainilla)", " (Vainilla): Azúcar Blanca"]),
+    ("CUÑAPE", 6, [""]),
+    ("CHAI LATTE", 22, [""]),
+    ("CROQUE MONSIEUR", 32, [": A la plancha y Pan Blanco", ""]),
+    ("GALLETAS", 8, [": Tradicional con Chips de Chocolate", ": Avena", " (Red Velvet)"]),
+    ("NAPOLITANO", 28, [": A la plancha y Pan de orégano y aceituna"]),
+    ("BAGEL SIMPLE", 15, ["", ": Jamon"]),
+    ("MACCHIATO", 12, [" (Simple)", " (Doble)"]),
+    ("CERVEZA PROST LAGER 500 ml", 20, [""]),
+    ("OMELETTE VEGETARIANO", 28, [""]),
+    ("PHILADELPHIA", 30, [""]),
+]
+# Popularidad tipo Zipf: el primero del catálogo es el más pedido
+PESO_ZIPF = 0.9
+
+# Ítems distintos por orden (1..12), proporciones del reporte anual 2025
+PROB_ITEMS = np.array([2710, 2339, 945, 498, 194, 85, 37, 21, 9, 14, 18, 9], dtype=float)
+PROB_CANTIDAD = np.array([13272, 1348, 198, 62, 20], dtype=float)  # 1×..5×
+
+TIPOS_ORDEN = ["Mesa", "Recojo", "PedidosYa", "Interno", "Yango"]
+PROB_TIPOS = np.array([4832, 1152, 437, 190, 123], dtype=float)
+RECARGO_TIPO = {"PedidosYa": 1.25, "Yango": 1.25, "Interno": 0.5}
+
+METODOS_PAGO = ["Efectivo", "QR estático", "Tarjeta", "Transferencia", "Efectivo, QR estático",
+                "Efectivo, Tarjeta", "Efectivo, QR estático, Tarjeta"]
+PROB_METODOS = np.array([3231, 2325, 651, 197, 29, 3, 2], dtype=float)
+METODO_TIPO = {"PedidosYa": "Pago online", "Yango": "Transferencia"}
+
+MESAS = ["Balcon B1", "Sala 1", "Sala S4", "Balcon B5", "Sala S5", "Balcon B2", "Sala S6", "Sala S1",
+         "Cubiculo C1", "Balcon B4", "Cubiculo C3", "Sala S2", "Sala S3", "Cubiculo C4", "Cubiculo C6",
+         "Barra P1", "Sillón B", "Cubiculo C5", "Cubiculo C2", "Sala 4", "Barra P2", "Cubiculo C2*",
+         "Central 1", "Balcon B3", "Cortesias Yango"]
+PROB_MESAS = np.array([492, 474, 446, 427, 248, 219, 213, 211, 207, 206, 171, 166, 128, 127, 121,
+                       98, 65, 64, 53, 45, 45, 28, 23, 20, 3], dtype=float)
+PROB_MESA_VACIA = 0.25  # órdenes de Mesa sin mesa asignada
+
+MESEROS = ["Ana Lucía Rojas Peña", "Bruno Vargas Saucedo", "Carla Méndez Quiroga",
+           "Diego Salazar Ortiz", "Elena Paz Gutiérrez", "Fernando Ribera Soto"]
+PROB_MESEROS = np.array([1778, 1475, 1348, 1304, 479, 178], dtype=float)
+PROB_MESEROS_COMBINADOS = 0.03
+
+CLIENTES = ["maria fernandez", "jorge arce", "lucia paz", "andres rivero", "sofia canedo", "pablo justiniano"]
+RAZONES_SOCIALES = ["ROJAS", "VARGAS", "MENDEZ", "SALAZAR", "PAZ", "RIBERA", "SERVICIOS SRL", "CONSULTORA ANDINA SRL"]
+
+PROB_ANULADO = 0.008
+PROB_PENDIENTE = 0.009
+PROB_DESCUENTO = 0.094
+PROB_FACTURA = 0.15
+PROB_CLIENTE = 0.02
+PROB_INVENTARIO = 0.04
+
+# Cuota mensual de la oficina alquilada a Yango (AnalistaDeDatos la marca como Es_Alquiler)
+DETALLE_ALQUILER = "1× Cuota de membresía por Oficina C&C ({mes} {anio}) - Membership fee"
+MONTO_ALQUILER = 8992.32
+MESA_ALQUILER = "YANGO CORPORATIVO MENSUAL"
+RAZON_SOCIAL_ALQUILER = "EMPRESA CORPORATIVA S.R.L."
+MESES = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto",
+         "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+
+ID_INICIAL = 5_000_000
+SEPARADOR_ITEMS = "—"
+
+# Textos precalculados: hora del día (minuto 0..1439), segundos y milisegundos
+_HORAS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+_SEGUNDOS = np.array([f":{s:02d}" for s in range(60)], dtype=object)
+_MILIS = np.array([f".{ms:03d}" for ms in range(1000)], dtype=object)
+
+
+def _probabilidades(pesos):
+    return pesos / pesos.sum()
+
+
+def _elegir(rng, opciones, pesos, n):
+    opciones = np.asarray(opciones, dtype=object)
+    return opciones[rng.choice(len(opciones), size=n, p=_probabilidades(pesos))]
+
+
+def _minutos_del_dia(rng, n):
+    """Hora de cada orden: pico de mañana (~10:30) y de tarde (~16:30), entre 07:00 y 22:59."""
+    manana = rng.random(n) < 0.45
+    minutos = np.where(manana, rng.normal(10.5 * 60, 90, n), rng.normal(16.5 * 60, 120, n))
+    return np.clip(minutos, 7 * 60, 23 * 60 - 1).astype(np.int64)
+
+
+def _textos_fecha(dias, desde):
+    """'dd/mm/aaaa' para cada índice de día desde `desde` (se formatea cada día una sola vez)."""
+    codigos, unicos = pd.factorize(dias)
+    fechas = pd.to_datetime(desde) + pd.to_timedelta(unicos, unit="D")
+    return fechas.strftime("%d/%m/%Y").to_numpy(dtype=object)[codigos]
+
+
+def _detalles(rng, n, recargo):
+    """(Detalle, Subtotal) por orden: ítems distintos ordenados alfabéticamente como en Mercat."""
+    precios, offsets, n_variantes, textos = [], [], [], []
+    for producto, precio, variantes in CATALOGO:
+        offsets.append(len(textos))
+        n_variantes.append(len(variantes))
+        textos.extend(producto + v for v in variantes)
+        precios.append(precio)
+    offsets, n_variantes, precios = np.array(offsets), np.array(n_variantes), np.array(precios, dtype=float)
+    pesos = 1.0 / np.arange(1, len(CATALOGO) + 1) ** PESO_ZIPF
+
+    items_por_orden = rng.choice(len(PROB_ITEMS), size=n, p=_probabilidades(PROB_ITEMS)) + 1
+    orden = np.repeat(np.arange(n), items_por_orden)
+    producto = rng.choice(len(CATALOGO), size=len(orden), p=_probabilidades(pesos))
+    variante = offsets[producto] + (rng.random(len(orden)) * n_variantes[producto]).astype(np.int64)
+    cantidad = rng.choice(len(PROB_CANTIDAD), size=len(orden), p=_probabilidades(PROB_CANTIDAD)) + 1
+
+    items = pd.DataFrame({"orden": orden, "texto": np.asarray(textos, dtype=object)[variante],
+                          "cantidad": cantidad, "precio": precios[producto]})
+    # Un mismo ítem repetido en la orden se agrupa sumando cantidades ("2× CAPPUCCINO")
+    items = items.groupby(["orden", "texto"], sort=True, as_index=False).agg(
+        cantidad=("cantidad", "sum"), precio=("precio", "first"))
+    items["importe"] = items["cantidad"] * items["precio"]
+    items["item"] = items["cantidad"].astype(str) + "× " + items["texto"]
+
+    # items ya viene ordenado por (orden, texto): cada orden es un tramo contiguo
+    cortes = np.flatnonzero(np.diff(items["orden"].to_numpy())) + 1
+    inicios, fines = np.r_[0, cortes], np.r_[cortes, len(items)]
+    textos_items = items["item"].tolist()
+    detalle = np.array([SEPARADOR_ITEMS.join(textos_items[i:f]) for i, f in zip(inicios, fines)], dtype=object)
+    subtotal = np.round(np.add.reduceat(items["importe"].to_numpy(), inicios) * recargo, 1)
+    return detalle, subtotal
+
+
+def _cuotas_alquiler(desde, n_dias):
+    """(índice de día, texto del mes) de la cuota mensual: el día 2 de cada mes cubierto."""
+    inicio = pd.Timestamp(desde)
+    fin = inicio + pd.Timedelta(days=n_dias - 1)
+    dias, meses = [], []
+    for mes in pd.date_range(inicio.replace(day=1), fin, freq="MS"):
+        dia = mes + pd.Timedelta(days=1)
+        if inicio <= dia <= fin:
+            dias.append((dia - inicio).days)
+            meses.append(DETALLE_ALQUILER.format(mes=MESES[dia.month - 1], anio=dia.year))
+    return np.array(dias, dtype=np.int64), np.array(meses, dtype=object)
+
+
+def generar_reportes(n_ordenes, desde=datetime.date(2025, 1, 2), ordenes_por_dia=22, semilla=0, alquileres=True):
+    """
+    Devuelve (ventas, indice) como DataFrames con las columnas y textos de los exports de
+    Mercat. `n_ordenes` incluye las cuotas mensuales de alquiler; los días cubiertos
+    son ceil(n_ordenes / ordenes_por_dia) a partir de `desde`.
+    """
+    rng = np.random.default_rng(semilla)
+    n_dias = max(1, math.ceil(n_ordenes / ordenes_por_dia))
+    dias_alq, detalle_alq = _cuotas_alquiler(desde, n_dias) if alquileres else (np.array([], dtype=np.int64), np.array([], dtype=object))
+    if len(dias_alq) >= n_ordenes:
+        dias_alq, detalle_alq = dias_alq[:0], detalle_alq[:0]
+    n_reg = n_ordenes - len(dias_alq)
+    n_alq = len(dias_alq)
+
+    # --- Órdenes regulares ---
+    tipo = _elegir(rng, TIPOS_ORDEN, PROB_TIPOS, n_reg)
+    recargo = np.ones(n_reg)
+    for t, factor in RECARGO_TIPO.items():
+        recargo[tipo == t] = factor
+    detalle, subtotal = _detalles(rng, n_reg, recargo)
+    descuento = np.where(rng.random(n_reg) < PROB_DESCUENTO, np.round(subtotal * 0.1, 1), 0.0)
+
+    metodo = _elegir(rng, METODOS_PAGO, PROB_METODOS, n_reg)
+    for t, m in METODO_TIPO.items():
+        metodo[tipo == t] = m
+    mesa = _elegir(rng, MESAS, PROB_MESAS, n_reg)
+    mesa[(tipo != "Mesa") | (rng.random(n_reg) < PROB_MESA_VACIA)] = None
+
+    # --- Unión con las cuotas de alquiler y orden cronológico ---
+    dia = np.concatenate([np.sort(rng.integers(0, n_dias, n_reg)), dias_alq])
+    minuto = np.concatenate([_minutos_del_dia(rng, n_reg), np.full(n_alq, 17 * 60 + 35)])
+    tipo = np.concatenate([tipo, np.full(n_alq, "Mesa", dtype=object)])
+    detalle = np.concatenate([detalle, detalle_alq])
+    subtotal = np.concatenate([subtotal, np.full(n_alq, MONTO_ALQUILER)])
+    descuento = np.concatenate([descuento, np.zeros(n_alq)])
+    metodo = np.concatenate([metodo, np.full(n_alq, "Transferencia", dtype=object)])
+    mesa = np.concatenate([mesa, np.full(n_alq, MESA_ALQUILER, dtype=object)])
+    es_alquiler = np.concatenate([np.zeros(n_reg, dtype=bool), np.ones(n_alq, dtype=bool)])
+
+    orden = np.lexsort((minuto, dia))
+    dia, minuto, tipo, detalle, subtotal, descuento, metodo, mesa, es_alquiler = (
+        a[orden] for a in (dia, minuto, tipo, detalle, subtotal, descuento, metodo, mesa, es_alquiler))
+    n = len(dia)
+    total = np.round(subtotal - descuento, 2)
+
+    # Número: correlativo del día (se reinicia cada día); Id: creciente global con saltos
+    numero = pd.Series(dia).groupby(dia).cumcount().to_numpy() + 1
+    ids = ID_INICIAL + np.cumsum(rng.integers(1, 400, n))
+
+    # Estados: anuladas y pendientes de pago (sin método ni fecha de pago)
+    anulado = (rng.random(n) < PROB_ANULADO) & ~es_alquiler
+    pendiente = (rng.random(n) < PROB_PENDIENTE) & ~es_alquiler
+    metodo[pendiente] = None
+
+    fecha = _textos_fecha(dia, desde)
+    hora = _HORAS[minuto]
+    minuto_pago = np.minimum(minuto + rng.integers(0, 60, n), 24 * 60 - 1)
+    texto_pago = fecha + " " + _HORAS[minuto_pago]
+    pagado_el = np.where(pendiente, None, texto_pago)
+
+    # Facturación, clientes, meseros
+    facturada = ((rng.random(n) < PROB_FACTURA) & ~pendiente) | es_alquiler
+    numero_factura = np.where(facturada, np.cumsum(facturada), 0)
+    razon_social = np.where(facturada, _elegir(rng, RAZONES_SOCIALES, np.ones(len(RAZONES_SOCIALES)), n), None)
+    razon_social[es_alquiler] = RAZON_SOCIAL_ALQUILER
+    nit = np.where(facturada, rng.integers(1_000_000, 99_999_999, n).astype(str), None)
+    cliente = np.where(rng.random(n) < PROB_CLIENTE, _elegir(rng, CLIENTES, np.ones(len(CLIENTES)), n), None)
+
+    mesero = _elegir(rng, MESEROS, PROB_MESEROS, n)
+    segundo = _elegir(rng, MESEROS, PROB_MESEROS, n)
+    combinado = np.flatnonzero((rng.random(n) < PROB_MESEROS_COMBINADOS) & (segundo != mesero))
+    mesero[combinado] = [", ".join(sorted(par)) for par in zip(mesero[combinado], segundo[combinado])]
+
+    inventario = np.where(rng.random(n) < PROB_INVENTARIO, "1× Coca Cola 500 ml (ZERO)", None)
+
+    def _si_no(mascara):
+        return np.where(mascara, "Sí", "No")
+
+    ventas = pd.DataFrame({
+        "Fecha": fecha,
+        "Hora": hora,
+        "Id": ids,
+        "Sucursal": SUCURSAL,
+        "Estado": np.where(pendiente, "PENDIENTE DE PAGO", "PAGADO"),
+        "Validez": np.where(anulado, "ANULADO", "VÁLIDO"),
+        "Número": numero,
+        "Tipo de orden": tipo,
+        "Medio": "POS",
+        "Cliente": cliente,
+        "Métodos de pago": metodo,
+        "Subtotal": subtotal,
+        "Tarifa delivery": np.nan,
+        "Descuento": descuento,
+        "Monto gift card": np.nan,
+        "Monto total": total,
+        "Detalle": detalle,
+        "PedidosYa": _si_no(tipo == "PedidosYa"),
+        "Yango": _si_no(tipo == "Yango"),
+        "Consumo interno": _si_no(tipo == "Interno"),
+        "Pagado el": pagado_el,
+        "Orden prog.": "No",
+        "Día orden prog.": None,
+        "Inventario": inventario,
+        "Supercategorías": None,
+        "Razón social": razon_social,
+        "NIT/CI": nit,
+        "Email": np.where(es_alquiler, "facturacion@empresa.example", None),
+        "Teléfono": None,
+        "Fecha factura": np.where(facturada, pagado_el, None),
+        "Número factura": np.where(facturada, numero_factura, np.nan),
+        "Monto factura": np.where(facturada, total, np.nan),
+        "Sector factura": np.where(facturada, "FACTURA COMPRA-VENTA", None),
+        "Mesero": mesero,
+        "Mesa": mesa,
+        "Almacén": np.where(pd.notna(inventario), "Principal", None),
+    }, columns=COLUMNAS_VENTAS)
+
+    # --- Índice: misma orden, mismo Número y día; marcas de tiempo con segundos ---
+    segundos = _SEGUNDOS[rng.integers(0, 60, n)] + _MILIS[rng.integers(0, 1000, n)]
+    segundos_pago = _SEGUNDOS[rng.integers(0, 60, n)] + _MILIS[rng.integers(0, 1000, n)]
+    indice = pd.DataFrame({
+        "Sucursal": SUCURSAL,
+        "Número": numero,
+        "Factura": np.where(facturada, np.char.add("#", numero_factura.astype(str)).astype(object), None),
+        "Tarifa delivery": np.nan,
+        "Descuento": descuento,
+        "Monto total": total,
+        "Estado": np.where(pendiente, "Pendiente de pago", "Pagado"),
+        "Creado el": fecha + " " + hora + segundos,
+        "Anulado": _si_no(anulado),
+        "Crédito": "No",
+        "Mesa": mesa,
+        "Tipo": tipo,
+        "Pagado el": np.where(pendiente, None, texto_pago + segundos_pago),
+    }, columns=COLUMNAS_INDICE)
+    for i in range(COLUMNAS_VACIAS_INDICE):
+        indice[f"Unnamed: {len(COLUMNAS_INDICE) + i}"] = None
+    # El listado del Índice sale de la más reciente a la más antigua
+    indice = indice.iloc[::-1].reset_index(drop=True)
+
+    ventas["Id"] = ventas["Id"].astype("int64")
+    ventas["Número factura"] = ventas["Número factura"].astype("Int64")
+    return ventas, indice
+
+
+def _escribir_csv(df, ruta, encabezado, fila_final=None):
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")  # como el export: solo \n
+        escritor.writerow(encabezado)
+        df.to_csv(f, header=False, index=False, quoting=csv.QUOTE_ALL, na_rep="")
+        if fila_final is not None:
+            escritor.writerow(fila_final)
+
+
+def escribir_reportes(carpeta, n_ordenes, nombre="SINTETICO", **kwargs):
+    """
+    Genera y escribe 'VENTAS_<nombre>.csv' e 'Índice_Mercat_<nombre>.csv' en `carpeta`,
+    con la fila de totales del Reporte de Ventas. Devuelve las dos rutas.
+    """
+    ventas, indice = generar_reportes(n_ordenes, **kwargs)
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_ventas = os.path.join(carpeta, f"VENTAS_{nombre}.csv")
+    ruta_indice = os.path.join(carpeta, f"Índice_Mercat_{nombre}.csv")
+
+    # Fila de totales: solo 'Monto total' (órdenes válidas) como trae el export real
+    totales = [""] * len(COLUMNAS_VENTAS)
+    validas = ventas["Validez"] == "VÁLIDO"
+    totales[COLUMNAS_VENTAS.index("Monto total")] = f"{ventas.loc[validas, 'Monto total'].sum():.2f}"
+    _escribir_csv(ventas, ruta_ventas, COLUMNAS_VENTAS, totales)
+    _escribir_csv(indice, ruta_indice, COLUMNAS_INDICE + [""] * COLUMNAS_VACIAS_INDICE)
+    return ruta_ventas, ruta_indice
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera exports sintéticos de Mercat (VENTAS + Índice).")
+    parser.add_argument("ordenes", type=int)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--desde", default="2025-01-02", help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--ordenes-por-dia", type=int, default=22)
+    parser.add_argument("--carpeta", default=os.path.join("data", "reportes"))
+    parser.add_argument("--nombre", default="SINTETICO")
+    args = parser.parse_args(argv)
+    rutas = escribir_reportes(
+        args.carpeta, args.ordenes, nombre=args.nombre, semilla=args.semilla,
+        desde=datetime.date.fromisoformat(args.desde), ordenes_por_dia=args.ordenes_por_dia,
+    )
+    for ruta in rutas:
+        print(f"✅ {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# data/registro_descargas.py
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from data.esquemas_reportes import leer_reporte
+
+# data/estado y no data/cache: la caché de Parquet se puede vaciar, el registro no
+RUTA_REGISTRO_DEFAULT = os.path.join("data", "estado", "registro_descargas.sqlite")
+
+# Cuánto vale una descarga anterior con los mismos parámetros (segundos). Un rango
+# que incluye hoy sigue recibiendo ventas; uno cerrado solo cambia por anulaciones.
+FRESCURA_RANGO_ABIERTO = 15 * 60
+FRESCURA_RANGO_CERRADO = 12 * 60 * 60
+
+# Esperas adaptativas: cuantil de las últimas mediciones de la fase por un margen,
+# acotado; con menos de MIN_MUESTRAS_ESPERA mediciones se usan las del robot. Generar y
+# bajar el archivo crecen con el rango: para un rango más largo que los medidos se escalan
+FASES_ESPERA = ("generar", "archivo")
+ESPERA_CUANTIL = 0.95
+ESPERA_MARGEN = 2.0
+ESPERA_MINIMA = 5
+ESPERA_MAXIMA = 600
+MIN_MUESTRAS_ESPERA = 5
+
+COLUMNAS_FASES = ["fecha", "reporte", "fase", "campo", "segundos", "ok"]
+COLUMNAS_HISTORIAL = ["fecha", "reporte", "desde", "hasta", "ok", "segundos", "filas", "archivo", "duplicado_de", "error"]
+
+
+def _hash_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def frescura(parametros):
+    """Edad máxima (segundos) para reutilizar una descarga con estos parámetros."""
+    fin = pd.to_datetime(parametros.get("fecha_fin", ""), format="%d/%m/%Y", errors="coerce")
+    if pd.isna(fin) or fin >= pd.Timestamp.today().normalize():
+        return FRESCURA_RANGO_ABIERTO
+    return FRESCURA_RANGO_CERRADO
+
+
+class RegistroDescargas:
+    """
+    Bitácora SQLite de cada descarga del robot: reporte, parámetros, duración, filas,
+    sha256 del archivo y tiempos por fase (tabla `fases`). Sirve para:
+
+    - `vigente`: si ya hay una descarga reciente (ver `frescura`) con los mismos
+      parámetros y su archivo sigue en disco, no se vuelve a pedir a Mercat.
+    - `registrar(..., deduplicar=True)`: si el archivo nuevo es idéntico a uno ya
+      registrado que sigue en disco, se borra y la entrada apunta al existente (en vez
+      de acumular 'Ventas (1).csv', 'Ventas (2).csv'... con el mismo contenido).
+    - `esperas_sugeridas`: esperas del robot por fase según lo medido para ese reporte,
+      en lugar de las constantes fijas (ver RobotMercat.ajustar_esperas).
+
+    Cada operación abre su propia conexión: se puede usar desde los hilos del orquestador.
+    """
+
+    def __init__(self, ruta=RUTA_REGISTRO_DEFAULT):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._conexion() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS descargas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    fecha TEXT NOT NULL,
+                    instante REAL NOT NULL,
+                    reporte TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    parametros TEXT NOT NULL,
+                    desde TEXT,
+                    hasta TEXT,
+                    ok INTEGER NOT NULL,
+                    segundos REAL,
+                    sesion TEXT,
+                    archivo TEXT,
+                    sha256 TEXT,
+                    filas INTEGER,
+                    duplicado_de TEXT,
+                    error TEXT
+                )""")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_descargas_clave ON descargas (clave, instante)")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_descargas_sha ON descargas (sha256)")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS fases (
+                    descarga INTEGER NOT NULL REFERENCES descargas (id),
+                    reporte TEXT NOT NULL,
+                    fase TEXT NOT NULL,
+                    campo TEXT,
+                    segundos REAL NOT NULL,
+                    ok INTEGER NOT NULL,
+                    detalle TEXT
+                )""")
+            con.execute("CREATE INDEX IF NOT EXISTS ix_fases_reporte ON fases (reporte, fase, descarga)")
+
+    @contextlib.contextmanager
+    def _conexion(self):
+        with self._lock, contextlib.closing(sqlite3.connect(self.ruta, timeout=30)) as con:
+            con.row_factory = sqlite3.Row
+            with con:  # commit al salir (rollback si hay excepción)
+                yield con
+
+    @staticmethod
+    def clave(reporte, parametros):
+        """Identifica un pedido: mismo reporte y mismos parámetros (sin importar el orden)."""
+        texto = json.dumps({"reporte": reporte, "parametros": parametros}, sort_keys=True, default=str)
+        return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+    def vigente(self, reporte, parametros, max_edad=None):
+        """Última descarga correcta de este pedido más nueva que `max_edad` cuyo archivo sigue en disco, o None."""
+        max_edad = frescura(parametros) if max_edad is None else max_edad
+        with self._conexion() as con:
+            filas = con.execute(
+                "SELECT * FROM descargas WHERE clave = ? AND ok = 1 AND instante >= ? ORDER BY instante DESC",
+                (self.clave(reporte, parametros), time.time() - max_edad),
+            ).fetchall()
+        return next((dict(f) for f in filas if f["archivo"] and os.path.exists(f["archivo"])), None)
+
+    def registrar(self, entrada, parametros, deduplicar=True):
+        """
+        Guarda una entrada del manifiesto de OrquestadorDescargas, con sus 'fases' (los
+        tiempos por fase del robot) si las trae. Si es correcta completa 'sha256' y
+        'filas'; con `deduplicar`, un archivo idéntico a otro registrado se borra y
+        'archivo' pasa a ser el existente ('duplicado_de' lo indica).
+        """
+        entrada.setdefault("duplicado_de", None)
+        if entrada["ok"] and entrada["archivo"]:
+            entrada["sha256"] = _hash_archivo(entrada["archivo"])
+            with self._conexion() as con:
+                previas = con.execute(
+                    "SELECT archivo, filas FROM descargas WHERE sha256 = ? AND ok = 1 AND archivo != ? ORDER BY instante DESC",
+                    (entrada["sha256"], entrada["archivo"]),
+                ).fetchall()
+            previa = next((p for p in previas if os.path.exists(p["archivo"])), None) if deduplicar else None
+            if previa is not None:
+                os.remove(entrada["archivo"])
+                print(f"♻️ {os.path.basename(entrada['archivo'])} es idéntico a {os.path.basename(previa['archivo'])}: se conserva solo el existente.")
+                entrada.update(archivo=previa["archivo"], filas=previa["filas"], duplicado_de=previa["archivo"])
+            else:
+                try:
+                    entrada["filas"] = len(leer_reporte(entrada["archivo"]))
+                except Exception:
+                    entrada["filas"] = None
+        with self._conexion() as con:
+            cursor = con.execute(
+                "INSERT INTO descargas (fecha, instante, reporte, clave, parametros, desde, hasta, ok, segundos, sesion,"
+                " archivo, sha256, filas, duplicado_de, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec="seconds"), time.time(), entrada["reporte"],
+                 self.clave(entrada["reporte"], parametros), json.dumps(parametros, sort_keys=True, default=str),
+                 entrada.get("desde"), entrada.get("hasta"), int(bool(entrada["ok"])), entrada.get("segundos"),
+                 entrada.get("sesion"), entrada.get("archivo"), entrada.get("sha256"), entrada.get("filas"),
+                 entrada["duplicado_de"], entrada.get("error")),
+            )
+            con.executemany(
+                "INSERT INTO fases (descarga, reporte, fase, campo, segundos, ok, detalle) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cursor.lastrowid, entrada["reporte"], f["fase"], f.get("campo"), f["segundos"], int(bool(f["ok"])),
+                  json.dumps({k: v for k, v in f.items() if k not in ("fase", "campo", "segundos", "ok")}, default=str))
+                 for f in entrada.get("fases") or []],
+            )
+        return entrada
+
+    def historial(self, limite=50):
+        """Últimas descargas registradas (la más nueva primero)."""
+        with self._conexion() as con:
+            filas = con.execute(f"SELECT {', '.join(COLUMNAS_HISTORIAL)} FROM descargas ORDER BY id DESC LIMIT ?",
+                                (limite,)).fetchall()
+        return pd.DataFrame([dict(f) for f in filas], columns=COLUMNAS_HISTORIAL)
+
+    # --- Tiempos por fase ---
+    def fases(self, reporte=None, ultimas=200):
+        """Mediciones por fase de las últimas `ultimas` descargas (de `reporte` si se indica)."""
+        filtro, valores = ("WHERE d.reporte = ?", [reporte]) if reporte else ("", [])
+        with self._conexion() as con:
+            filas = con.execute(
+                "SELECT d.fecha, f.reporte, f.fase, f.campo, f.segundos, f.ok FROM fases f"
+                " JOIN (SELECT id, fecha, reporte FROM descargas ORDER BY id DESC LIMIT ?) d ON d.id = f.descarga "
+                f"{filtro} ORDER BY f.descarga DESC, f.rowid",
+                [ultimas, *valores],
+            ).fetchall()
+        return pd.DataFrame([dict(f) for f in filas], columns=COLUMNAS_FASES)
+
+    def resumen_fases(self, ultimas=200):
+        """Por reporte y fase: mediciones, mediana, p95, máximo y fallas (esperas agotadas, campos sin llenar...)."""
+        df = self.fases(ultimas=ultimas)
+        if df.empty:
+            return pd.DataFrame(columns=["reporte", "fase", "n", "mediana", "p95", "max", "fallas"])
+        grupos = df.groupby(["reporte", "fase"], sort=True)
+        return pd.DataFrame({
+            "n": grupos.size(),
+            "mediana": grupos["segundos"].median(),
+            "p95": grupos["segundos"].quantile(0.95),
+            "max": grupos["segundos"].max(),
+            "fallas": grupos["ok"].apply(lambda ok: int((ok == 0).sum())),
+        }).round(2).reset_index()
+
+    def esperas_sugeridas(self, reporte, dias=None, ultimas=50):
+        """
+        {fase: segundos} para RobotMercat.ajustar_esperas a partir de las últimas
+        mediciones de `reporte`: ESPERA_CUANTIL × ESPERA_MARGEN, entre ESPERA_MINIMA y
+        ESPERA_MAXIMA. Con `dias` (largo del rango a pedir) mayor que la mediana de los
+        rangos medidos, la espera crece en la misma proporción. Las fases con pocas
+        mediciones no se incluyen.
+        """
+        sugeridas = {}
+        with self._conexion() as con:
+            for fase in FASES_ESPERA:
+                filas = con.execute(
+                    "SELECT f.segundos, d.desde, d.hasta FROM fases f JOIN descargas d ON d.id = f.descarga"
+                    " WHERE f.reporte = ? AND f.fase = ? ORDER BY f.descarga DESC LIMIT ?",
+                    (reporte, fase, ultimas),
+                ).fetchall()
+                if len(filas) < MIN_MUESTRAS_ESPERA:
+                    continue
+                df = pd.DataFrame([dict(f) for f in filas], columns=["segundos", "desde", "hasta"])
+                espera = df["segundos"].quantile(ESPERA_CUANTIL) * ESPERA_MARGEN
+                medidos = (pd.to_datetime(df["hasta"], format="%d/%m/%Y", errors="coerce")
+                           - pd.to_datetime(df["desde"], format="%d/%m/%Y", errors="coerce")).dt.days.add(1).median()
+                if dias and pd.notna(medidos):
+                    espera *= max(1.0, dias / medidos)
+                sugeridas[fase] = round(min(max(espera, ESPERA_MINIMA), ESPERA_MAXIMA), 1)
+        return sugeridas
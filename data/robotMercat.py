@@ -1,6 +1,10 @@
 import time
 import os
 import glob
+import contextlib
+import json
+import tempfile
+import threading
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -10,12 +14,167 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 import shutil
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
+
+# Sufijos de descargas en curso (Chrome escribe '.crdownload' y lo renombra al terminar)
+SUFIJOS_TEMPORALES = ('.crdownload', '.tmp', '.part')
+
+
+if WATCHDOG_DISPONIBLE:
+    class _AvisoCambios(FileSystemEventHandler):
+        def __init__(self, aviso):
+            self.aviso = aviso
+
+        def on_any_event(self, event):
+            self.aviso.set()
+
+
+class VigiaDescargas:
+    """
+    Espera a que aparezca un archivo terminado en `carpeta`. Con watchdog despierta con
+    cada evento del sistema de archivos (creado / renombrado desde '.crdownload'); sin
+    watchdog revisa la carpeta cada SONDEO segundos. Los nombres de `ignorar` (archivos
+    que ya estaban antes de la descarga) no cuentan.
+    """
+    SONDEO = 0.1
+
+    def __init__(self, carpeta, ignorar=()):
+        self.carpeta = str(carpeta)
+        self.ignorar = set(ignorar)
+        self._aviso = threading.Event()
+        self._observador = None
+        if WATCHDOG_DISPONIBLE:
+            self._observador = Observer()
+            self._observador.schedule(_AvisoCambios(self._aviso), self.carpeta, recursive=False)
+            self._observador.start()
+
+    def archivo_terminado(self, extensiones=('.csv', '.xlsx')):
+        """Ruta del archivo descargado, o None si todavía no hay uno completo."""
+        nombres = [n for n in os.listdir(self.carpeta) if n not in self.ignorar]
+        if any(n.endswith(SUFIJOS_TEMPORALES) for n in nombres):
+            return None
+        listos = sorted(n for n in nombres if n.endswith(extensiones))
+        return os.path.join(self.carpeta, listos[0]) if listos else None
+
+    def esperar(self, timeout, extensiones=('.csv', '.xlsx')):
+        limite = time.monotonic() + timeout
+        while True:
+            self._aviso.clear()
+            ruta = self.archivo_terminado(extensiones)
+            if ruta:
+                return ruta
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return None
+            # Con watchdog el evento despierta antes; el tope de 1 s cubre eventos perdidos
+            self._aviso.wait(min(restante, 1.0 if self._observador else self.SONDEO))
+
+    def cerrar(self):
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join()
+            self._observador = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def mover_sin_pisar(origen, carpeta, nombre):
+    """
+    Mueve `origen` a `carpeta`/`nombre` de forma atómica. Si el nombre ya existe usa
+    'nombre (1)', 'nombre (2)', ...; el enlace duro falla si otra descarga tomó el nombre
+    en el mismo instante, así dos descargas simultáneas nunca se pisan. Devuelve el nombre usado.
+    """
+    base, extension = os.path.splitext(nombre)
+    contador = 0
+    while True:
+        candidato = nombre if contador == 0 else f"{base} ({contador}){extension}"
+        destino = os.path.join(carpeta, candidato)
+        try:
+            os.link(origen, destino)
+        except FileExistsError:
+            contador += 1
+            continue
+        except OSError:
+            # Sistema de archivos sin enlaces duros: rename dentro del mismo volumen
+            if os.path.exists(destino):
+                contador += 1
+                continue
+            os.replace(origen, destino)
+            return candidato
+        os.remove(origen)
+        return candidato
+
+
+# Valores que marcan un checkbox de la config
+VALORES_VERDADEROS = ['true', '1', 'on', 'yes', 'sí', 'si']
+
+
+def formatear_datetime(valor, selector_valor, tipo):
+    """Devuelve fecha/hora con extremos para from/to (campos 'datetime' con solo la fecha)."""
+    s = str(valor).strip()
+    if tipo == 'datetime':
+        if len(s) <= 10:  # solo fecha dd/mm/yyyy
+            if 'from' in selector_valor.lower():
+                return f"{s} 00:00"
+            if 'to' in selector_valor.lower():
+                return f"{s} 23:59"
+    return s
+
+
+def escribir_json_privado(ruta, datos):
+    """Escribe `datos` como JSON legible solo por el usuario (cookies de sesión), con tmp + rename."""
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+    os.replace(tmp, ruta)
+
+
+def limpiar_carpeta(carpeta):
+    """Borra los archivos de `carpeta` (no los .py ni las subcarpetas)."""
+    print("🧹 Limpiando carpeta de descargas...")
+    archivos = glob.glob(os.path.join(carpeta, "*.*"))
+    for archivo in archivos:
+        try:
+            if not archivo.endswith(".py") and os.path.isfile(archivo):
+                os.remove(archivo)
+        except Exception as e:
+            print(f"   ! No se pudo borrar {archivo}: {e}")
+    print("✨ Carpeta limpia.")
+
+
 class RobotMercat:
     DEFAULT_WAIT = 20
     PROGRESS_WAIT = 60
     DOWNLOAD_WAIT = 45
-
-    def __init__(self, download_folder):
+    BARRA_WAIT = 5
+    # Esperas por fase (segundos); ajustar_esperas solo las alarga según lo medido en el
+    # registro. Buscar elementos (self.wait, también en el login) usa siempre DEFAULT_WAIT
+    ESPERAS = {"barra": BARRA_WAIT, "generar": PROGRESS_WAIT, "archivo": DOWNLOAD_WAIT}
+    URL_BASE = "https://www.mercat.bo"
+    URL_LOGIN = URL_BASE + "/users/sign_in"
+    URL_PANEL = URL_BASE + "/admin/pos_orders/list"
+
+    def __init__(self, download_folder, almacen=None, ruta_cookies=None):
+        # Almacén particionado (data/almacen_reportes.py) donde se guardan las descargas
+        self.almacen = almacen
+        # Archivo donde se guardan las cookies de sesión para no repetir el login
+        self.ruta_cookies = ruta_cookies
+        self._credenciales = None
+        # Archivo de la última descarga, dentro de su carpeta de trabajo propia (.descarga-*)
+        self.ultimo_archivo = None
+        # Tiempos por fase desde la última llamada a tomar_telemetria()
+        self.telemetria = []
+        self.esperas = dict(self.ESPERAS)
         # Asegurar folder y usar Path
         self.download_folder = str(Path(download_folder).resolve())
         Path(self.download_folder).mkdir(parents=True, exist_ok=True)
@@ -37,46 +196,120 @@ class RobotMercat:
 
         # Usar chromedriver del sistema si existe (producción), sino webdriver-manager (desarrollo)
         system_chromedriver = shutil.which('chromedriver')
-        if system_chromedriver:
-            self.driver = webdriver.Chrome(service=Service(system_chromedriver), options=options)
-        else:
-            self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+        with self._fase("driver"):
+            if system_chromedriver:
+                self.driver = webdriver.Chrome(service=Service(system_chromedriver), options=options)
+            else:
+                self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
         self.wait = WebDriverWait(self.driver, self.DEFAULT_WAIT)
 
+    # --- Telemetría ---
+    @contextlib.contextmanager
+    def _fase(self, fase, **detalle):
+        """
+        Mide una fase del robot y la agrega a `telemetria` como
+        {"fase", "segundos", "ok", **detalle}. Dentro del bloque se puede marcar
+        fase["ok"] = False (p. ej. una espera agotada que no corta la descarga).
+        """
+        registro = {"fase": fase, "segundos": None, "ok": None, **detalle}
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception:
+            registro["ok"] = False
+            raise
+        finally:
+            registro["segundos"] = round(time.perf_counter() - inicio, 3)
+            if registro["ok"] is None:
+                registro["ok"] = True
+            self.telemetria.append(registro)
+
+    def tomar_telemetria(self):
+        """Devuelve los registros de fases acumulados y vacía la lista."""
+        registros, self.telemetria = self.telemetria, []
+        return registros
+
+    def ajustar_esperas(self, sugeridas):
+        """
+        Esperas por fase: la sugerida (p. ej. RegistroDescargas.esperas_sugeridas) cuando
+        supera la de ESPERAS; un historial de descargas rápidas nunca las acorta.
+        """
+        self.esperas = {fase: max(base, sugeridas.get(fase, base)) for fase, base in self.ESPERAS.items()}
+
     def login(self, usuario, password):
         """Inicia sesión en el ERP con espera robusta."""
-        try:
-            self.driver.get("https://www.mercat.bo/users/sign_in")
-            user_field = self.wait.until(EC.element_to_be_clickable((By.ID, "user_login")))
-            user_field.clear()
-            user_field.send_keys(usuario)
+        self._credenciales = (usuario, password)
+        with self._fase("login") as fase:
+            try:
+                self.driver.get(self.URL_LOGIN)
+                user_field = self.wait.until(EC.element_to_be_clickable((By.ID, "user_login")))
+                user_field.clear()
+                user_field.send_keys(usuario)
+
+                pass_field = self.wait.until(EC.presence_of_element_located((By.ID, "user_password")))
+                pass_field.clear()
+                pass_field.send_keys(password)
+
+                btn_ingresar = self.wait.until(EC.element_to_be_clickable((By.NAME, "commit")))
+                self.driver.execute_script("arguments[0].click();", btn_ingresar)
+
+                # Espera mínima de transición
+                self.wait.until(EC.presence_of_element_located((By.CLASS_NAME, "navbar")))
+                time.sleep(0.5)
+                self.guardar_cookies()
+                return True
+            except Exception as e:
+                print(f"❌ Error en Login: {e}")
+                fase["ok"] = False
+                return False
 
-            pass_field = self.wait.until(EC.presence_of_element_located((By.ID, "user_password")))
-            pass_field.clear()
-            pass_field.send_keys(password)
+    def sesion_vencida(self):
+        """True si el ERP redirigió al formulario de login."""
+        return "/users/sign_in" in (self.driver.current_url or "")
 
-            btn_ingresar = self.wait.until(EC.element_to_be_clickable((By.NAME, "commit")))
-            self.driver.execute_script("arguments[0].click();", btn_ingresar)
+    def guardar_cookies(self):
+        """Guarda las cookies de la sesión actual en `ruta_cookies` (solo legible por el usuario)."""
+        if not self.ruta_cookies:
+            return
+        try:
+            escribir_json_privado(self.ruta_cookies, self.driver.get_cookies())
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar las cookies: {e}")
 
-            # Espera mínima de transición
-            self.wait.until(EC.presence_of_element_located((By.CLASS_NAME, "navbar")))
-            time.sleep(0.5)
-            return True
+    def restaurar_sesion(self):
+        """Carga las cookies guardadas y verifica que la sesión siga activa (sin pasar por el login)."""
+        if not self.ruta_cookies or not os.path.exists(self.ruta_cookies):
+            return False
+        try:
+            with open(self.ruta_cookies, "r", encoding="utf-8") as f:
+                cookies = json.load(f)
+            ahora = time.time()
+            self.driver.get(self.URL_BASE)  # las cookies solo se aceptan estando en el dominio
+            for cookie in cookies:
+                if cookie.get("expiry") and cookie["expiry"] < ahora:
+                    continue
+                cookie.pop("sameSite", None)
+                self.driver.add_cookie(cookie)
+            self.driver.get(self.URL_PANEL)
+            return not self.sesion_vencida()
         except Exception as e:
-            print(f"❌ Error en Login: {e}")
+            print(f"⚠️ No se pudo restaurar la sesión: {e}")
             return False
 
+    def iniciar_sesion(self, usuario, password):
+        """Reutiliza la sesión guardada si sigue activa; si venció, hace login y guarda las cookies nuevas."""
+        self._credenciales = (usuario, password)
+        with self._fase("restaurar_sesion") as fase:
+            fase["restaurada"] = self.restaurar_sesion()
+        if fase["restaurada"]:
+            print("🔑 Sesión restaurada desde cookies.")
+            return True
+        return self.login(usuario, password)
+
 
     def _formatear_datetime(self, valor, selector_valor, tipo):
         """Devuelve fecha/hora con extremos para from/to."""
-        s = str(valor).strip()
-        if tipo == 'datetime':
-            if len(s) <= 10:  # solo fecha dd/mm/yyyy
-                if 'from' in selector_valor.lower():
-                    return f"{s} 00:00"
-                if 'to' in selector_valor.lower():
-                    return f"{s} 23:59"
-        return s
+        return formatear_datetime(valor, selector_valor, tipo)
     
 
     def _llenar_campo(self, selector_info, valor_a_ingresar):
@@ -87,7 +320,7 @@ class RobotMercat:
 
         if not by or not selector_valor:
             print(f"⚠️ Config de campo inválida: {selector_info}")
-            return
+            return False
 
         tipo_selector = getattr(By, by)
 
@@ -133,77 +366,113 @@ class RobotMercat:
                         print(f"⚠️ No se pudo seleccionar '{valor_a_ingresar}' en {selector_valor}")
 
             elif tipo_campo == 'checkbox':
-                debe_estar_marcado = str(valor_a_ingresar).lower() in ['true', '1', 'on', 'yes', 'sí', 'si']
+                debe_estar_marcado = str(valor_a_ingresar).lower() in VALORES_VERDADEROS
                 esta_marcado = elemento.is_selected()
                 if debe_estar_marcado != esta_marcado:
                     self.driver.execute_script("arguments[0].click();", elemento)
 
             else:
                 print(f"⚠️ Tipo de campo desconocido: {tipo_campo}")
+                return False
+            return True
 
         except Exception as e:
             print(f"⚠️ Error llenando campo {selector_valor}: {e}")
+            return False
 
     def _esperar_barra_progreso(self):
-        """Espera barra de progreso 100%, tolerante si no aparece."""
+        """
+        Espera barra de progreso 100%, tolerante si no aparece. Devuelve True si llegó
+        al 100%, None si no hubo barra y False si se agotó la espera (se sigue igual).
+        """
         try:
-            wait_barra = WebDriverWait(self.driver, 5)
+            wait_barra = WebDriverWait(self.driver, self.esperas["barra"])
             barra = wait_barra.until(EC.visibility_of_element_located((By.CLASS_NAME, "progress-bar")))
-            wait_proceso = WebDriverWait(self.driver, self.PROGRESS_WAIT)
+        except Exception:
+            # Puede cargar sin barra
+            return None
+        try:
+            wait_proceso = WebDriverWait(self.driver, self.esperas["generar"])
             wait_proceso.until(lambda d: barra.get_attribute("aria-valuenow") == "100")
             time.sleep(0.5)
+            return True
         except Exception:
-            # Puede cargar sin barra
-            pass
-
-    def _esperar_descarga_archivo(self, timeout=None, extensiones=('.csv', '.xlsx')):
-        """Espera archivo descargado evitando temporales."""
-        timeout = timeout or self.DOWNLOAD_WAIT
-        inicio = time.time()
-        while time.time() - inicio < timeout:
-            archivos = os.listdir(self.download_folder)
-            validos = [f for f in archivos if (f.endswith(extensiones)) and not f.endswith('.crdownload') and not f.endswith('.tmp')]
-            if validos:
-                return True
-            time.sleep(1)
-        print("⚠️ Tiempo agotado esperando archivo.")
-        return False
+            print(f"⚠️ La barra de progreso no llegó al 100% en {self.esperas['generar']} s: se intenta descargar igual.")
+            return False
+
+    def _dirigir_descargas(self, carpeta):
+        """Cambia la carpeta de descargas de Chrome para la próxima descarga (DevTools)."""
+        try:
+            self.driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": carpeta})
+            return True
+        except Exception as e:
+            print(f"⚠️ No se pudo cambiar la carpeta de descargas: {e}")
+            return False
 
     def descargar_reporte(self, config_reporte, parametros):
         """
         Descarga cualquier reporte definido en data/config_reportes.py.
         - Llena solo los campos presentes en 'campos'.
         - Usa click JS para evitar overlays.
+        - Cada descarga va a su propia carpeta de trabajo (.descarga-*). Devuelve la ruta
+          del archivo (también queda en `ultimo_archivo`) o False.
         """
+        self.ultimo_archivo = None
+        carpeta_trabajo = tempfile.mkdtemp(prefix=".descarga-", dir=self.download_folder)
         try:
-            self.driver.get(config_reporte['url'])
+            with self._fase("pagina"):
+                self.driver.get(config_reporte['url'])
+            # Navegador reutilizado: si la sesión venció en el ERP, reingresar y volver al reporte
+            if self.sesion_vencida() and self._credenciales:
+                print("🔑 Sesión vencida, reingresando...")
+                if self.login(*self._credenciales):
+                    with self._fase("pagina", reingreso=True):
+                        self.driver.get(config_reporte['url'])
 
             # 1) Llenar filtros definidos en la config
             campos_config = config_reporte.get('campos', {})
             for clave_config, info_campo in campos_config.items():
                 valor = parametros.get(clave_config, "")
-                self._llenar_campo(info_campo, valor)
+                with self._fase("campo", campo=clave_config) as fase:
+                    fase["ok"] = self._llenar_campo(info_campo, valor)
 
             # 2) Generar
-            btn_generar = self.wait.until(EC.presence_of_element_located((By.XPATH, config_reporte['btn_generar'])))
-            self.driver.execute_script("arguments[0].scrollIntoView();", btn_generar)
-            time.sleep(0.3)
-            self.driver.execute_script("arguments[0].click();", btn_generar)
-
-            self._esperar_barra_progreso()
-
-            # 3) Descargar CSV
-            btn_csv = self.wait.until(EC.presence_of_element_located((By.XPATH, config_reporte['btn_descargar_csv'])))
-            self.driver.execute_script("arguments[0].scrollIntoView();", btn_csv)
-            self.driver.execute_script("arguments[0].click();", btn_csv)
-
-            # 4) Esperar archivo
-            # Para "Por_Producto" puede ser .csv o .xlsx según el sitio; aceptamos ambas.
-            self._esperar_descarga_archivo(extensiones=('.csv', '.xlsx'))
-            return True
+            with self._fase("generar") as fase:
+                btn_generar = self.wait.until(EC.presence_of_element_located((By.XPATH, config_reporte['btn_generar'])))
+                self.driver.execute_script("arguments[0].scrollIntoView();", btn_generar)
+                time.sleep(0.3)
+                self.driver.execute_script("arguments[0].click();", btn_generar)
+
+                barra = self._esperar_barra_progreso()
+                fase.update(ok=barra is not False, barra=barra is not None)
+
+            # 3) Descargar CSV a la carpeta de trabajo. Si Chrome no acepta el cambio se usa
+            # la carpeta de siempre, ignorando los archivos que ya estaban
+            if self._dirigir_descargas(carpeta_trabajo):
+                vigia = VigiaDescargas(carpeta_trabajo)
+            else:
+                vigia = VigiaDescargas(self.download_folder, ignorar=os.listdir(self.download_folder))
+            with vigia:
+                with self._fase("csv"):
+                    btn_csv = self.wait.until(EC.presence_of_element_located((By.XPATH, config_reporte['btn_descargar_csv'])))
+                    self.driver.execute_script("arguments[0].scrollIntoView();", btn_csv)
+                    self.driver.execute_script("arguments[0].click();", btn_csv)
+
+                # 4) Esperar archivo: el vigía despierta cuando Chrome renombra el .crdownload
+                # Para "Por_Producto" puede ser .csv o .xlsx según el sitio; aceptamos ambas.
+                with self._fase("archivo") as fase:
+                    self.ultimo_archivo = vigia.esperar(self.esperas["archivo"], extensiones=('.csv', '.xlsx'))
+                    fase["ok"] = bool(self.ultimo_archivo)
+            if not self.ultimo_archivo:
+                print("⚠️ Tiempo agotado esperando archivo.")
+                return False
+            return self.ultimo_archivo
         except Exception as e:
             print(f"❌ Error en proceso: {e}")
             return False
+        finally:
+            if not self.ultimo_archivo or os.path.dirname(self.ultimo_archivo) != carpeta_trabajo:
+                shutil.rmtree(carpeta_trabajo, ignore_errors=True)
 
     def cerrar(self):
         try:
@@ -213,65 +482,64 @@ class RobotMercat:
 
     def limpiar_carpeta_descargas(self):
         """Borra archivos descargados evitando scripts."""
-        print("🧹 Limpiando carpeta de descargas...")
-        archivos = glob.glob(os.path.join(self.download_folder, "*.*"))
-        for archivo in archivos:
-            try:
-                if not archivo.endswith(".py"):
-                    os.remove(archivo)
-            except Exception as e:
-                print(f"   ! No se pudo borrar {archivo}: {e}")
-        print("✨ Carpeta limpia.")
+        limpiar_carpeta(self.download_folder)
 
-    def renombrar_ultimo_archivo(self, nuevo_nombre_final):
+    def renombrar_ultimo_archivo(self, nuevo_nombre_final, carpeta_destino=None):
         """
-        Renombra el archivo descargado más reciente usando exactamente el nombre proporcionado.
+        Mueve el archivo de la última descarga a `carpeta_destino` (por defecto la carpeta de
+        descargas) usando exactamente el nombre proporcionado.
         Si ya existe un archivo con ese nombre, agrega un número secuencial (1), (2), etc.
         """
+        carpeta_destino = str(carpeta_destino or self.download_folder)
         try:
-            # Esperar hasta tener un archivo completo (no .crdownload/.tmp)
-            tiempo_espera = 0
-            archivo_reciente = None
-            while tiempo_espera < 15:
-                lista_archivos = glob.glob(os.path.join(self.download_folder, "*"))
-                if not lista_archivos:
-                    time.sleep(1); tiempo_espera += 1; continue
-                archivo_reciente = max(lista_archivos, key=os.path.getctime)
-                if archivo_reciente.endswith(('.crdownload', '.tmp')):
-                    time.sleep(1); tiempo_espera += 1
-                else:
-                    break
+            archivo_reciente = self.ultimo_archivo if self.ultimo_archivo and os.path.exists(self.ultimo_archivo) else None
+            if archivo_reciente is None:
+                # Sin descarga registrada: el archivo completo más reciente de la carpeta
+                with VigiaDescargas(self.download_folder) as vigia:
+                    if vigia.esperar(15):
+                        lista_archivos = [f for f in glob.glob(os.path.join(self.download_folder, "*"))
+                                          if os.path.isfile(f) and not f.endswith(SUFIJOS_TEMPORALES)]
+                        archivo_reciente = max(lista_archivos, key=os.path.getctime, default=None)
 
             if not archivo_reciente:
                 print("⚠️ No se encontró archivo para renombrar.")
                 return None
 
-            # Usar exactamente el nombre recibido desde la interfaz (debe incluir extensión .csv/.xlsx)
-            destino = os.path.join(self.download_folder, nuevo_nombre_final)
+            # Usar exactamente el nombre recibido desde la interfaz; sin extensión se conserva la del archivo descargado
+            if not os.path.splitext(nuevo_nombre_final)[1]:
+                nuevo_nombre_final += os.path.splitext(archivo_reciente)[1]
 
-            # Si existe, agregar número secuencial
-            if os.path.exists(destino):
-                # Separar nombre base y extensión
-                nombre_base, extension = os.path.splitext(nuevo_nombre_final)
-                contador = 1
-                
-                # Buscar un nombre disponible
-                while os.path.exists(destino):
-                    nuevo_nombre_con_numero = f"{nombre_base} ({contador}){extension}"
-                    destino = os.path.join(self.download_folder, nuevo_nombre_con_numero)
-                    contador += 1
-                
-                nombre_final_usado = os.path.basename(destino)
+            nombre_final_usado = mover_sin_pisar(archivo_reciente, carpeta_destino, nuevo_nombre_final)
+            if nombre_final_usado != nuevo_nombre_final:
                 print(f"⚠️ Archivo ya existe. Renombrando a: {nombre_final_usado}")
-            else:
-                nombre_final_usado = nuevo_nombre_final
-
-            time.sleep(0.5)  # evitar locks en Windows
-            os.rename(archivo_reciente, destino)
+            carpeta_trabajo = os.path.dirname(archivo_reciente)
+            if os.path.basename(carpeta_trabajo).startswith(".descarga-"):
+                shutil.rmtree(carpeta_trabajo, ignore_errors=True)
+            self.ultimo_archivo = None
             print(f"🏷️ Guardado como: {nombre_final_usado}")
             return nombre_final_usado
 
         except Exception as e:
             print(f"⚠️ Error al renombrar: {e}")
             return None
-        
\ No newline at end of file
+
+    def guardar_en_almacen(self, nombre_archivo, conservar_csv=True):
+        """
+        Upsert del archivo descargado en el almacén (solo Ventas e Índice).
+        Con conservar_csv=False el CSV se borra una vez guardado, para que la
+        carpeta de descargas no acumule copias 'Nombre (1).csv'.
+        """
+        if self.almacen is None or not nombre_archivo:
+            return None
+        ruta = os.path.join(self.download_folder, nombre_archivo)  # una ruta absoluta se usa tal cual
+        try:
+            resumen = self.almacen.ingerir(ruta)
+        except ValueError as e:
+            print(f"ℹ️ {nombre_archivo} no va al almacén: {e}")
+            return None
+        except Exception as e:
+            print(f"⚠️ Error guardando en almacén: {e}")
+            return None
+        if not conservar_csv:
+            os.remove(ruta)
+        return resumen
@@ -0,0 +1,204 @@
+# data/servidor_mercat_falso.py
+
+import argparse
+import html
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from data.config_reportes import REPORTES_CONFIG
+from data.generador_reportes import generar_reportes
+
+RUTA_LOGIN = "/users/sign_in"
+RUTA_PANEL = "/admin/pos_orders/list"
+COOKIE_SESION = "_mercat_session"
+
+
+def _filtrar_por_fecha(df, columna, desde, hasta):
+    dias = pd.to_datetime(df[columna].astype(str).str.slice(0, 10), format="%d/%m/%Y", errors="coerce")
+    return df[dias.between(desde, hasta)]
+
+
+class ServidorMercatFalso:
+    """
+    Servidor HTTP local que imita lo que usan los robots de Mercat: el login de Devise
+    (/users/sign_in con authenticity_token y cookie de sesión) y las páginas de
+    REPORTES_CONFIG con su formulario. Al enviar el formulario responde con los datos
+    de data/generador_reportes.py del rango pedido: Ventas en CSV y el Índice como tabla
+    HTML (lo que exporta DataTables). Sirve para los tests y para probar el Robot sin
+    credenciales:
+
+        python -m data.servidor_mercat_falso --puerto 8765
+        MERCAT_URL=http://127.0.0.1:8765 MERCAT_USER=demo MERCAT_PASS=demo streamlit run dashboards/app.py
+    """
+
+    def __init__(self, usuario="demo", password="demo", n_ordenes=3000, semilla=0, puerto=0, demora=0.0):
+        self.usuario = usuario
+        self.password = password
+        self.demora = demora  # segundos que "tarda" en generar cada reporte
+        self.ventas, self.indice = generar_reportes(n_ordenes, semilla=semilla)
+        self.sesiones = set()
+        self.logins = 0
+        self.pedidos = []  # (clave de REPORTES_CONFIG, datos del formulario) de cada envío
+        self.fallar_una_vez = set()  # fechas 'from' (dd/mm/aaaa) que responden 500 la primera vez
+        self._token = secrets.token_hex(16)
+        self._reportes = {urlparse(c["url"]).path: clave for clave, c in REPORTES_CONFIG.items()}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", puerto), self._manejador())
+        self.httpd.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+
+    def expirar_sesiones(self):
+        with self._lock:
+            self.sesiones.clear()
+
+    # --- Páginas ---
+    def _pagina_login(self):
+        return f"""<html><head><meta name="csrf-token" content="{self._token}"></head><body>
+<form action="{RUTA_LOGIN}" method="post">
+<input type="hidden" name="authenticity_token" value="{self._token}">
+<input id="user_login" name="user[login]" type="text"><input id="user_password" name="user[password]" type="password">
+<input type="submit" name="commit" value="Ingresar"></form></body></html>"""
+
+    def _pagina_reporte(self, clave):
+        campos = []
+        for info in REPORTES_CONFIG[clave]["campos"].values():
+            nombre = html.escape(info["valor"])
+            if info["tipo"] == "select":
+                campos.append(f'<select name="{nombre}"><option value="">Todos</option><option value="1087">C&amp;C</option></select>')
+            elif info["tipo"] == "checkbox":
+                campos.append(f'<input type="hidden" name="{nombre}" value="0"><input type="checkbox" name="{nombre}" value="1">')
+            else:
+                campos.append(f'<input type="text" name="{nombre}" value="">')
+        return f"""<html><head><meta name="csrf-token" content="{self._token}"></head><body><nav class="navbar"></nav>
+<form action="{urlparse(REPORTES_CONFIG[clave]['url']).path}" method="post">
+<input type="hidden" name="authenticity_token" value="{self._token}">
+{''.join(campos)}
+<button type="submit" class="generate_report">Generar</button></form></body></html>"""
+
+    def _respuesta_reporte(self, clave, datos):
+        formato = "%d/%m/%Y"
+        desde = pd.to_datetime(datos.get("from", "01/01/1900")[:10], format=formato)
+        hasta = pd.to_datetime(datos.get("to", "31/12/2999")[:10], format=formato)
+        if clave == "Indice_Mercat":
+            df = _filtrar_por_fecha(self.indice, "Creado el", desde, hasta).fillna("")
+            filas = "".join("<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in fila) + "</tr>"
+                            for fila in df.itertuples(index=False))
+            cabecera = "".join(f"<th>{html.escape(c)}</th>" for c in df.columns)
+            cuerpo = f"<html><body><table><thead><tr>{cabecera}</tr></thead><tbody>{filas}</tbody></table></body></html>"
+            return "text/html; charset=utf-8", None, cuerpo.encode("utf-8")
+        if clave == "Ventas":
+            df = _filtrar_por_fecha(self.ventas, "Fecha", desde, hasta)
+        else:
+            validas = _filtrar_por_fecha(self.ventas, "Fecha", desde, hasta)
+            df = validas.groupby("Fecha", sort=False, as_index=False)["Monto total"].sum()
+        return "text/csv; charset=utf-8", f"{clave}.csv", df.to_csv(index=False, lineterminator="\n").encode("utf-8")
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _sesion(self):
+                cookies = dict(c.strip().split("=", 1) for c in self.headers.get("Cookie", "").split(";") if "=" in c)
+                return cookies.get(COOKIE_SESION) in servidor.sesiones
+
+            def _enviar(self, cuerpo, tipo="text/html; charset=utf-8", estado=200, cabeceras=()):
+                self.send_response(estado)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                for clave, valor in cabeceras:
+                    self.send_header(clave, valor)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def _redirigir(self, destino, cabeceras=()):
+                self._enviar(b"", estado=302, cabeceras=[("Location", destino), *cabeceras])
+
+            def _formulario(self):
+                largo = int(self.headers.get("Content-Length") or 0)
+                datos = parse_qs(self.rfile.read(largo).decode("utf-8"), keep_blank_values=True)
+                return {k: v[-1] for k, v in datos.items()}
+
+            def do_GET(self):
+                ruta = urlparse(self.path).path
+                if ruta == RUTA_LOGIN:
+                    return self._enviar(servidor._pagina_login().encode("utf-8"))
+                if not self._sesion():
+                    return self._redirigir(RUTA_LOGIN)
+                if ruta in servidor._reportes:
+                    return self._enviar(servidor._pagina_reporte(servidor._reportes[ruta]).encode("utf-8"))
+                self._enviar(b"<html><body><nav class='navbar'></nav></body></html>")
+
+            def do_POST(self):
+                ruta = urlparse(self.path).path
+                datos = self._formulario()
+                if datos.get("authenticity_token") != servidor._token:
+                    return self._enviar(b"token invalido", estado=422)
+                if ruta == RUTA_LOGIN:
+                    if (datos.get("user[login]"), datos.get("user[password]")) != (servidor.usuario, servidor.password):
+                        return self._enviar(servidor._pagina_login().encode("utf-8"))
+                    sesion = secrets.token_hex(16)
+                    with servidor._lock:
+                        servidor.sesiones.add(sesion)
+                        servidor.logins += 1
+                    return self._redirigir(RUTA_PANEL, [("Set-Cookie", f"{COOKIE_SESION}={sesion}; Path=/; HttpOnly")])
+                if not self._sesion():
+                    return self._redirigir(RUTA_LOGIN)
+                if ruta not in servidor._reportes:
+                    return self._enviar(b"no encontrado", estado=404)
+                clave = servidor._reportes[ruta]
+                desde = datos.get("from", "")[:10]
+                with servidor._lock:
+                    servidor.pedidos.append((clave, datos))
+                    fallar = desde in servidor.fallar_una_vez
+                    servidor.fallar_una_vez.discard(desde)
+                time.sleep(servidor.demora)
+                if fallar:
+                    return self._enviar(b"error interno", estado=500)
+                tipo, archivo, cuerpo = servidor._respuesta_reporte(clave, datos)
+                cabeceras = [("Content-Disposition", f'attachment; filename="{archivo}"')] if archivo else []
+                self._enviar(cuerpo, tipo, cabeceras=cabeceras)
+
+        return Manejador
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita el login y los reportes de Mercat.")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--ordenes", type=int, default=20000)
+    parser.add_argument("--usuario", default="demo")
+    parser.add_argument("--password", default="demo")
+    args = parser.parse_args()
+    servidor = ServidorMercatFalso(args.usuario, args.password, n_ordenes=args.ordenes, puerto=args.puerto)
+    print(f"🧪 Mercat falso en {servidor.url} (usuario {args.usuario})")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
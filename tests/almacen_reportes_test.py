@@ -0,0 +1,33 @@
+import pandas as pd
+from data.almacen_reportes import AlmacenReportes
+from data.esquemas_reportes import leer_reporte
+from data.generador_reportes import escribir_reportes
+
+def test_upsert_por_id_y_compactacion(tmp_path):
+    ruta_ventas, ruta_indice = escribir_reportes(tmp_path / "csv", 1500, semilla=4)
+    ventas = leer_reporte(ruta_ventas)
+    almacen = AlmacenReportes(tmp_path / "almacen")
+
+    primero = almacen.ingerir(ruta_ventas)
+    assert primero["nuevas"] == ventas["Id"].notna().sum() and len(primero["particiones"]) > 1
+    assert almacen.ingerir(ruta_ventas)["repetido"]
+
+    # Re-descarga de un mes con una orden corregida: solo esa fila se escribe
+    corregida = ventas.iloc[:40].copy()
+    corregida.loc[corregida.index[0], "Monto total"] += 10
+    resumen = almacen.upsert(corregida)
+    assert (resumen["nuevas"], resumen["actualizadas"], resumen["sin_cambios"]) == (0, 1, 39)
+
+    mes = pd.to_datetime(ventas["Fecha"].iloc[0], format="%d/%m/%Y")
+    df_mes = almacen.leer("Ventas", mes.replace(day=1), mes + pd.offsets.MonthEnd(0))
+    assert df_mes["Id"].is_unique
+    assert df_mes.loc[df_mes["Id"] == ventas["Id"].iloc[0], "Monto total"].item() == ventas["Monto total"].iloc[0] + 10
+    assert len(almacen.particiones("Ventas", mes, mes)) == 1
+
+    antes = almacen.leer("Ventas")
+    assert almacen.compactar() == 1 and almacen.resumen()["Partes"].max() == 1
+    pd.testing.assert_frame_equal(almacen.leer("Ventas"), antes)
+    assert len(antes) == ventas["Id"].notna().sum()
+
+    almacen.ingerir(ruta_indice)
+    assert len(almacen.leer("Indice_Mercat")) == len(leer_reporte(ruta_indice).dropna(subset=["Creado el"]))
@@ -0,0 +1,36 @@
+import pandas as pd
+from application.analista_operacional import ResolvedorMesas, AnalistaOperacional
+
+def test_resolvedor_mesas_normaliza_alias():
+    resolvedor = ResolvedorMesas()
+    casos = {
+        "Sala S3": "S3", "Salón 2": "S2", "s 1": "S1", "Balcón B5": "B5", "B6": None,
+        "Cubículo C6": "C6", "Barra P2": "P2", "P3": None, "Sala 9": "SALA",
+        "YANGO CORPORATIVO": None, "Delivery": None, "Stephanie": None, "": None,
+    }
+    for nombre, esperado in casos.items():
+        assert resolvedor.resolver(nombre) == esperado, nombre
+
+def test_normalizar_resuelve_cada_valor_una_vez(monkeypatch):
+    resolvedor = ResolvedorMesas()
+    vistos = []
+    original = resolvedor.resolver
+    monkeypatch.setattr(resolvedor, "resolver", lambda n: vistos.append(n) or original(n))
+    serie = pd.Series(["Sala S3", "B1", None, "Sala S3", "B1"] * 100, dtype="category")
+    resultado = resolvedor.normalizar(serie)
+    assert sorted(vistos) == ["B1", "Sala S3"]
+    assert resultado.tolist()[:5] == ["S3", "B1", None, "S3", "B1"]
+
+def test_heatmap_mesas_agrupa_por_mesa_normalizada():
+    indice = pd.DataFrame({
+        "Número": [1, 2, 3, 4],
+        "Creado el": ["01/02/2025 10:00"] * 4,
+        "Mesa": ["Sala S1", "S1", "Balcón B2", "Yango"],
+        "Monto total": [10.0, 20.0, 30.0, 40.0],
+        "Anulado": ["No"] * 4,
+    })
+    analista = AnalistaOperacional(df_indice=indice)
+    stats = analista.heatmap_mesas().set_index("Mesa_Real")
+    assert stats.loc["S1", "Ocupaciones"] == 2
+    assert stats.loc["B2", "Facturacion_Total"] == 30.0
+    assert "Yango" not in stats.index
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+from application.procesamiento import AnalistaDeDatos
+from data.almacen_reportes import AlmacenReportes
+from data.esquemas_reportes import leer_reporte
+from data.generador_reportes import escribir_reportes
+
+duckdb = pytest.importorskip("duckdb")
+from application.analista_sql import AnalistaSQL  # noqa: E402
+
+def _mismos_resultados(sql, pandas_):
+    assert sql.get_kpis_financieros() == pytest.approx(pandas_.get_kpis_financieros())
+    assert sql.get_kpi_alquileres() == pytest.approx(pandas_.get_kpi_alquileres())
+    pd.testing.assert_frame_equal(sql.kpis_por_canal(), pandas_.kpis_por_canal(), check_dtype=False, check_index_type=False)
+    for agrupacion in ("D", "H"):
+        pd.testing.assert_frame_equal(sql.ventas_por_tiempo(agrupacion), pandas_.ventas_por_tiempo(agrupacion), check_dtype=False)
+    pd.testing.assert_frame_equal(sql.weekly_heatmap(), pandas_.weekly_heatmap(), check_dtype=False,
+                                  check_index_type=False, check_column_type=False)
+
+def test_sql_reproduce_kpis_de_pandas(tmp_path):
+    ruta_ventas, _ = escribir_reportes(tmp_path / "csv", 4000, semilla=6)
+    ventas = leer_reporte(ruta_ventas)
+    _mismos_resultados(AnalistaSQL.desde_csv([ruta_ventas]), AnalistaDeDatos(ventas, "VENTAS"))
+
+    # En el almacén, una orden corregida en una parte más nueva reemplaza a la anterior
+    almacen = AlmacenReportes(tmp_path / "almacen")
+    almacen.ingerir(ruta_ventas)
+    corregidas = ventas.iloc[:300].copy()
+    corregidas["Monto total"] = corregidas["Monto total"] * 2
+    almacen.upsert(corregidas)
+    _mismos_resultados(AnalistaSQL.desde_almacen(almacen.carpeta / "Ventas"), AnalistaDeDatos(almacen.leer("Ventas"), "VENTAS"))
+
+    mes = pd.to_datetime(ventas["Fecha"], format="%d/%m/%Y").min() + pd.offsets.MonthBegin(1)
+    rango = AnalistaSQL.desde_almacen(almacen.carpeta / "Ventas", mes, mes + pd.offsets.MonthEnd(0))
+    dias = pd.to_datetime(rango.ventas_por_tiempo("D")["Fecha"])
+    assert len(dias) and (dias.dt.to_period("M") == mes.to_period("M")).all()
@@ -11,3 +11,149 @@ def test_montos_convertidos():
     a = AnalistaDeDatos(df, "VENTAS")
     assert a.df.loc[0, "Monto total"] == 1234.5
     assert a.df.loc[1, "Monto total"] == 0
+
+def _analizar_productos_referencia(a):
+    """Implementación original (fila por fila) de analizar_productos, usada como referencia."""
+    import re
+    df_analisis = a._excluir_alquiler(a.df.copy())
+    df_analisis = df_analisis[df_analisis["Es_Valido"] == True]
+    items = []
+    for _, row in df_analisis.iterrows():
+        for p in str(row["Detalle"]).replace("\n", " ").split("—"):
+            m = re.match(r'(\d+)\s*[x×]\s*(.+)', p.strip())
+            if not m:
+                continue
+            nombre = m.group(2).strip()
+            mv = re.search(r'^([^(:.]+)(?:[\(:\.]\s*(.+?)\)?)?$', nombre)
+            base = mv.group(1).strip().title() if mv else nombre.title()
+            var = mv.group(2).strip() if mv and mv.group(2) else "Original/Sin Cambios"
+            items.append({
+                "Producto_Base": base, "Variante": var,
+                "Producto_Completo": f"{base} ({var})" if var != "Original/Sin Cambios" else base,
+                "Cantidad": int(m.group(1)), "Producto": base,
+                "Fecha": row.get("Dia"), "Hora": row.get("Hora_Num"),
+                "Tipo Orden": row.get("Tipo de orden", "Desconocido"),
+                "Mesero": row.get("Mesero", "Sin Asignar"), "Id_Venta": row.get("Id"),
+            })
+    return pd.DataFrame(items)
+
+def test_analizar_productos_equivale_a_iterrows():
+    df = pd.DataFrame({
+        "Id": [1, 2, 3, 4, 5, 6],
+        "Fecha": ["01/02/2025"] * 6,
+        "Hora": ["09:15", "10:30", "12:00", "13:45", "18:20", "19:00"],
+        "Estado": ["Pagado"] * 6,
+        "Validez": ["Válido"] * 5 + ["Anulado"],
+        "Tipo de orden": ["Mesa", "Recojo", "Mesa", "PedidosYa", "Mesa", "Mesa"],
+        "Mesero": ["Ana", None, "Luis", "Ana", "Luis", "Ana"],
+        "Monto total": [30, 12, 45, 20, 30, 10],
+        "Detalle": [
+            "2× CAPPUCCINO: Leche almendra—1× Croissant",
+            "1× Latte (Vainilla)\n—3× agua",
+            "2× CAPPUCCINO: Leche almendra—1× Croissant",
+            None,
+            "texto sin items",
+            "1× Croissant",
+        ],
+    })
+    a = AnalistaDeDatos(df, "VENTAS")
+    esperado = _analizar_productos_referencia(a)
+    obtenido = a.analizar_productos()
+    pd.testing.assert_frame_equal(
+        obtenido[esperado.columns].astype(object), esperado.astype(object), check_dtype=False
+    )
+
+def test_lineas_se_construyen_una_sola_vez(monkeypatch):
+    import application.procesamiento as procesamiento
+    llamadas = []
+    original = procesamiento._parsear_detalles
+    monkeypatch.setattr(procesamiento, "_parsear_detalles", lambda s: llamadas.append(1) or original(s))
+    df = pd.DataFrame({
+        "Id": [1, 2, 3],
+        "Fecha": ["01/02/2025", "02/02/2025", "10/02/2025"],
+        "Hora": ["09:15", "10:30", "12:00"],
+        "Estado": ["Pagado"] * 3,
+        "Validez": ["Válido"] * 3,
+        "Tipo de orden": ["Mesa", "Recojo", "Mesa"],
+        "Monto total": [30, 12, 45],
+        "Detalle": ["2× Cappuccino: Leche almendra—1× Croissant", "1× Latte", "1× Cappuccino—1× Croissant"],
+    })
+    a = AnalistaDeDatos(df, "VENTAS")
+    a.analizar_productos()
+    pares = a.basket_analysis(min_support=1)
+    a.market_basket_rules()
+    a.productos_problematicos()
+    vip = a.vip_products()
+    a.bcg_matrix()
+    assert len(llamadas) == 1
+    assert pares.iloc[0][["item_a", "item_b", "count"]].tolist() == ["cappuccino", "croissant", 2]
+    assert abs(vip["monto"].sum() - 87) < 1e-9
+
+def test_basket_matriz_dispersa_igual_a_conteo_python(monkeypatch):
+    import application.procesamiento as procesamiento
+    df = pd.DataFrame({
+        "Id": [1, 2, 3, 4, 5],
+        "Estado": ["Pagado"] * 5,
+        "Validez": ["Válido"] * 5,
+        "Detalle": [
+            "2× Cappuccino: Leche almendra—1× Croissant—1× Agua",
+            "1× Cappuccino—1× Croissant",
+            "1× Latte—1× Agua—1× Croissant",
+            "1× Agua—1× Cappuccino (Grande)",
+            "1× Latte",
+        ],
+    })
+    disperso = AnalistaDeDatos(df, "VENTAS").basket_analysis(min_support=1)
+    monkeypatch.setattr(procesamiento, "SCIPY_DISPONIBLE", False)
+    python = AnalistaDeDatos(df, "VENTAS").basket_analysis(min_support=1)
+    pd.testing.assert_frame_equal(disperso, python, check_dtype=False)
+    fila = disperso.iloc[0]
+    assert (fila["item_a"], fila["item_b"], fila["count"]) == ("agua", "cappuccino", 2)
+    assert fila["support"] == 40 and fila["conf_a->b"] == 2 / 3 * 100
+
+def test_itemsets_frecuentes_igual_a_fuerza_bruta():
+    import itertools
+    import random
+    from collections import Counter
+    from application.procesamiento import _itemsets_frecuentes
+    rng = random.Random(7)
+    productos = ["agua", "cappuccino", "croissant", "latte", "muffin", "te"]
+    filas = [(t, p) for t in range(200) for p in rng.sample(productos, rng.randint(1, 5))]
+    tickets, prods = zip(*filas)
+    n, etiquetas, conteos = _itemsets_frecuentes(pd.Series(tickets), pd.Series(prods), 0.05, 4)
+
+    esperado = Counter()
+    por_ticket = pd.Series(prods).groupby(pd.Series(tickets)).agg(lambda s: sorted(set(s)))
+    for items in por_ticket:
+        for k in range(1, 5):
+            esperado.update(itertools.combinations(items, k))
+    esperado = {c: v for c, v in esperado.items() if v / n >= 0.05}
+    obtenido = {tuple(etiquetas[list(c)]): v for c, v in conteos.items()}
+    assert n == 200 and obtenido == esperado
+
+def test_canal_categorico_y_kpis_por_canal():
+    df = pd.DataFrame({
+        "Id": [1, 2, 3, 4, 5],
+        "Estado": ["Pagado", "Pagado", "Pendiente", "Pagado", "Pagado"],
+        "Validez": ["Válido"] * 5,
+        "Tipo de orden": ["Mesa", "Pedidos Ya", "Mesa", "Interno", "Delivery"],
+        "Monto total": [30, 20, 15, 8, 5],
+        "Descuento": [2, 0, 0, 1, 0],
+        "Detalle": ["1× Latte", "1× Agua", "1× Latte", "1× Te", "1× Agua"],
+    })
+    a = AnalistaDeDatos(df, "VENTAS")
+    assert a.df["Canal"].tolist() == ["Mesa", "PedidosYa", "Mesa", "Interno", "Otro"]
+    assert isinstance(a.df["Canal"].dtype, pd.CategoricalDtype)
+    assert a.lineas["Canal"].tolist() == a.df["Canal"].tolist()
+
+    kpis = a.kpis_por_canal()
+    assert kpis.loc["Mesa", "Ventas Totales"] == 30 and kpis.loc["Mesa", "Ventas Pendientes"] == 15
+    assert kpis.loc["Interno", "Consumo Interno"] == 8 and kpis.loc["Interno", "Ventas Totales"] == 0
+    assert kpis["Ventas Totales"].sum() == a.get_kpis_financieros()["Ventas Totales"]
+    assert kpis.loc["Yango", "Transacciones"] == 0
+
+def test_analisis_de_producto_sin_lineas_devuelve_none():
+    # 'Detalle' presente pero el reporte no se cargó como VENTAS: no hay líneas de producto
+    df = pd.DataFrame({"Detalle": ["1x Café", "2x Té"], "Monto total": [10, 20], "Fecha": ["01/01/2025", "02/01/2025"]})
+    a = AnalistaDeDatos(df, "OTRO")
+    assert a.market_basket_rules() is None and a.vip_products() is None and a.bcg_matrix() is None
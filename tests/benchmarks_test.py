@@ -0,0 +1,25 @@
+import json
+import pandas as pd
+from benchmarks import analistas
+
+def test_suite_analistas_escala_chica_guarda_json(tmp_path):
+    ventas, indice = analistas.cargar_base()
+    salida = tmp_path / "resultados.json"
+    resultados, ruta = analistas.ejecutar(escalas=[300], memoria=False, salida=salida, ventas=ventas, indice=indice)
+    with open(ruta, encoding="utf-8") as f:
+        guardado = json.load(f)
+    tabla = pd.DataFrame(guardado["resultados"])
+    assert tabla["error"].isna().all()
+    assert {"heatmap_mesas", "market_basket_rules", "bcg_matrix"} <= set(tabla["metodo"])
+    assert (tabla["ordenes"] == 300).all()
+    comparacion = analistas.comparar(ruta, ruta)
+    assert not comparacion["regresion"].any()
+
+def test_escalar_replica_con_ids_unicos_y_fechas_corridas():
+    ventas, indice = analistas.cargar_base()
+    v, i = analistas.escalar(ventas, indice, 2 * len(ventas))
+    assert v["Id"].is_unique
+    assert len(i) == 2 * len(indice)
+    fechas = pd.to_datetime(v["Fecha"], format="%d/%m/%Y")
+    assert (fechas.iloc[len(ventas):].dt.dayofweek.to_numpy() == fechas.iloc[:len(ventas)].dt.dayofweek.to_numpy()).all()
+    assert fechas.max() > pd.to_datetime(ventas["Fecha"], format="%d/%m/%Y").max()
@@ -0,0 +1,51 @@
+import os
+import shutil
+import pandas as pd
+from data.cache_reportes import CacheColumnar
+
+def _escribir_csv(ruta, filas):
+    pd.DataFrame({"Id": list(range(filas)), "Detalle": ["1× CAPPUCCINO"] * filas}).to_csv(ruta, index=False)
+
+def test_cache_evita_reparsear(tmp_path):
+    ruta = tmp_path / "VENTAS.csv"
+    _escribir_csv(ruta, 5)
+    cache = CacheColumnar(tmp_path / "cache")
+    llamadas = []
+
+    def lector(r):
+        llamadas.append(r)
+        return pd.read_csv(r)
+
+    frio = cache.cargar(ruta, lector)
+    tibio = cache.cargar(ruta, lector)
+    assert len(llamadas) == 1
+    pd.testing.assert_frame_equal(frio, tibio)
+
+def test_cache_invalida_si_cambia_el_archivo(tmp_path):
+    ruta = tmp_path / "VENTAS.csv"
+    _escribir_csv(ruta, 5)
+    cache = CacheColumnar(tmp_path / "cache")
+    cache.cargar(ruta, pd.read_csv)
+    _escribir_csv(ruta, 8)
+    assert len(cache.cargar(ruta, pd.read_csv)) == 8
+
+def test_cache_reutiliza_contenido_identico(tmp_path):
+    ruta = tmp_path / "VENTAS.csv"
+    _escribir_csv(ruta, 5)
+    copia = tmp_path / "VENTAS (1).csv"
+    shutil.copy(ruta, copia)
+    cache = CacheColumnar(tmp_path / "cache")
+    cache.cargar(ruta, pd.read_csv)
+    llamadas = []
+    cache.cargar(copia, lambda r: llamadas.append(r) or pd.read_csv(r))
+    assert llamadas == []
+    assert len([f for f in os.listdir(tmp_path / "cache") if f.endswith(".parquet")]) == 1
+
+def test_limpiar_solo_borra_lo_de_la_cache(tmp_path):
+    ruta = tmp_path / "VENTAS.csv"
+    _escribir_csv(ruta, 5)
+    cache = CacheColumnar(tmp_path / "cache")
+    cache.cargar(ruta, pd.read_csv)
+    (tmp_path / "cache" / "ajeno.sqlite").write_text("no es de la caché")
+    cache.limpiar()
+    assert os.listdir(tmp_path / "cache") == ["ajeno.sqlite"]
@@ -0,0 +1,36 @@
+import os
+import pandas as pd
+from data.cargador_reportes import cargar_conjunto, cargar_rango, periodo_de_archivo
+from data.generador_reportes import generar_reportes
+
+def _escribir(df, ruta, mtime):
+    df.to_csv(ruta, index=False)
+    os.utime(ruta, (mtime, mtime))
+
+def test_conjunto_deduplica_y_gana_la_descarga_mas_nueva(tmp_path):
+    ventas, indice = generar_reportes(600, semilla=2)
+    mitad = len(ventas) // 2
+    _escribir(ventas.iloc[: mitad + 100], tmp_path / "VENTAS_A.csv", 1_000)
+    nueva = ventas.iloc[mitad:].copy()
+    nueva["Monto total"] = nueva["Monto total"] + 1  # re-descarga con montos corregidos
+    _escribir(nueva, tmp_path / "VENTAS_B.csv", 2_000)
+
+    df = cargar_conjunto([tmp_path / "VENTAS_A.csv", tmp_path / "VENTAS_B.csv"], max_hilos=2)
+    assert len(df) == len(ventas) and df["Id"].is_unique
+    solapadas = df[df["Id"].isin(ventas["Id"].iloc[mitad: mitad + 100])]
+    assert (solapadas["Monto total"].to_numpy() == nueva["Monto total"].iloc[:100].to_numpy()).all()
+
+    _escribir(indice, tmp_path / "Índice_A.csv", 1_000)
+    _escribir(indice.iloc[:200], tmp_path / "Índice_B.csv", 2_000)
+    assert len(cargar_conjunto([tmp_path / "Índice_A.csv", tmp_path / "Índice_B.csv"])) == len(indice)
+
+def test_rango_usa_los_archivos_del_periodo(tmp_path):
+    ventas, _ = generar_reportes(900, semilla=3, desde=pd.Timestamp(2025, 1, 1).date())
+    fechas = pd.to_datetime(ventas["Fecha"], format="%d/%m/%Y")
+    for mes, nombre in [(1, "ENERO"), (2, "FEBRERO")]:
+        _escribir(ventas[fechas.dt.month == mes], tmp_path / f"VENTAS_{nombre}_2025.csv", 1_000)
+    assert periodo_de_archivo("VENTAS_FEBRERO_2025.csv") == (pd.Timestamp(2025, 2, 1), pd.Timestamp(2025, 2, 28))
+
+    df = cargar_rango(tmp_path, "2025-01-20", "2025-02-10")
+    esperadas = ventas[(fechas >= "2025-01-20") & (fechas <= "2025-02-10")]
+    assert sorted(df["Id"]) == sorted(esperadas["Id"])
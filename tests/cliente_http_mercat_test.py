@@ -0,0 +1,116 @@
+import functools
+from datetime import date
+import time
+import pandas as pd
+from data.almacen_reportes import AlmacenReportes
+from data.cliente_http_mercat import ClienteMercatHTTP
+from data.config_reportes import REPORTES_CONFIG
+from data.descargas_paralelas import OrquestadorDescargas, pedido, pedidos_del_mes
+from data.esquemas_reportes import detectar_esquema, leer_reporte
+from data.registro_descargas import RegistroDescargas
+from data.servidor_mercat_falso import ServidorMercatFalso
+
+def test_login_cookies_y_reportes_por_http(tmp_path):
+    with ServidorMercatFalso(n_ordenes=1500, semilla=8) as servidor:
+        cookies = tmp_path / "sesion.json"
+        cliente = ClienteMercatHTTP(tmp_path / "descargas", url_base=servidor.url, ruta_cookies=cookies)
+        assert not cliente.login("demo", "otra") and cliente.iniciar_sesion("demo", "demo")
+
+        tarea = pedido("Ventas", "01/02/2025", "28/02/2025")
+        ruta = cliente.descargar_reporte(REPORTES_CONFIG["Ventas"], tarea["parametros"])
+        fechas = pd.to_datetime(servidor.ventas["Fecha"], format="%d/%m/%Y")
+        esperadas = servidor.ventas[fechas.dt.month == 2]
+        assert sorted(leer_reporte(ruta)["Id"]) == sorted(esperadas["Id"])
+        assert servidor.pedidos[-1][1]["shop_id"] == "1087" and servidor.pedidos[-1][1]["to"] == "28/02/2025"
+
+        # Índice: la tabla HTML se guarda como CSV con las columnas del export
+        ruta = cliente.descargar_reporte(REPORTES_CONFIG["Indice_Mercat"], tarea["parametros"])
+        assert detectar_esquema(leer_reporte(ruta).columns) == "Indice_Mercat"
+
+        # Otro cliente reutiliza la cookie; si la sesión vence reingresa solo
+        otro = ClienteMercatHTTP(tmp_path / "descargas", url_base=servidor.url, ruta_cookies=cookies)
+        assert otro.iniciar_sesion("demo", "demo") and servidor.logins == 1
+        servidor.expirar_sesiones()
+        assert otro.descargar_reporte(REPORTES_CONFIG["Ventas"], tarea["parametros"]) and servidor.logins == 2
+
+def test_paquete_mensual_por_http_en_paralelo_al_almacen(tmp_path):
+    with ServidorMercatFalso(n_ordenes=1500, semilla=9, demora=0.4) as servidor:
+        fabrica = functools.partial(ClienteMercatHTTP, url_base=servidor.url)
+        almacen = AlmacenReportes(tmp_path / "almacen")
+        inicio = time.perf_counter()
+        with OrquestadorDescargas(tmp_path / "reportes", "demo", "demo", almacen=almacen, fabrica_robot=fabrica) as orq:
+            manifiesto = orq.descargar(pedidos_del_mes(2025, 1))
+        assert time.perf_counter() - inicio < 0.4 * len(manifiesto)  # en serie serían 3 demoras más los logins
+        assert all(e["ok"] for e in manifiesto), manifiesto
+        assert [e["almacen"]["esquema"] for e in manifiesto[:2]] == ["Ventas", "Indice_Mercat"]
+        assert manifiesto[2]["almacen"] is None  # Por_Producto no va al almacén
+        assert len(almacen.leer("Ventas")) == (pd.to_datetime(servidor.ventas["Fecha"], format="%d/%m/%Y").dt.month == 1).sum()
+
+def test_rango_por_semanas_reintenta_solo_el_tramo_fallido(tmp_path):
+    with ServidorMercatFalso(n_ordenes=2000, semilla=5) as servidor:
+        servidor.fallar_una_vez.add("13/01/2025")
+        fabrica = functools.partial(ClienteMercatHTTP, url_base=servidor.url)
+        with OrquestadorDescargas(tmp_path, "demo", "demo", max_sesiones=3, fabrica_robot=fabrica) as orquestador:
+            resultado = orquestador.descargar_por_tramos("Ventas", date(2025, 1, 1), date(2025, 3, 31), tramo="W")
+
+        assert resultado["ok"], resultado["error"]
+        desdes = [d["from"][:10] for _, d in servidor.pedidos]
+        assert len(resultado["tramos"]) == 14 and len(desdes) == 15
+        assert desdes.count("13/01/2025") == 2 and len(set(desdes)) == 14
+
+        unido = leer_reporte(resultado["archivo"])
+        dias = pd.to_datetime(servidor.ventas["Fecha"].str.slice(0, 10), format="%d/%m/%Y")
+        esperado = servidor.ventas[dias.between("2025-01-01", "2025-03-31")]
+        assert unido["Id"].is_unique
+        assert set(unido["Id"]) == set(esperado["Id"])
+        assert not (tmp_path / ".tramos").exists()
+
+def test_sincronizacion_incremental_desde_la_marca(tmp_path):
+    with ServidorMercatFalso(n_ordenes=2000, semilla=11) as servidor:
+        fabrica = functools.partial(ClienteMercatHTTP, url_base=servidor.url)
+        almacen = AlmacenReportes(tmp_path / "almacen")
+        dias = pd.to_datetime(servidor.ventas["Fecha"].str.slice(0, 10), format="%d/%m/%Y")
+        with OrquestadorDescargas(tmp_path / "reportes", "demo", "demo", almacen=almacen, fabrica_robot=fabrica) as orq:
+            manifiesto = orq.sincronizar(["Ventas"], hasta=date(2025, 2, 28), desde_inicial=date(2025, 1, 1))
+            assert manifiesto[0]["marca"] == "28/02/2025" and almacen.marca("Ventas", "1087") == pd.Timestamp(2025, 2, 28)
+            assert not list((tmp_path / "reportes").glob("*.csv"))  # el CSV ya está en el almacén
+
+            # Una anulación tardía dentro del solapamiento y diez días nuevos
+            fila = servidor.ventas.index[dias == pd.Timestamp(2025, 2, 26)][0]
+            servidor.ventas.loc[fila, "Monto total"] += 1
+            manifiesto = orq.sincronizar(["Ventas"], hasta=date(2025, 3, 10))
+
+        assert servidor.pedidos[-1][1]["from"][:10] == "25/02/2025" and manifiesto[0]["marca"] == "10/03/2025"
+        resumen = manifiesto[0]["almacen"]
+        assert resumen["actualizadas"] == 1 and resumen["nuevas"] == dias.between("2025-03-01", "2025-03-10").sum()
+        assert len(almacen.leer("Ventas")) == dias.between("2025-01-01", "2025-03-10").sum()
+
+def test_tiempos_por_fase_en_el_registro_y_esperas_adaptativas(tmp_path):
+    registro = RegistroDescargas(tmp_path / "registro.sqlite")
+    with ServidorMercatFalso(n_ordenes=500, semilla=12, demora=0.2) as servidor:
+        fabrica = functools.partial(ClienteMercatHTTP, url_base=servidor.url)
+        with OrquestadorDescargas(tmp_path / "reportes", "demo", "demo", max_sesiones=1, fabrica_robot=fabrica,
+                                  registro=registro) as orq:
+            manifiesto = orq.descargar([pedido("Ventas", f"{d:02d}/01/2025", f"{d:02d}/01/2025") for d in range(1, 7)])
+
+    # La primera descarga de la sesión trae el login; todas, página, generación y archivo
+    assert [f["fase"] for f in manifiesto[0]["fases"]] == ["restaurar_sesion", "login", "pagina", "generar", "archivo"]
+    assert [f["fase"] for f in manifiesto[1]["fases"]] == ["pagina", "generar", "archivo"]
+    generar = [f["segundos"] for e in manifiesto for f in e["fases"] if f["fase"] == "generar"]
+    assert min(generar) >= 0.2 and all(f["ok"] for f in manifiesto[1]["fases"])
+
+    fases = registro.fases(reporte="Ventas")
+    assert len(fases) == 5 + 3 * 5 and set(fases["fase"]) >= {"pagina", "generar", "archivo", "login"}
+    resumen = registro.resumen_fases().set_index(["reporte", "fase"])
+    assert resumen.loc[("Ventas", "generar"), "n"] == 6
+    # Reportes rápidos: la espera baja al mínimo; uno que tarda más la sube
+    assert registro.esperas_sugeridas("Ventas") == {"generar": 5, "archivo": 5}
+    assert registro.esperas_sugeridas("Por_Producto") == {}
+    for _ in range(5):
+        registro.registrar({"reporte": "Por_Producto", "ok": False, "archivo": None, "error": "tiempo agotado",
+                            "desde": "01/01/2025", "hasta": "07/01/2025",
+                            "fases": [{"fase": "generar", "segundos": 58.0, "ok": False}]}, {})
+    assert registro.esperas_sugeridas("Por_Producto") == {"generar": 116.0}
+    # Medido con semanas: el doble de días, el doble de espera; un rango más corto no la baja
+    assert registro.esperas_sugeridas("Por_Producto", dias=14) == {"generar": 232.0}
+    assert registro.esperas_sugeridas("Por_Producto", dias=3) == {"generar": 116.0}
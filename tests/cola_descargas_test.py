@@ -0,0 +1,40 @@
+import threading
+import time
+from data.cola_descargas import DESCARGANDO, EN_COLA, FALLO, LISTO, ColaDescargas
+
+def test_trabajos_en_segundo_plano_con_estado_y_tiempos():
+    cola = ColaDescargas(max_historial=2)
+    soltar = threading.Event()
+
+    def descarga_lenta():
+        soltar.wait(5)
+        return [{"reporte": "Ventas", "ok": True, "error": None}]
+
+    inicio = time.perf_counter()
+    primero = cola.encolar("Ventas 01/01-31/01", descarga_lenta)
+    segundo = cola.encolar("Índice 01/01-31/01", lambda: [{"reporte": "Indice_Mercat", "ok": False, "error": "timeout"}])
+    tercero = cola.encolar("Roto", lambda: 1 / 0)
+    assert time.perf_counter() - inicio < 0.5  # encolar no espera a la descarga
+
+    while cola.trabajos()[-1]["estado"] == EN_COLA:
+        time.sleep(0.01)
+    estados = {t["id"]: t["estado"] for t in cola.trabajos()}
+    assert estados == {primero: DESCARGANDO, segundo: EN_COLA, tercero: EN_COLA} and cola.activos == 3
+
+    soltar.set()
+    cola.esperar()
+    trabajos = {t["id"]: t for t in cola.trabajos()}
+    assert cola.activos == 0 and list(trabajos) == [tercero, segundo]  # historial de 2
+    assert trabajos[segundo]["estado"] == FALLO and trabajos[segundo]["error"] == "Indice_Mercat: timeout"
+    assert trabajos[tercero]["estado"] == FALLO and "division" in trabajos[tercero]["error"]
+    assert all(t["segundos"] is not None and t["fin"] >= t["inicio"] for t in trabajos.values())
+
+    cola.encolar("Ventas", lambda: [{"reporte": "Ventas", "ok": True}])
+    cola.cerrar()
+    assert cola.trabajos()[0]["estado"] == LISTO
+    espera = threading.Thread(target=cola.esperar, daemon=True)
+    espera.start()
+    espera.join(2)
+    assert not espera.is_alive()  # el aviso de cierre también cuenta como terminado
+    cola.limpiar_terminados()
+    assert cola.trabajos() == []
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from application.cubo_ventas import CuboVentas
+from application.procesamiento import AnalistaDeDatos
+from data.almacen_reportes import AlmacenReportes
+from data.esquemas_reportes import leer_reporte
+from data.generador_reportes import escribir_reportes, generar_reportes
+
+def _validas(analista, canal=None, incluir_alquiler=False):
+    df = analista.df[analista.df["Es_Valido"]]
+    if not incluir_alquiler:
+        df = df[~df["Es_Alquiler"]]
+    return df if canal is None else df[df["Canal"] == canal]
+
+def test_cubo_da_las_mismas_cifras_que_las_ordenes():
+    ventas, _ = generar_reportes(2500, semilla=6)
+    analista = AnalistaDeDatos(ventas, "VENTAS")
+    cubo = CuboVentas.desde_analista(analista)
+
+    for canal, alquiler in [(None, False), ("Mesa", False), ("Yango", True)]:
+        df = _validas(analista, canal, alquiler)
+        por_hora = cubo.por_hora(canal, alquiler)
+        esperado = df.groupby("Hora_Num")["Id"].nunique()
+        assert (por_hora["Pedidos"].to_numpy() == esperado.to_numpy()).all()
+        por_mes = cubo.por_mes(canal, alquiler).set_index("Mes")
+        esperado = df.groupby(df["Fecha_DT"].dt.to_period("M").astype(str))["Monto total"].sum()
+        assert np.allclose(por_mes["Monto_Total"], esperado)
+        pedidos, monto = cubo.totales(canal, alquiler, "Saturday")
+        sabado = df[df["Dia_Semana"] == "Saturday"]
+        assert pedidos == sabado["Id"].nunique() and np.isclose(monto, sabado["Monto total"].sum())
+
+    # Re-descarga de un día: actualizar reemplaza ese día y deja el resto igual
+    dia = analista.df["Fecha_DT"].dt.normalize().dropna().iloc[0]
+    nuevo = CuboVentas.desde_analista(AnalistaDeDatos(ventas[ventas["Fecha"] == dia.strftime("%d/%m/%Y")].head(3), "VENTAS"))
+    antes = cubo.totales()
+    cubo.actualizar(nuevo)
+    assert cubo.recortar(dia, dia).totales() == nuevo.totales()
+    assert cubo.totales()[0] < antes[0]
+
+def test_cubo_del_almacen_se_recalcula_solo_en_meses_cambiados(tmp_path):
+    ruta_ventas, _ = escribir_reportes(tmp_path / "csv", 1500, semilla=7)
+    ventas = leer_reporte(ruta_ventas)
+    almacen = AlmacenReportes(tmp_path / "almacen")
+    almacen.ingerir(ruta_ventas)
+
+    cubo = CuboVentas.desde_almacen(almacen)
+    esperado = CuboVentas.desde_analista(AnalistaDeDatos(almacen.leer("Ventas"), "VENTAS"))
+    pd.testing.assert_frame_equal(cubo.por_mes(), esperado.por_mes())
+
+    guardados = sorted((tmp_path / "almacen" / "Cubo_Ventas").rglob("ordenes.parquet"))
+    mtimes = [p.stat().st_mtime_ns for p in guardados]
+    corregida = ventas.iloc[:5].copy()
+    corregida.loc[corregida.index[0], "Monto total"] += 100
+    almacen.upsert(corregida)
+
+    cubo = CuboVentas.desde_almacen(almacen)
+    cambiados = [p for p, t in zip(guardados, mtimes) if p.stat().st_mtime_ns != t]
+    assert len(cambiados) == 1
+    assert np.isclose(cubo.totales(incluir_alquiler=True)[1], esperado.totales(incluir_alquiler=True)[1] + 100)
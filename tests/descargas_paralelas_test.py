@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+import time
+from data.robotMercat import mover_sin_pisar
+from data.almacen_reportes import AlmacenReportes
+from data.descargas_paralelas import OrquestadorDescargas, borrar_csv_ingerido, pedido, pedidos_del_mes
+from data.registro_descargas import RegistroDescargas
+
+class RobotFalso:
+    """Reemplaza a Chrome: 'descarga' un CSV en su carpeta después de una demora."""
+    logins = 0
+    cerrados = 0
+    lock = threading.Lock()
+
+    def __init__(self, download_folder, almacen=None, ruta_cookies=None):
+        self.download_folder = download_folder
+        os.makedirs(download_folder, exist_ok=True)
+
+    def iniciar_sesion(self, usuario, password):
+        with RobotFalso.lock:
+            RobotFalso.logins += 1
+        return True
+
+    def descargar_reporte(self, config, parametros):
+        time.sleep(0.3)
+        self.ultimo_archivo = os.path.join(self.download_folder, "export.csv")
+        with open(self.ultimo_archivo, "w") as f:
+            f.write(f"{config['nombre']},{parametros['fecha_inicio']},{parametros['fecha_fin']}\n")
+        return self.ultimo_archivo
+
+    def renombrar_ultimo_archivo(self, nombre, carpeta_destino=None):
+        return mover_sin_pisar(self.ultimo_archivo, carpeta_destino, nombre + ".csv")
+
+    def guardar_en_almacen(self, nombre, conservar_csv=True):
+        return None
+
+    def cerrar(self):
+        with RobotFalso.lock:
+            RobotFalso.cerrados += 1
+
+def test_paquete_del_mes_en_paralelo_con_sesiones_aisladas(tmp_path):
+    RobotFalso.logins = 0
+    pedidos = pedidos_del_mes(2025, 2) + [pedido("Ventas", "01/02/2025", "14/02/2025", nombre="Ventas_02_2025")]
+    assert pedidos[0]["parametros"]["fecha_fin"] == "28/02/2025"
+
+    inicio = time.perf_counter()
+    with OrquestadorDescargas(tmp_path, "u", "p", max_sesiones=3, fabrica_robot=RobotFalso) as orq:
+        manifiesto = orq.descargar(pedidos)
+    assert time.perf_counter() - inicio < 0.3 * len(pedidos) - 0.2  # 2 rondas, no 4 en serie
+    assert RobotFalso.logins == 3 and all(e["ok"] for e in manifiesto)
+    assert [os.path.basename(e["archivo"]) for e in manifiesto] == [
+        "Ventas_02_2025.csv", "Indice_Mercat_02_2025.csv", "Por_Producto_02_2025.csv", "Ventas_02_2025 (1).csv"]
+    assert open(manifiesto[-1]["archivo"]).read().strip().endswith("01/02/2025,14/02/2025")
+    assert not (tmp_path / ".sesiones").exists()
+
+def test_sesiones_tibias_se_reutilizan_y_cierran_por_inactividad(tmp_path):
+    RobotFalso.logins = RobotFalso.cerrados = 0
+    orq = OrquestadorDescargas(tmp_path, "u", "p", max_sesiones=2, fabrica_robot=RobotFalso, inactividad=0.5)
+    orq.descargar(pedidos_del_mes(2025, 3, reportes=("Ventas", "Indice_Mercat")))
+    orq.descargar([pedido("Ventas", "01/04/2025", "30/04/2025")])
+    assert RobotFalso.logins == 2 and orq.sesiones_abiertas == 2  # el segundo envío no abre Chrome ni hace login
+    orq._en_curso, orq._ultimo_uso = 1, orq._ultimo_uso - 10  # vencida, pero con una descarga en curso
+    orq._cerrar_si_inactivo()
+    assert RobotFalso.cerrados == 0 and orq.sesiones_abiertas == 2
+    orq._en_curso = 0
+    time.sleep(0.8)
+    assert RobotFalso.cerrados == 2 and orq.sesiones_abiertas == 0
+    assert orq.descargar([pedido("Ventas", "01/05/2025", "31/05/2025")])[0]["ok"] and RobotFalso.logins == 3
+    orq.cerrar()
+
+def test_registro_evita_descargas_repetidas(tmp_path):
+    registro = RegistroDescargas(tmp_path / "registro.sqlite")
+    mes = pedido("Ventas", "01/02/2025", "28/02/2025", nombre="Ventas_02_2025")
+    with OrquestadorDescargas(tmp_path / "reportes", "u", "p", fabrica_robot=RobotFalso, registro=registro) as orq:
+        primera = orq.descargar([mes])[0]
+        # Mismo pedido reciente: no se vuelve a pedir al ERP
+        segunda = orq.descargar([mes])[0]
+        assert segunda["reutilizado"] and segunda["archivo"] == primera["archivo"] and segunda["segundos"] == 0
+        # Forzado: se descarga, pero el contenido idéntico no deja un 'Ventas_02_2025 (1).csv'
+        tercera = orq.descargar([mes], forzar=True)[0]
+        assert tercera["duplicado_de"] == primera["archivo"] and tercera["archivo"] == primera["archivo"]
+        assert [p.name for p in (tmp_path / "reportes").glob("*.csv")] == ["Ventas_02_2025.csv"]
+
+    historial = registro.historial()
+    assert len(historial) == 2 and historial["ok"].all() and historial["segundos"].min() >= 0.3
+    assert registro.vigente("Ventas", mes["parametros"], max_edad=0) is None
+    os.remove(primera["archivo"])
+    assert registro.vigente("Ventas", mes["parametros"]) is None  # sin archivo en disco se descarga de nuevo
+
+class RobotConAlmacen(RobotFalso):
+    def guardar_en_almacen(self, nombre, conservar_csv=True):
+        return {"esquema": "Ventas", "nuevas": 1}
+
+def test_sin_conservar_csv_no_se_borra_el_archivo_de_un_duplicado(tmp_path):
+    registro = RegistroDescargas(tmp_path / "registro.sqlite")
+    orq = OrquestadorDescargas(tmp_path / "reportes", "u", "p", almacen=AlmacenReportes(tmp_path / "almacen"),
+                               fabrica_robot=RobotConAlmacen, registro=registro)
+    with orq:
+        conservado = orq.descargar([pedido("Ventas", "01/02/2025", "28/02/2025", nombre="Ventas_02_2025")])[0]
+        with sqlite3.connect(registro.ruta) as con:  # de ayer: ya no está vigente, pero sigue siendo idéntica
+            con.execute("UPDATE descargas SET instante = instante - 86400")
+        sincronizado = orq.sincronizar(["Ventas"], desde_inicial="01/02/2025", hasta="28/02/2025", conservar_csv=False)[0]
+    assert sincronizado["duplicado_de"] == conservado["archivo"] and sincronizado["marca"] == "28/02/2025"
+    assert [p.name for p in (tmp_path / "reportes").glob("*.csv")] == ["Ventas_02_2025.csv"]
+    assert not borrar_csv_ingerido(sincronizado) and os.path.exists(conservado["archivo"])
+    assert borrar_csv_ingerido(conservado) and not os.path.exists(conservado["archivo"])
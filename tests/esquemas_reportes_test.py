@@ -0,0 +1,31 @@
+import pandas as pd
+from data.esquemas_reportes import detectar_esquema, leer_reporte
+from application.procesamiento import AnalistaDeDatos
+
+CSV_VENTAS = (
+    '"Fecha","Hora","Id","Estado","Validez","Tipo de orden","Descuento","Monto total","Detalle","Mesero","Cliente","Número factura"\n'
+    '"02/01/2026","10:09","9825727","PAGADO","VÁLIDO","Recojo","0.0","144.0","1× AMERICANO","Carla","Ana Pérez","00123"\n'
+    '"02/01/2026","10:48","9826163","PAGADO","ANULADO","Mesa","5.0","74.0","1× MOCHA LATTE: Semi-amargo","","",""\n'
+    '"","","","","","","","218.0","","","",""\n'
+)
+
+def test_detectar_esquema():
+    assert detectar_esquema(["Fecha", "Detalle", "Tipo de orden"]) == "Ventas"
+    assert detectar_esquema(["Número", "Creado el", "Anulado"]) == "Indice_Mercat"
+    assert detectar_esquema(["Fecha", "Tipo de flujo", "Concepto", "Monto"]) == "Flujo_Caja"
+    assert detectar_esquema(["Columna rara"]) is None
+
+def test_lectura_tipada_ventas(tmp_path):
+    ruta = tmp_path / "VENTAS.csv"
+    ruta.write_text(CSV_VENTAS, encoding="utf-8")
+    df = leer_reporte(ruta)
+    assert isinstance(df["Estado"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Detalle"].dtype, pd.StringDtype)
+    assert df["Hora"].iloc[0] == "10:09"
+    assert df["Monto total"].dtype == "float64"
+    assert pd.isna(df["Mesero"].iloc[1])
+    assert isinstance(df["Cliente"].dtype, pd.StringDtype) and df["Número factura"].iloc[0] == "00123"
+
+    tipado = AnalistaDeDatos(df, "VENTAS").get_kpis_financieros()
+    plano = AnalistaDeDatos(pd.read_csv(ruta), "VENTAS").get_kpis_financieros()
+    assert tipado == plano
@@ -0,0 +1,31 @@
+import pandas as pd
+from application.analista_operacional import AnalistaOperacional
+from application.procesamiento import AnalistaDeDatos
+from data.esquemas_reportes import leer_reporte
+from data.generador_reportes import escribir_reportes
+
+def test_generador_determinista_y_con_columnas_reales(tmp_path):
+    rutas_a = escribir_reportes(tmp_path / "a", 3000, semilla=5)
+    rutas_b = escribir_reportes(tmp_path / "b", 3000, semilla=5)
+    for a, b in zip(rutas_a, rutas_b):
+        assert open(a, "rb").read() == open(b, "rb").read()
+
+    ventas, indice = (leer_reporte(r) for r in rutas_a)
+    assert list(ventas.columns) == list(pd.read_csv("data/reportes/VENTAS_ENERO_2026.csv", nrows=0).columns)
+    assert list(indice.columns) == list(pd.read_csv("data/reportes/Índice_Mercat_ANUAL_2025.csv", nrows=0).columns)
+    assert ventas["Detalle"].str.contains("—", regex=False).any()
+    assert ventas["Métodos de pago"].astype(str).str.contains(", ", regex=False).any()
+    assert {"Sala S2", "Balcon B3"} <= set(indice["Mesa"].dropna())
+
+def test_generador_cubre_casos_del_analista(tmp_path):
+    ruta_ventas, ruta_indice = escribir_reportes(tmp_path, 3000, semilla=1)
+    ventas, indice = leer_reporte(ruta_ventas), leer_reporte(ruta_indice)
+    analista = AnalistaDeDatos(ventas, "VENTAS")
+    assert analista.df["Es_Alquiler"].sum() > 0
+    assert (analista.df["Validez_Norm"] == "ANULADO").any()
+    assert analista.df["Es_Valido_Pago_Pendiente"].any()
+    assert (analista.lineas["Variante"] != "Original/Sin Cambios").any()
+
+    maestro = AnalistaOperacional(ventas, indice).df_maestro
+    ordenes = maestro[maestro["Id"].notna()]
+    assert ordenes["creado_el"].notna().all()  # cada orden cruza con su fila del Índice
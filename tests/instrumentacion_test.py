@@ -0,0 +1,39 @@
+import tracemalloc
+import pandas as pd
+from application.instrumentacion import CapturaRendimiento, instrumentar, medir
+
+@instrumentar
+class _Analista:
+    def __init__(self, df):
+        self.df = df
+
+    @medir
+    def _interno(self):
+        return self.df.head(2)
+
+    def resumen(self):
+        self._interno()
+        return self.df[self.df["x"] > 1]
+
+def test_captura_registra_llamadas_anidadas_en_orden():
+    analista = _Analista(pd.DataFrame({"x": [1, 2, 3]}))
+    tracemalloc.start()
+    try:
+        with CapturaRendimiento() as captura:
+            analista.resumen()
+    finally:
+        tracemalloc.stop()
+    tabla = captura.tabla()
+    assert tabla["Metodo"].tolist() == ["_Analista.resumen", "_Analista._interno"]
+    assert tabla["Nivel"].tolist() == [0, 1]
+    assert tabla["Filas_Entrada"].tolist() == [3, 3]
+    assert tabla["Filas_Salida"].tolist() == [2, 2]
+    assert (tabla["Memoria_Pico_MB"] >= 0).all()
+    assert tabla.loc[0, "Memoria_Pico_MB"] >= tabla.loc[1, "Memoria_Pico_MB"]
+
+def test_sin_captura_no_registra():
+    analista = _Analista(pd.DataFrame({"x": [1, 2, 3]}))
+    with CapturaRendimiento() as captura:
+        pass
+    analista.resumen()
+    assert captura.tabla().empty
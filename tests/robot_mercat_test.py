@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+import pytest
+from data.robotMercat import RobotMercat, VigiaDescargas, mover_sin_pisar
+
+class DriverFalso:
+    def __init__(self):
+        self.cookies, self.current_url = [], ""
+
+    def get(self, url):
+        sesion = any(c["name"] == "_mercat_session" for c in self.cookies)
+        self.current_url = url if sesion or url == RobotMercat.URL_BASE else RobotMercat.URL_LOGIN
+
+    def get_cookies(self):
+        return [{"name": "_mercat_session", "value": "abc", "expiry": time.time() + 3600},
+                {"name": "viejo", "value": "x", "expiry": 1}]
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+def test_cookies_guardadas_evitan_el_login(tmp_path):
+    robot = RobotMercat.__new__(RobotMercat)  # sin abrir Chrome
+    robot.driver, robot.ruta_cookies, robot._credenciales = DriverFalso(), str(tmp_path / "sesion.json"), None
+    robot.telemetria = []
+    assert not robot.restaurar_sesion()
+    robot.guardar_cookies()
+    assert os.stat(robot.ruta_cookies).st_mode & 0o077 == 0
+
+    robot.driver = DriverFalso()
+    robot.login = lambda usuario, password: pytest.fail("no debería hacer login")
+    assert robot.iniciar_sesion("u", "p") and not robot.sesion_vencida()
+    assert [c["name"] for c in robot.driver.cookies] == ["_mercat_session"]
+    assert [(f["fase"], f["ok"]) for f in robot.tomar_telemetria()] == [("restaurar_sesion", True)]
+
+    robot.ajustar_esperas({"generar": 116.0, "archivo": 5, "otra": 1})
+    assert robot.esperas == {**RobotMercat.ESPERAS, "generar": 116.0}  # solo se alargan
+
+def test_vigia_detecta_la_descarga_terminada_y_el_movimiento_no_pisa(tmp_path):
+    (tmp_path / "viejo.csv").write_text("ya estaba")
+    trabajo = tmp_path / ".descarga-1"
+    trabajo.mkdir()
+
+    def chrome():
+        time.sleep(0.2)
+        (trabajo / "export.csv.crdownload").write_text("a,b\n1,2\n")
+        time.sleep(0.2)
+        os.rename(trabajo / "export.csv.crdownload", trabajo / "export.csv")
+
+    hilo = threading.Thread(target=chrome)
+    inicio = time.perf_counter()
+    with VigiaDescargas(trabajo) as vigia:
+        hilo.start()
+        ruta = vigia.esperar(5)
+    hilo.join()
+    assert ruta == str(trabajo / "export.csv") and time.perf_counter() - inicio < 0.9
+    with VigiaDescargas(tmp_path, ignorar=["viejo.csv"]) as vigia:
+        assert vigia.esperar(0.2) is None  # un CSV viejo no cuenta como descarga nueva
+
+    assert mover_sin_pisar(ruta, tmp_path, "viejo.csv") == "viejo (1).csv"
+    assert (tmp_path / "viejo.csv").read_text() == "ya estaba" and not os.path.exists(ruta)